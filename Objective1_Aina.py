@@ -2,6 +2,11 @@ import plotly.express as px
 import streamlit as st
 import pandas as pd
 
+import aggregates
+import weighting
+from associations import association_table, cramers_v_matrix
+from data_loader import load_data
+from sections import lazy_section
 
 def app():
     # --------------------------------------------------
@@ -20,9 +25,9 @@ def app():
     # Load and Clean Dataset
     # --------------------------------------------------
     try:
-        df = pd.read_csv("tiktok_impulse_buying_cleaned.csv")
-        # Cleaning column names to prevent KeyError: 'age_group'
-        df.columns = df.columns.str.strip() 
+        # Column names are stripped by the loader to prevent KeyError: 'age_group'.
+        # With the SQL backend enabled no rows are loaded; df is the table's version token.
+        df = aggregates.load_rows(load_data)
     except Exception as e:
         st.error(f"Error loading file: {e}")
         return
@@ -37,23 +42,26 @@ def app():
     age_col = 'age' 
     gender_col = 'gender'
     
-    age_list = ["All"] + sorted(df[age_col].dropna().unique().tolist())
+    # Population margins when the weighted mode is on (counts become weighted counts)
+    margins = weighting.active_margins()
+
+    age_list = ["All"] + aggregates.distinct(df, age_col)
     selected_age = st.selectbox("Select Age Group to filter Gender Distribution below:", age_list)
 
     # Filtering Logic for PIE CHART ONLY
     if selected_age != "All":
-        pie_df = df[df[age_col] == selected_age]
+        pie_filters = ((age_col, (selected_age,)),)
     else:
-        pie_df = df.copy()
+        pie_filters = ()
 
     # --------------------------------------------------
     # EXECUTIVE SUMMARY 📋
     # --------------------------------------------------
     st.subheader("📋 Summary")
     
-    total_respondents = len(df)
-    filtered_n = len(pie_df)
-    active_users = len(df[df['tiktok_shop_experience'] == 'Yes'])
+    total_respondents = aggregates.count(df)
+    filtered_n = aggregates.count(df, pie_filters)
+    active_users = aggregates.count(df, (('tiktok_shop_experience', ('Yes',)),))
     usage_rate = (active_users / total_respondents) * 100
 
     col_m1, col_m2, col_m3 = st.columns(3)
@@ -61,121 +69,149 @@ def app():
     col_m2.metric(f"Filtered ({selected_age})", filtered_n)
     
 
+    weighting.caption(df, margins, pie_filters)
+
     st.info(f"**Quick Insight:** 💡 Out of **{total_respondents}** participants, **{usage_rate:.1f}%** have experience using TikTok Shop. You are currently analyzing the **{selected_age}** demographic segment.")
 
     # --------------------------------------------------
     # 1. GENDER PIE CHART (Filtered by Age)
     # --------------------------------------------------
-    st.divider()
-    st.subheader("1. 📊 Gender Distribution")
-    
-    if pie_df.empty:
-        st.warning(f"No data found for Age Group: {selected_age}")
-    else:
-        gender_counts = pie_df[gender_col].value_counts().reset_index()
-        gender_counts.columns = [gender_col, 'count']
+    with lazy_section("1. 📊 Gender Distribution", key="objective1_gender") as visible:
+        if visible:
+            if filtered_n == 0:
+                st.warning(f"No data found for Age Group: {selected_age}")
+            else:
+                gender_counts = aggregates.value_counts(df, gender_col, pie_filters, margins).reset_index()
+                gender_counts.columns = [gender_col, 'count']
 
-        fig1 = px.pie(
-            gender_counts, values='count', names=gender_col, 
-            title=f"Gender Proportion (Age: {selected_age})",
-            color_discrete_sequence=px.colors.qualitative.Pastel, hole=0.4
-        )
-        st.plotly_chart(fig1, use_container_width=True)
-        
-        top_gender = gender_counts.iloc[0][gender_col]
-        percentage = (gender_counts.iloc[0]['count'] / len(pie_df)) * 100
-        st.info(f"Interpretation: 🎯 For the {selected_age} group, the sample is dominated by {top_gender}s ({percentage:.1f}%).The pie chart reveals that the respondent pool is dominated by [Gender], representing [Percentage]% of the total. This suggests that marketing efforts should be tailored toward this specific demographic")
+                fig1 = px.pie(
+                    gender_counts, values='count', names=gender_col, 
+                    title=f"Gender Proportion (Age: {selected_age})",
+                    color_discrete_sequence=px.colors.qualitative.Pastel, hole=0.4
+                )
+                st.plotly_chart(fig1, use_container_width=True)
+
+                top_gender = gender_counts.iloc[0][gender_col]
+                percentage = (gender_counts.iloc[0]['count'] / gender_counts['count'].sum()) * 100
+                st.info(f"Interpretation: 🎯 For the {selected_age} group, the sample is dominated by {top_gender}s ({percentage:.1f}%).The pie chart reveals that the respondent pool is dominated by [Gender], representing [Percentage]% of the total. This suggests that marketing efforts should be tailored toward this specific demographic")
 
     # --------------------------------------------------
     # 2. AGE GROUP HISTOGRAM (Independent)
     # --------------------------------------------------
-    st.divider()
-    st.subheader("2. 🕒 Overall Usage by Age")
-    age_order = ['17 - 21 years old', '22 - 26 years old', '27 - 31 years old']
-    
-    fig2 = px.histogram(
-        df, x=age_col, color='tiktok_shop_experience', barmode='group',
-        category_orders={age_col: age_order},
-        color_discrete_sequence=px.colors.qualitative.Bold,
-        title='TikTok Shop Usage Trend'
-    )
-    st.plotly_chart(fig2, use_container_width=True)
-    st.info("**Interpretation:** 🚀 The **22–26 age group** consistently represents the highest engagement level on the platform.")
+    with lazy_section("2. 🕒 Overall Usage by Age", key="objective1_age_usage") as visible:
+        if visible:
+            age_order = ['17 - 21 years old', '22 - 26 years old', '27 - 31 years old']
+
+            usage_counts = (
+                aggregates.crosstab(df, age_col, 'tiktok_shop_experience', margins=margins)
+                .reset_index()
+                .melt(id_vars=age_col, var_name='tiktok_shop_experience', value_name='count')
+            )
+
+            fig2 = px.bar(
+                usage_counts, x=age_col, y='count', color='tiktok_shop_experience', barmode='group',
+                category_orders={age_col: age_order},
+                color_discrete_sequence=px.colors.qualitative.Bold,
+                title='TikTok Shop Usage Trend'
+            )
+            st.plotly_chart(fig2, use_container_width=True)
+            st.info("**Interpretation:** 🚀 The **22–26 age group** consistently represents the highest engagement level on the platform.")
 
     # --------------------------------------------------
     # 3. Monthly Income Distribution (Independent)
     # --------------------------------------------------
-    st.divider()
-    st.subheader("3. 💰 Monthly Income Distribution")
-    income_order = df['monthly_income'].value_counts().index.tolist()
-    fig3 = px.histogram(
-        df, x='monthly_income',
-        category_orders={'monthly_income': income_order},
-        color='monthly_income', color_discrete_sequence=px.colors.sequential.Viridis,
-        title='Income Category Distribution'
-    )
-    st.plotly_chart(fig3, use_container_width=True)
-
-    top_income = df['monthly_income'].value_counts().idxmax()
-    st.info(f"**Interpretation:** 💵 The bar chart for TikTok Shop Usage across Age Groups shows that the 22–26 years old group has the highest engagement, with a count of 80 users. This is significantly higher than the 17–21 years old group (under 20 users) and the 27–31 years old group, which shows the lowest activity.")
+    with lazy_section("3. 💰 Monthly Income Distribution", key="objective1_income") as visible:
+        if visible:
+            income_counts = aggregates.value_counts(df, 'monthly_income', margins=margins)
+            income_order = income_counts.index.tolist()
+            fig3 = px.bar(
+                income_counts.reset_index(), x='monthly_income', y='count',
+                category_orders={'monthly_income': income_order},
+                color='monthly_income', color_discrete_sequence=px.colors.sequential.Viridis,
+                title='Income Category Distribution'
+            )
+            st.plotly_chart(fig3, use_container_width=True)
+
+            top_income = income_counts.idxmax()
+            st.info(f"**Interpretation:** 💵 The bar chart for TikTok Shop Usage across Age Groups shows that the 22–26 years old group has the highest engagement, with a count of 80 users. This is significantly higher than the 17–21 years old group (under 20 users) and the 27–31 years old group, which shows the lowest activity.")
 
   # --------------------------------------------------
     # 4. 🎓 Distribution by Faculty
     # --------------------------------------------------
-    st.divider()
-    st.subheader("4. 🎓 Distribution by Faculty")
+    with lazy_section("4. 🎓 Distribution by Faculty", key="objective1_faculty") as visible:
+        if visible:
+            # Define your official survey faculty list
+            official_faculties = ['FKP', 'FTKW', 'FSB', 'FHPK', 'FBI', 'FSDK']
 
-    # Define your official survey faculty list
-    official_faculties = ['FKP', 'FTKW', 'FSB', 'FHPK', 'FBI', 'FSDK']
+            # Count faculties, then group everything else into 'Other'
+            faculty_counts = aggregates.value_counts(df, 'faculty', margins=margins)
+            faculty_counts = faculty_counts.groupby(
+                lambda x: x if x in official_faculties else 'Other'
+            ).sum().reset_index()
+            faculty_counts.columns = ['faculty', 'count']
 
-    # Create a copy for processing
-    faculty_df = df.copy()
+            # Sort so the highest is at the top of the horizontal bar
+            faculty_counts = faculty_counts.sort_values(by='count', ascending=True)
 
-    # Logic to group everything else into 'Other'
-    faculty_df['faculty_cleaned'] = faculty_df['faculty'].apply(
-        lambda x: x if x in official_faculties else 'Other'
-    )
+            fig4 = px.bar(
+                faculty_counts, 
+                x='count', 
+                y='faculty', 
+                orientation='h',
+                title='User Distribution by Official Faculty Categories',
+                color='count', 
+                color_continuous_scale='Viridis',
+                # Ensure 'Other' stays at the bottom or top consistently if preferred
+                category_orders={'faculty': ['Other'] + official_faculties} 
+            )
 
-    # Count the cleaned faculty data
-    faculty_counts = faculty_df['faculty_cleaned'].value_counts().reset_index()
-    faculty_counts.columns = ['faculty', 'count']
-    
-    # Sort so the highest is at the top of the horizontal bar
-    faculty_counts = faculty_counts.sort_values(by='count', ascending=True)
-
-    fig4 = px.bar(
-        faculty_counts, 
-        x='count', 
-        y='faculty', 
-        orientation='h',
-        title='User Distribution by Official Faculty Categories',
-        color='count', 
-        color_continuous_scale='Viridis',
-        # Ensure 'Other' stays at the bottom or top consistently if preferred
-        category_orders={'faculty': ['Other'] + official_faculties} 
-    )
-    
-    st.plotly_chart(fig4, use_container_width=True)
-    
-    # Dynamic Interpretation
-    top_faculty = faculty_counts.iloc[-1]['faculty']
-    st.info(f"**Interpretation:** 🏫 The **{top_faculty}** faculty shows the highest participation rate in this survey. Responses from smaller departments or unofficial entries have been grouped into **'Other'** to match the core survey structure.")
+            st.plotly_chart(fig4, use_container_width=True)
+
+            # Dynamic Interpretation
+            top_faculty = faculty_counts.iloc[-1]['faculty']
+            st.info(f"**Interpretation:** 🏫 The **{top_faculty}** faculty shows the highest participation rate in this survey. Responses from smaller departments or unofficial entries have been grouped into **'Other'** to match the core survey structure.")
 
     # --------------------------------------------------
     # 5. TikTok Shop Experience by Gender (Independent)
     # --------------------------------------------------
-    st.divider()
-    st.subheader("5. 👩‍💻 Experience by Gender")
-    crosstab_df = pd.crosstab(df[gender_col], df['tiktok_shop_experience']).reset_index()
-
-    fig5 = px.bar(
-        crosstab_df, x=gender_col, y=crosstab_df.columns[1:], 
-        title='Experience Ratio per Gender',
-        labels={gender_col: 'Gender', 'value': 'Count', 'variable': 'Experience'},
-        color_discrete_sequence=px.colors.qualitative.Set2, barmode='stack'
-    )
-    st.plotly_chart(fig5, use_container_width=True)
-    st.info("**Interpretation:** 🤝 This chart identifies the platform adoption rate, showing how experience levels differ between male and female users.")
+    with lazy_section("5. 👩‍💻 Experience by Gender", key="objective1_experience") as visible:
+        if visible:
+            crosstab_df = aggregates.crosstab(df, gender_col, 'tiktok_shop_experience', margins=margins).reset_index()
+
+            fig5 = px.bar(
+                crosstab_df, x=gender_col, y=crosstab_df.columns[1:], 
+                title='Experience Ratio per Gender',
+                labels={gender_col: 'Gender', 'value': 'Count', 'variable': 'Experience'},
+                color_discrete_sequence=px.colors.qualitative.Set2, barmode='stack'
+            )
+            st.plotly_chart(fig5, use_container_width=True)
+            st.info("**Interpretation:** 🤝 This chart identifies the platform adoption rate, showing how experience levels differ between male and female users.")
+
+    # --------------------------------------------------
+    # 6. Association Between Demographics
+    # --------------------------------------------------
+    with lazy_section("6. 🔗 Association Between Demographics", key="objective1_associations") as visible:
+        if visible:
+            assoc = association_table(df)
+
+            fig6 = px.imshow(
+                cramers_v_matrix(assoc),
+                text_auto='.2f', zmin=0, zmax=1,
+                color_continuous_scale='Blues',
+                title="Cramér's V for Each Pair of Demographic Variables"
+            )
+            st.plotly_chart(fig6, use_container_width=True)
+
+            st.dataframe(
+                assoc.rename(columns={'chi2': 'Chi-square', 'dof': 'df', 'p_value': 'p-value', 'cramers_v': "Cramér's V"}),
+                hide_index=True,
+                column_config={
+                    'Chi-square': st.column_config.NumberColumn(format='%.2f'),
+                    'p-value': st.column_config.NumberColumn(format='%.4f'),
+                    "Cramér's V": st.column_config.NumberColumn(format='%.3f')
+                }
+            )
+            st.info("**Interpretation:** 📐 Cramér's V ranges from 0 (no association) to 1 (perfect association). Pairs with a p-value below 0.05 are unlikely to be independent; blank cells mean a variable has only one observed level, so no test is possible.")
 
 if __name__ == "__main__":
     app()
@@ -1,40 +1,65 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 
-def app():
-
-    # --------------------------------------------------
-    # Page Title
-    # --------------------------------------------------
-    st.header(
-        "Sub-Objective 2: Evaluate the Influence of Scarcity and Serendipity on Shopping Behavior"
+import aggregates
+import irt_model
+import job_scheduler
+import snapshot
+import weighting
+from constructs import CONSTRUCTS, CONSTRUCT_SCORES, LIKERT_ITEMS
+from data_loader import dataset_version, load_data
+from figure_codec import compact_figure
+from permutation_tests import difference_table, permutation_tasks
+from result_cache import memoize
+
+
+# --------------------------------------------------
+# Significance layer (background job, cached when done)
+# --------------------------------------------------
+def oib_permutation_job(n_permutations=5000):
+    df = irt_model.page_frame(load_data())
+    key = ('oib_permutation_tests', dataset_version(df), n_permutations)
+    owner = job_scheduler.session_owner('oib_permutation_tests')
+    # Reruns reuse the running or finished job without rebuilding its inputs
+    job = job_scheduler.lookup(key, owner)
+    if job is not None:
+        return job
+
+    # The OIB items and scores define the split, so they are not tested
+    excluded = set(CONSTRUCTS['ImpulseBuying']) | {'ImpulseBuying'}
+    columns = [c for c in LIKERT_ITEMS + CONSTRUCT_SCORES if c in df.columns and c not in excluded]
+    labels = (oib_category(df) == 'High OIB').to_numpy()
+    values = df[columns].to_numpy(dtype=np.float64)
+
+    observed, tasks = permutation_tasks(values, labels, n_permutations)
+
+    def combine(exceed):
+        p_values = (sum(exceed) + 1) / (n_permutations + 1)
+        return difference_table(columns, values, labels, 'High OIB', observed, p_values)
+
+    return job_scheduler.submit(key, tasks, combine, owner=owner)
+
+
+@memoize
+def oib_category(df):
+    # Split respondents at the mean impulse buying score
+    if 'OIB_Category' in df.columns:
+        return df['OIB_Category']
+    mean_oib_score = df['OIB_score'].mean()
+    return pd.Series(
+        np.where(df['OIB_score'].to_numpy() >= mean_oib_score, 'High OIB', 'Low OIB'),
+        index=df.index,
+        name='OIB_Category'
     )
 
-    st.subheader("Problem Statement")
-    st.write("""
-    Scarcity cues such as time-limited promotions and limited product availability, 
-    as well as unexpected product discovery, are commonly used in digital commerce. 
-    However, without proper analysis, it is difficult to determine how strongly 
-    these factors influence students’ shopping perceptions and behaviors.
-    """)
-
-    # --------------------------------------------------
-    # Load Dataset 
-    # --------------------------------------------------
-    df = pd.read_csv("tiktok_impulse_buying_cleaned.csv")
 
-    # ==================================================
-    # 1. Density Plot (Corrected for Streamlit/Plotly)
-    # ==================================================
-    # Ensure OIB_Category is created
-    if 'OIB_Category' not in df.columns:
-        mean_oib_score = df['OIB_score'].mean()
-        df['OIB_Category'] = df['OIB_score'].apply(
-            lambda x: 'High OIB' if x >= mean_oib_score else 'Low OIB'
-        )
+def oib_density_figure(df, categories, weights=None):
+    # Weighted densities sum each respondent's weight instead of counting them
+    weighted = {} if weights is None else {'histfunc': 'sum'}
 
     # Create subplots
     fig = make_subplots(
@@ -47,28 +72,32 @@ def app():
     )
 
     # Scarcity density plot
-    for category in df['OIB_Category'].unique():
-        subset = df[df['OIB_Category'] == category]
+    for category in categories.unique():
+        in_category = (categories == category).to_numpy()
         fig.add_trace(
             go.Histogram(
-                x=subset['Scarcity'],
+                x=df['Scarcity'].to_numpy()[in_category],
+                y=None if weights is None else weights[in_category],
                 histnorm='probability density',
                 name=category,
-                opacity=0.6
+                opacity=0.6,
+                **weighted
             ),
             row=1, col=1
         )
 
     # Serendipity density plot
-    for category in df['OIB_Category'].unique():
-        subset = df[df['OIB_Category'] == category]
+    for category in categories.unique():
+        in_category = (categories == category).to_numpy()
         fig.add_trace(
             go.Histogram(
-                x=subset['Serendipity'],
+                x=df['Serendipity'].to_numpy()[in_category],
+                y=None if weights is None else weights[in_category],
                 histnorm='probability density',
                 name=category,
                 opacity=0.6,
-                showlegend=False  # avoid duplicate legend
+                showlegend=False,  # avoid duplicate legend
+                **weighted
             ),
             row=1, col=2
         )
@@ -86,8 +115,70 @@ def app():
     fig.update_yaxes(title_text="Density", row=1, col=1)
     fig.update_yaxes(title_text="Density", row=1, col=2)
 
+    # The histograms ship every raw score; send them as float32 buffers
+    return compact_figure(fig)
+
+
+def app():
+
+    # --------------------------------------------------
+    # Page Title
+    # --------------------------------------------------
+    st.header(
+        "Sub-Objective 2: Evaluate the Influence of Scarcity and Serendipity on Shopping Behavior"
+    )
+
+    st.subheader("Problem Statement")
+    st.write("""
+    Scarcity cues such as time-limited promotions and limited product availability, 
+    as well as unexpected product discovery, are commonly used in digital commerce. 
+    However, without proper analysis, it is difficult to determine how strongly 
+    these factors influence students’ shopping perceptions and behaviors.
+    """)
+
+    # --------------------------------------------------
+    # Load Dataset 
+    # --------------------------------------------------
+    df = irt_model.page_frame(load_data())
+
+    # Population margins when the weighted mode is on
+    margins = weighting.active_margins()
+    weighting.caption(df, margins)
+
+    # ==================================================
+    # 1. Density Plot (Corrected for Streamlit/Plotly)
+    # ==================================================
+    # OIB_Category lives in a per-request series, not on the shared frame
+    categories = oib_category(df)
+
+    if margins:
+        fig = oib_density_figure(df, categories, weighting.weights_for(df, df, margins))
+    else:
+        fig = snapshot.figure('objective2_density', lambda: oib_density_figure(df, categories))
     st.plotly_chart(fig, use_container_width=True)
 
+    # --------------------------------------------------
+    # Permutation tests: High vs Low OIB
+    # --------------------------------------------------
+    with st.expander("📐 Significance of High vs Low OIB Differences (permutation tests)"):
+        n_permutations = st.select_slider(
+            "Number of permutations:",
+            options=[1000, 5000, 20000, 50000],
+            value=5000
+        )
+        test_df = job_scheduler.poll(oib_permutation_job(n_permutations), "Running permutation tests...")
+        if test_df is not None:
+            st.dataframe(
+                test_df.round(3).sort_values(by='p-value'),
+                use_container_width=True
+            )
+            n_significant = int(test_df['Significant'].sum())
+            st.caption(
+                f"Two-sided permutation tests of the mean difference ({n_permutations} shuffles), "
+                f"Benjamini–Hochberg FDR at 5%: {n_significant} of {len(test_df)} variables differ significantly. "
+                "Impulse buying items are excluded because they define the OIB split."
+            )
+
     st.write("""
     **Interpretation:**  
     - High OIB students are more sensitive to scarcity cues, with higher density at elevated scarcity scores, indicating urgency strongly drives their impulse buying.
@@ -99,8 +190,7 @@ def app():
     # 2. Monthly Income vs Scores
     # ==================================================
     average_scores_by_income = (
-        df.groupby('monthly_income')[['Scarcity', 'Serendipity']]
-        .mean()
+        aggregates.group_means(df, 'monthly_income', ['Scarcity', 'Serendipity'], margins=margins)
         .reset_index()
     )
 
@@ -146,8 +236,7 @@ def app():
     # 3. Gender Comparison
     # ==================================================
     average_scores_by_gender = (
-        df.groupby('gender')[['Scarcity', 'Serendipity']]
-        .mean()
+        aggregates.group_means(df, 'gender', ['Scarcity', 'Serendipity'], margins=margins)
         .reset_index()
     )
 
@@ -218,13 +307,17 @@ def app():
         ]
     )
 
+    # In the weighted mode each respondent adds their weight to their bin
+    weights = weighting.weights_for(df, df, margins) if margins else None
+    weighted = {} if weights is None else {'y': weights, 'histfunc': 'sum'}
+
     fig.add_trace(
-        go.Histogram(x=df['Scarcity'], nbinsx=5, histnorm='probability density'),
+        go.Histogram(x=df['Scarcity'], nbinsx=5, histnorm='probability density', **weighted),
         row=1, col=1
     )
 
     fig.add_trace(
-        go.Histogram(x=df['Serendipity'], nbinsx=5, histnorm='probability density'),
+        go.Histogram(x=df['Serendipity'], nbinsx=5, histnorm='probability density', **weighted),
         row=1, col=2
     )
 
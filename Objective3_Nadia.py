@@ -5,6 +5,116 @@ import matplotlib.pyplot as plt
 import plotly.graph_objects as go
 import numpy as np
 
+import irt_model
+import job_scheduler
+import snapshot
+import weighting
+from bootstrap import bootstrap_tasks, percentile_intervals
+from constructs import CONSTRUCTS
+from data_loader import dataset_version, filtered_view, imputation_mask, load_data, scratch_frame
+from density_render import density_figure, trend_line, use_density
+from figure_codec import compact_figure
+from imputation import imputed_rows
+from likert_cube import LikertCube, box_figure
+from ordinal_correlation import correlation_test, significance_table
+from result_cache import memoize
+
+
+@memoize
+def filtered_scores(df, filters, exclude_imputed=False):
+    """
+    Filtered respondents and their Trust/Motivation composites.
+
+    Skipped answers are imputed at ingest, so every respondent is kept unless
+    exclude_imputed drops those with an imputed Trust or Motivation answer.
+    Rows left incomplete (imputation turned off) are always dropped.
+    """
+    view = filtered_view(df, filters)
+    if irt_model.is_scored(df):
+        # Graded-response scores computed for the whole frame
+        scores = scratch_frame(
+            view.index,
+            Trust_Score=view['Trust_Score'].to_numpy(),
+            Motivation_Score=view['Motivation_Score'].to_numpy()
+        )
+    else:
+        scores = scratch_frame(
+            view.index,
+            Trust_Score=view[CONSTRUCTS['Trust']].mean(axis=1),
+            Motivation_Score=view[CONSTRUCTS['Motivation']].mean(axis=1)
+        )
+    keep = scores.notna().all(axis=1).to_numpy()
+    imputed = imputed_rows(imputation_mask(df), CONSTRUCTS['Trust'] + CONSTRUCTS['Motivation'])
+    if exclude_imputed and imputed is not None:
+        keep = keep & ~imputed[df.index.get_indexer(view.index)]
+    if not keep.all():
+        view, scores = view[keep], scores[keep]
+    return view, scores
+
+
+@memoize
+def item_correlations(df, filters, items, margins=(), exclude_imputed=False):
+    view, _ = filtered_scores(df, filters, exclude_imputed)
+    if margins:
+        return weighting.weighted_correlation(view, weighting.weights_for(df, view, margins), items)
+    return view[list(items)].corr()
+
+
+@memoize
+def item_correlation_test(df, filters, items, method, margins=(), exclude_imputed=False):
+    """Correlations of the items with p-values and confidence intervals."""
+    view, _ = filtered_scores(df, filters, exclude_imputed)
+    weights = weighting.weights_for(df, view, margins) if margins else None
+    return correlation_test(view, items, method, weights)
+
+
+@memoize
+def item_means(df, filters, items, margins=(), exclude_imputed=False):
+    view, _ = filtered_scores(df, filters, exclude_imputed)
+    if margins:
+        return weighting.weighted_means(view, weighting.weights_for(df, view, margins), items)
+    return view[list(items)].mean()
+
+
+@memoize
+def filtered_cube(df, filters, margins=(), exclude_imputed=False):
+    """Likert cube of the filtered respondents, weighted like the page's other charts."""
+    if not filters and not exclude_imputed:
+        return weighting.cube(df, margins)
+    view, _ = filtered_scores(df, filters, exclude_imputed)
+    return LikertCube.from_frame(view, weights=weighting.weights_for(df, view, margins) if margins else None)
+
+
+def bootstrap_job(df, filters, n_resamples=2000, exclude_imputed=False):
+    """Background bootstrap of the Trust/Motivation means and their correlation."""
+    key = ('objective3_bootstrap', dataset_version(df), filters, n_resamples, exclude_imputed)
+    # A filter change replaces this session's job and cancels the stale one
+    owner = job_scheduler.session_owner('objective3_bootstrap')
+    job = job_scheduler.lookup(key, owner)
+    if job is not None:
+        return job
+
+    _, scores = filtered_scores(df, filters, exclude_imputed)
+    X = scores[['Trust_Score', 'Motivation_Score']].to_numpy()
+    return job_scheduler.submit(
+        key,
+        bootstrap_tasks(X, n_resamples),
+        lambda replicates: percentile_intervals(X, replicates, ['Trust', 'Motivation']),
+        owner=owner
+    )
+
+
+def trust_motivation_heatmap(corr, title='Correlation Matrix of Trust & Motivation Items'):
+    return px.imshow(
+        corr,
+        text_auto='.2f',
+        zmin=-1,
+        zmax=1,
+        color_continuous_scale='RdBu',
+        title=title
+    )
+
+
 def app():
     # ==================================================
     # MAIN TITLE (BIG & CENTERED)
@@ -38,27 +148,44 @@ def app():
     # ==================================================
     # LOAD DATASET
     # ==================================================
-    df = pd.read_csv("tiktok_impulse_buying_cleaned.csv")
+    # Shared read-only frame: filters select rows, derived columns go to a scratch frame
+    shared_df = irt_model.page_frame(load_data())
 
     # ==================================================
     # SIDEBAR FILTERS
     # ==================================================
     st.sidebar.header("🔍 Data Filters")
-    if 'gender' in df.columns:
+    filters = []
+    if 'gender' in shared_df.columns:
         selected_gender = st.sidebar.multiselect(
             "Select Gender",
-            options=df['gender'].unique(),
-            default=df['gender'].unique()
+            options=shared_df['gender'].unique(),
+            default=shared_df['gender'].unique()
         )
-        df = df[df['gender'].isin(selected_gender)]
+        filters.append(('gender', tuple(selected_gender)))
 
-    if 'age_group' in df.columns:
+    if 'age_group' in shared_df.columns:
         selected_age = st.sidebar.multiselect(
             "Select Age Group",
-            options=df['age_group'].unique(),
-            default=df['age_group'].unique()
+            options=shared_df['age_group'].unique(),
+            default=shared_df['age_group'].unique()
         )
-        df = df[df['age_group'].isin(selected_age)]
+        filters.append(('age_group', tuple(selected_age)))
+
+    # Drop filters that keep every category, so the default view is the shared frame itself
+    filters = tuple(
+        (col, values) for col, values in filters
+        if set(values) != set(shared_df[col].dropna().unique())
+    )
+    default_view = not filters
+
+    # Population margins when the weighted mode is on
+    margins = weighting.active_margins()
+
+    # Skipped answers are imputed at ingest; optionally leave those respondents out
+    exclude_imputed = False
+    if imputation_mask(shared_df) is not None:
+        exclude_imputed = st.sidebar.checkbox("Exclude respondents with imputed answers", value=False)
 
     # ==================================================
     # DEFINE FACTORS GROUPS
@@ -93,23 +220,33 @@ def app():
     # ==================================================
     # CREATE COMPOSITE SCORES
     # ==================================================
-    df['Trust_Score'] = df[trust_items].mean(axis=1)
-    df['Motivation_Score'] = df[motivation_items].mean(axis=1)
-    df = df.dropna(subset=['Trust_Score', 'Motivation_Score'])
+    # Filtered rows and composites are cached per filter signature
+    df, scores = filtered_scores(shared_df, filters, exclude_imputed)
+    weights = weighting.weights_for(shared_df, df, margins) if margins else None
 
     # ==================================================
     # SUMMARY METRICS
     # ==================================================
     st.markdown("## 📈 Summary Metrics")
     col1, col2 = st.columns(2)
-    col1.metric("Average Trust Score", f"{df['Trust_Score'].mean():.2f}")
-    col2.metric("Average Motivation Score", f"{df['Motivation_Score'].mean():.2f}")
+    col1.metric("Average Trust Score", f"{weighting.weighted_mean(scores['Trust_Score'], weights):.2f}")
+    col2.metric("Average Motivation Score", f"{weighting.weighted_mean(scores['Motivation_Score'], weights):.2f}")
+    weighting.caption(shared_df, margins, filters)
+
+    with st.expander("📐 Bootstrap 95% Confidence Intervals"):
+        if len(scores) < 2:
+            st.info("At least two respondents are needed for confidence intervals.")
+        else:
+            intervals = job_scheduler.poll(bootstrap_job(shared_df, filters, exclude_imputed=exclude_imputed), "Bootstrapping...")
+            if intervals is not None:
+                st.dataframe(intervals.round(3), use_container_width=True)
+                st.caption("Percentile intervals from 2,000 bootstrap resamples of the filtered respondents.")
 
     # ==================================================
     # HELPER FUNCTIONS
     # ==================================================
     def plot_bar(df, items, title):
-        means = df[items].mean().reset_index()
+        means = item_means(shared_df, filters, items, margins, exclude_imputed).reset_index()
         means.columns = ['Item', 'Mean Score']
         fig = px.bar(means, x='Item', y='Mean Score', title=title)
         st.plotly_chart(fig, use_container_width=True)
@@ -123,9 +260,9 @@ def app():
                 else:
                     st.markdown(f"- **{row['Item']}** is moderate ({row['Mean Score']:.2f})")
 
-    def plot_box(df, items, title):
-        df_long = df[items].melt(var_name='Item', value_name='Score')
-        fig = px.box(df_long, x='Item', y='Score', points='all', title=title)
+    def plot_box(items, title):
+        # Distribution comes from a response-count tensor of the filtered view (no melt)
+        fig = box_figure(filtered_cube(shared_df, filters, margins, exclude_imputed), items, title=title, points='all')
         st.plotly_chart(fig, use_container_width=True)
 
     # ==================================================
@@ -149,18 +286,29 @@ def app():
     # ==================================================
     if viz_option == "Correlation Heatmap":
         corr_items = trust_items + motivation_items
-        corr = df[corr_items].corr()
-
-        fig = px.imshow(
-            corr,
-            text_auto='.2f',
-            zmin=-1,
-            zmax=1,
-            color_continuous_scale='RdBu',
-            title='Correlation Matrix of Trust & Motivation Items'
+        method = st.radio(
+            "Correlation method",
+            ["Pearson", "Spearman", "Polychoric"],
+            horizontal=True,
+            help="Spearman and polychoric treat the 1–5 answers as ordered categories; "
+                 "polychoric estimates the correlation of the underlying continuous attitudes."
         )
+        if method != "Pearson":
+            corr = item_correlation_test(shared_df, filters, corr_items, method.lower(), margins, exclude_imputed)['r']
+            fig = trust_motivation_heatmap(corr, title=f'{method} Correlation Matrix of Trust & Motivation Items')
+        elif default_view and not margins and not exclude_imputed:
+            # Unfiltered view: correlations and figure come from the startup snapshot
+            stats = snapshot.artifact('correlations')
+            corr = stats['items'].loc[corr_items, corr_items] if stats else item_correlations(shared_df, filters, corr_items)
+            fig = snapshot.figure('objective3_correlation', lambda: trust_motivation_heatmap(corr))
+        else:
+            corr = item_correlations(shared_df, filters, corr_items, margins, exclude_imputed)
+            fig = trust_motivation_heatmap(corr)
         st.plotly_chart(fig, use_container_width=True)
 
+        with st.expander("📐 Significance and 95% confidence intervals"):
+            significance_table(item_correlation_test(shared_df, filters, corr_items, method.lower(), margins, exclude_imputed))
+
         # -------- IMPROVED STRONG CORRELATION TABLE --------
         corr_long = corr.reset_index().melt(
             id_vars='index',
@@ -174,10 +322,10 @@ def app():
             (corr_long['Correlation'].abs() < 1)
         ]
         
-        strong_corr['Pair'] = strong_corr.apply(
-            lambda row: '-'.join(sorted([row['Variable 1'], row['Variable 2']])),
-            axis=1
-        )
+        strong_corr = strong_corr.assign(Pair=[
+            '-'.join(sorted(pair))
+            for pair in zip(strong_corr['Variable 1'], strong_corr['Variable 2'])
+        ])
         strong_corr = strong_corr.drop_duplicates(subset='Pair').drop(columns='Pair')
         
         # Display strong correlation table if exists
@@ -219,7 +367,7 @@ def app():
             st.warning("Please select at least one trust item.")
             selected_trust_items = trust_items
     
-        trust_means = df[selected_trust_items].mean().reset_index()
+        trust_means = item_means(shared_df, filters, selected_trust_items, margins, exclude_imputed).reset_index()
         trust_means.columns = ['Trust Item', 'Mean Score']
     
         fig2 = px.bar(
@@ -247,8 +395,13 @@ def app():
     # 3️⃣ BOX PLOT - TRUST RESPONSES
     # ==================================================
     if viz_option == "Trust Box Plot":
-        trust_long = df[trust_items].melt(var_name='Trust Item', value_name='Response')
-        fig3 = px.box(trust_long, x='Trust Item', y='Response', points='all', title='Trust Item Response Distribution')
+        fig3 = box_figure(
+            filtered_cube(shared_df, filters, margins, exclude_imputed),
+            trust_items,
+            title='Trust Item Response Distribution',
+            item_label='Trust Item',
+            points='all'
+        )
         st.plotly_chart(fig3, use_container_width=True)
     
         # -------------------------
@@ -268,7 +421,7 @@ def app():
     # 4️⃣ BAR CHART - MOTIVATION ITEMS
     # ==================================================
     if viz_option == "Motivation Bar Chart":
-        mot_means = df[motivation_items].mean().reset_index()
+        mot_means = item_means(shared_df, filters, motivation_items, margins, exclude_imputed).reset_index()
         mot_means.columns = ['Motivation Item', 'Mean Score']
         fig4 = px.bar(mot_means, x='Motivation Item', y='Mean Score', title="Average Motivation Scores")
         st.plotly_chart(fig4, use_container_width=True)
@@ -291,27 +444,35 @@ def app():
     # ==================================================
     if viz_option == "Trust vs Motivation Scatter":
         show_trendline = st.checkbox("Show Trend Line", value=True)
+        labels = {'Trust_Score': 'Trust Score', 'Motivation_Score': 'Motivation Score', 'gender': 'Gender'}
+        color_map = {'Male': 'blue', 'Female': 'green'}  # optional: set custom colors
+
+        if use_density(len(scores)):
+            # Too many respondents for one marker each: bin them on the server
+            fig5 = density_figure(
+                scores['Trust_Score'], scores['Motivation_Score'],
+                color=df['gender'].to_numpy(), weights=weights, trendline=show_trendline,
+                title='Trust vs Motivation by Gender', x_title=labels['Trust_Score'],
+                y_title=labels['Motivation_Score'], color_title=labels['gender'], color_map=color_map
+            )
+            st.caption(f"Showing the density of {len(scores):,} respondents.")
+        else:
+            # Scatter plot with gender coloring
+            fig5 = px.scatter(
+                scores.assign(gender=df['gender'].to_numpy()),
+                x='Trust_Score',
+                y='Motivation_Score',
+                color='gender',  # color dots by gender
+                labels=labels,
+                title='Trust vs Motivation by Gender',
+                color_discrete_map=color_map
+            )
+
+            if show_trendline:
+                x_line, y_line = trend_line(scores['Trust_Score'], scores['Motivation_Score'], weights)
+                fig5.add_scatter(x=x_line, y=y_line, mode='lines', name='Trend Line')
     
-        # Scatter plot with gender coloring
-        fig5 = px.scatter(
-            df,
-            x='Trust_Score',
-            y='Motivation_Score',
-            color='gender',  # color dots by gender
-            labels={'Trust_Score': 'Trust Score', 'Motivation_Score': 'Motivation Score', 'gender': 'Gender'},
-            title='Trust vs Motivation by Gender',
-            color_discrete_map={'Male': 'blue', 'Female': 'green'}  # optional: set custom colors
-        )
-    
-        if show_trendline:
-            x = df['Trust_Score'].values
-            y = df['Motivation_Score'].values
-            m, b = np.polyfit(x, y, 1)
-            x_line = np.linspace(x.min(), x.max(), 100)
-            y_line = m * x_line + b
-            fig5.add_scatter(x=x_line, y=y_line, mode='lines', name='Trend Line')
-    
-        st.plotly_chart(fig5, use_container_width=True)
+        st.plotly_chart(compact_figure(fig5), use_container_width=True)
     
         # -------------------------
         # INTERPRETATION / INSIGHTS
@@ -333,7 +494,7 @@ def app():
     # ==================================================
     if viz_option == "Trust Radar Chart":
         labels = selected_trust_items
-        values = df[selected_trust_items].mean().tolist()
+        values = item_means(shared_df, filters, selected_trust_items, margins, exclude_imputed).tolist()
         values += values[:1]  # close the loop
     
         fig6 = go.Figure(
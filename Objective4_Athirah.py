@@ -2,6 +2,73 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 
+import aggregates
+import irt_model
+import snapshot
+import weighting
+from data_loader import load_data
+from density_render import density_figure, trend_line, use_density
+from figure_codec import compact_figure
+from likert_cube import box_figure, diverging_bar_figure, overlay_histogram_figure, stacked_bar_figure
+from ordinal_correlation import correlation_test, significance_table
+from result_cache import memoize
+from sections import lazy_section
+
+
+@memoize
+def summary_statistics(df, columns, margins=()):
+    if margins:
+        return weighting.weighted_describe(df, weighting.weights_for(df, df, margins), columns).round(2)
+    return df[list(columns)].describe().round(2)
+
+
+def pp_oib_scatter(df, weights=None):
+    """Scatter (or density) with its trend line; both use the survey weights when given."""
+    labels = {
+        'PP_score': 'Product Presentation Score',
+        'OIB_score': 'Impulse Buying Score'
+    }
+    title = 'Product Presentation vs Impulse Buying'
+    if use_density(len(df)):
+        # Too many respondents for one marker each: bin them on the server
+        return density_figure(
+            df['PP_score'], df['OIB_score'], weights=weights, title=title,
+            x_title=labels['PP_score'], y_title=labels['OIB_score']
+        )
+    # One point per respondent: send the coordinates as float32 buffers
+    fig = px.scatter(
+        df,
+        x='PP_score',
+        y='OIB_score',
+        labels=labels,
+        title=title
+    )
+    present = df['PP_score'].notna() & df['OIB_score'].notna()
+    x_line, y_line = trend_line(
+        df.loc[present, 'PP_score'], df.loc[present, 'OIB_score'],
+        None if weights is None else weights[present.to_numpy()]
+    )
+    fig.add_scatter(x=x_line, y=y_line, mode='lines', name='Trend Line', line=dict(color='red'))
+    return compact_figure(fig)
+
+
+@memoize
+def construct_correlation_test(df, columns, method, margins=()):
+    weights = weighting.weights_for(df, df, margins) if margins else None
+    return correlation_test(df, columns, method, weights)
+
+
+def construct_heatmap(corr, title='Correlation Matrix'):
+    return px.imshow(
+        corr,
+        text_auto='.2f',
+        zmin=-1,
+        zmax=1,
+        color_continuous_scale='RdBu',
+        title=title
+    )
+
+
 def app():
     st.subheader("Impulse Buying Analysis")
 
@@ -25,8 +92,11 @@ def app():
     # --------------------------------------------------
     # Load dataset
     # --------------------------------------------------
-    df = pd.read_csv("tiktok_impulse_buying_cleaned.csv")
+    df = irt_model.page_frame(load_data())
 
+    # Population margins when the weighted mode is on
+    margins = weighting.active_margins()
+    weighting.caption(df, margins)
     
     # =========================
     # SUMMARY METRICS
@@ -37,26 +107,27 @@ def app():
     missing_cols = [c for c in metric_cols if c not in df.columns]
 
     if not missing_cols:
+        metric_means = aggregates.means(df, metric_cols, margins=margins)
         col1, col2, col3 = st.columns(3)
 
         # Add delta = 0 just for nicer look
         col1.metric(
             label="Average Lifestyle Score (SL)",
-            value=f"{df['SL_score'].mean():.2f}",
+            value=f"{metric_means['SL_score']:.2f}",
         )
 
         col2.metric(
             label="Average Product Presentation Score (PP)",
-            value=f"{df['PP_score'].mean():.2f}",
+            value=f"{metric_means['PP_score']:.2f}",
         )
 
         col3.metric(
             label="Average Impulse Buying Score (OIB)",
-            value=f"{df['OIB_score'].mean():.2f}",
+            value=f"{metric_means['OIB_score']:.2f}",
         )
 
         st.markdown("### 🔍 Descriptive Statistics")
-        summary_df = df[metric_cols].describe().round(2)
+        summary_df = summary_statistics(df, metric_cols, margins)
 
         # Style dataframe
         styled_df = summary_df.style.background_gradient(cmap='Blues', axis=1)
@@ -70,247 +141,240 @@ def app():
     # =========================
     # 1. SCATTER PLOT + TREND LINE
     # =========================
-    st.markdown("### 1️⃣ Relationship Between Product Presentation and Impulse Buying")
-    if 'PP_score' in df.columns and 'OIB_score' in df.columns:
-        fig1 = px.scatter(
-            df,
-            x='PP_score',
-            y='OIB_score',
-            trendline='ols',
-            labels={
-                'PP_score': 'Product Presentation Score',
-                'OIB_score': 'Impulse Buying Score'
-            },
-            title='Product Presentation vs Impulse Buying'
-        )
-        st.plotly_chart(fig1, use_container_width=True)
-        st.markdown("""
-        <div style="
-            background-color:#f8fafc;
-            padding:16px;
-            border-left:6px solid #6366f1;
-            border-radius:10px;
-            box-shadow:0 2px 6px rgba(0,0,0,0.05);
-            margin-top:10px;
-        ">
-        <h4 style="margin-bottom:8px;">📌 Key Insights</h4>
-
-        <ul style="margin-left:15px;">
-            <li>The scatter plot shows a positive relationship between product presentation and impulse buying behavior.</li>
-            <li>Higher product presentation scores are generally associated with higher impulse buying scores.</li>
-            <li>Most respondents fall within the medium to high score range, indicating strong visual influence.</li>
-            <li>The spread of data points suggests that impulse buying is also affected by other personal or situational factors.</li>
-        </ul>
-        </div>
-        """, unsafe_allow_html=True)
-
-    else:
-        st.warning("PP_score or OIB_score column missing in dataset!")
+    with lazy_section("1️⃣ Relationship Between Product Presentation and Impulse Buying", key="objective4_scatter") as visible:
+        if visible:
+            if 'PP_score' in df.columns and 'OIB_score' in df.columns:
+                if margins:
+                    # The snapshot holds the unweighted figure
+                    fig1 = pp_oib_scatter(df, weighting.weights_for(df, df, margins))
+                else:
+                    fig1 = snapshot.figure('objective4_scatter', lambda: pp_oib_scatter(df))
+                st.plotly_chart(fig1, use_container_width=True)
+                if use_density(len(df)):
+                    st.caption(f"Showing the density of {len(df):,} respondents.")
+                st.markdown("""
+                <div style="
+                    background-color:#f8fafc;
+                    padding:16px;
+                    border-left:6px solid #6366f1;
+                    border-radius:10px;
+                    box-shadow:0 2px 6px rgba(0,0,0,0.05);
+                    margin-top:10px;
+                ">
+                <h4 style="margin-bottom:8px;">📌 Key Insights</h4>
+
+                <ul style="margin-left:15px;">
+                    <li>The scatter plot shows a positive relationship between product presentation and impulse buying behavior.</li>
+                    <li>Higher product presentation scores are generally associated with higher impulse buying scores.</li>
+                    <li>Most respondents fall within the medium to high score range, indicating strong visual influence.</li>
+                    <li>The spread of data points suggests that impulse buying is also affected by other personal or situational factors.</li>
+                </ul>
+                </div>
+                """, unsafe_allow_html=True)
+
+            else:
+                st.warning("PP_score or OIB_score column missing in dataset!")
 
     
     # =========================
     # 2. CORRELATION HEATMAP
     # =========================
-    st.markdown("### 2️⃣ Correlation Between Key Constructs")
-    corr_cols = ['SL_score', 'PP_score', 'OIB_score']
-    missing_cols = [c for c in corr_cols if c not in df.columns]
-    if not missing_cols:
-        corr = df[corr_cols].corr()
-        fig2 = px.imshow(
-            corr,
-            text_auto='.2f',
-            zmin=-1,
-            zmax=1,
-            color_continuous_scale='RdBu',
-            title='Correlation Matrix'
-        )
-        st.plotly_chart(fig2, use_container_width=True)
-        # -------------------------
-        # INTERPRETATION / INSIGHTS
-        # -------------------------
-        st.markdown("""
-        <div style="
-            background-color:#f8fafc;
-            padding:16px;
-            border-left:6px solid #6366f1;
-            border-radius:10px;
-            box-shadow:0 2px 6px rgba(0,0,0,0.05);
-            margin-top:10px;
-        ">
-        <h4 style="margin-bottom:8px;">📌 Key Insights</h4>
-
-        <ul style="margin-left:15px;">
-            <li>Shopping lifestyle shows a positive relationship with product presentation, indicating that students who enjoy shopping are more responsive to visual and informational cues.</li>
-            <li>Product presentation has a weak to moderate correlation with impulse buying, suggesting that attractive visuals alone may not always trigger impulsive purchases.</li>
-            <li>Shopping lifestyle demonstrates a stronger association with impulse buying compared to product presentation.</li>
-            <li>This pattern highlights that personal shopping habits play a more influential role in impulse buying behaviour on TikTok Shop.</li>
-        </ul>
-        </div>
-         """, unsafe_allow_html=True)
-
-    else:
-        st.warning(f"Missing columns for correlation: {missing_cols}")
+    with lazy_section("2️⃣ Correlation Between Key Constructs", key="objective4_correlation") as visible:
+        if visible:
+            corr_cols = ['SL_score', 'PP_score', 'OIB_score']
+            missing_cols = [c for c in corr_cols if c not in df.columns]
+            if not missing_cols:
+                method = st.radio(
+                    "Correlation method",
+                    ["Pearson", "Spearman", "Polychoric"],
+                    horizontal=True,
+                    help="Spearman and polychoric treat the scores as ordered categories; "
+                         "polychoric estimates the correlation of the underlying continuous attitudes."
+                )
+                if method != "Pearson":
+                    corr = construct_correlation_test(df, corr_cols, method.lower(), margins)['r']
+                    fig2 = construct_heatmap(corr, title=f'{method} Correlation Matrix')
+                elif margins:
+                    fig2 = construct_heatmap(aggregates.correlation(df, corr_cols, margins=margins))
+                else:
+                    stats = snapshot.artifact('correlations')
+                    corr = stats['composites'].loc[corr_cols, corr_cols] if stats else aggregates.correlation(df, corr_cols)
+                    fig2 = snapshot.figure('objective4_correlation', lambda: construct_heatmap(corr))
+                st.plotly_chart(fig2, use_container_width=True)
+                with st.expander("📐 Significance and 95% confidence intervals"):
+                    significance_table(construct_correlation_test(df, corr_cols, method.lower(), margins))
+                # -------------------------
+                # INTERPRETATION / INSIGHTS
+                # -------------------------
+                st.markdown("""
+                <div style="
+                    background-color:#f8fafc;
+                    padding:16px;
+                    border-left:6px solid #6366f1;
+                    border-radius:10px;
+                    box-shadow:0 2px 6px rgba(0,0,0,0.05);
+                    margin-top:10px;
+                ">
+                <h4 style="margin-bottom:8px;">📌 Key Insights</h4>
+
+                <ul style="margin-left:15px;">
+                    <li>Shopping lifestyle shows a positive relationship with product presentation, indicating that students who enjoy shopping are more responsive to visual and informational cues.</li>
+                    <li>Product presentation has a weak to moderate correlation with impulse buying, suggesting that attractive visuals alone may not always trigger impulsive purchases.</li>
+                    <li>Shopping lifestyle demonstrates a stronger association with impulse buying compared to product presentation.</li>
+                    <li>This pattern highlights that personal shopping habits play a more influential role in impulse buying behaviour on TikTok Shop.</li>
+                </ul>
+                </div>
+                 """, unsafe_allow_html=True)
+
+            else:
+                st.warning(f"Missing columns for correlation: {missing_cols}")
 
     
     # =========================
     # 3. LIKERT STACKED BAR CHART
     # =========================
-    st.markdown("### 3️⃣ Product Presentation Item Responses")
-    likert_cols = [
-        'image_quality_influence',
-        'product_description_quality',
-        'multi_angle_visuals',
-        'info_richness_support'
-    ]
-    missing_cols = [c for c in likert_cols if c not in df.columns]
-    if not missing_cols:
-        likert_long = df[likert_cols].melt(
-            var_name='Item',
-            value_name='Agreement Level'
-        )
-        fig3 = px.histogram(
-            likert_long,
-            x='Item',
-            color='Agreement Level',
-            barmode='stack',
-            title='Likert Scale Response Distribution',
-            category_orders={
-                'Agreement Level': [1, 2, 3, 4, 5]
-            }
-        )
-        fig3.update_layout(
-            xaxis_title='Product Presentation Items',
-            yaxis_title='Number of Respondents'
-        )
-        st.plotly_chart(fig3, use_container_width=True)
-        # -------------------------
-        # INTERPRETATION / INSIGHTS
-        # -------------------------
-        st.markdown("""
-        <div style="
-            background-color:#f8fafc;
-            padding:16px;
-            border-left:6px solid #6366f1;
-            border-radius:10px;
-            box-shadow:0 2px 6px rgba(0,0,0,0.05);
-            margin-top:10px;
-        ">
-        <h4 style="margin-bottom:8px;">📌 Key Insights</h4>
-
-        <ul style="margin-left:15px;">
-           <li>Most respondents selected higher agreement levels (4 and 5) across all product presentation items.</li>
-           <li>Image quality and product description show particularly strong positive responses, indicating their importance in online purchasing decisions.</li>
-           <li>Multi-angle visuals and rich product information also receive consistent agreement, suggesting that detailed visual presentation enhances consumer confidence.</li>
-           <li>Overall, the distribution reflects that well-presented products on TikTok Shop play a key role in encouraging impulse buying behaviour.</li>
-       </ul>
-       </div>
-       """, unsafe_allow_html=True)
-
-    else:
-        st.warning(f"Missing Likert columns: {missing_cols}")
+    with lazy_section("3️⃣ Product Presentation Item Responses", key="objective4_likert") as visible:
+        if visible:
+            likert_cols = [
+                'image_quality_influence',
+                'product_description_quality',
+                'multi_angle_visuals',
+                'info_richness_support'
+            ]
+            missing_cols = [c for c in likert_cols if c not in df.columns]
+            if not missing_cols:
+                cube = weighting.cube(df, margins)
+                diverging = st.checkbox("Show as diverging bars", value=False)
+                if diverging:
+                    fig3 = diverging_bar_figure(cube, likert_cols, title='Likert Scale Response Distribution')
+                    fig3.update_layout(yaxis_title='Product Presentation Items')
+                else:
+                    fig3 = stacked_bar_figure(cube, likert_cols, title='Likert Scale Response Distribution')
+                    fig3.update_layout(
+                        xaxis_title='Product Presentation Items',
+                        yaxis_title='Number of Respondents'
+                    )
+                st.plotly_chart(fig3, use_container_width=True)
+                # -------------------------
+                # INTERPRETATION / INSIGHTS
+                # -------------------------
+                st.markdown("""
+                <div style="
+                    background-color:#f8fafc;
+                    padding:16px;
+                    border-left:6px solid #6366f1;
+                    border-radius:10px;
+                    box-shadow:0 2px 6px rgba(0,0,0,0.05);
+                    margin-top:10px;
+                ">
+                <h4 style="margin-bottom:8px;">📌 Key Insights</h4>
+
+                <ul style="margin-left:15px;">
+                   <li>Most respondents selected higher agreement levels (4 and 5) across all product presentation items.</li>
+                   <li>Image quality and product description show particularly strong positive responses, indicating their importance in online purchasing decisions.</li>
+                   <li>Multi-angle visuals and rich product information also receive consistent agreement, suggesting that detailed visual presentation enhances consumer confidence.</li>
+                   <li>Overall, the distribution reflects that well-presented products on TikTok Shop play a key role in encouraging impulse buying behaviour.</li>
+               </ul>
+               </div>
+               """, unsafe_allow_html=True)
+
+            else:
+                st.warning(f"Missing Likert columns: {missing_cols}")
 
 
     # =========================
     # 4. MULTI HISTOGRAM – PURCHASE BEHAVIOR
     # =========================
-    st.markdown("### 4️⃣ Purchase Behaviour Distribution")
-    purchase_cols = ['no_purchase_plan', 'no_purchase_intent', 'impulse_purchase']
-    missing_cols = [c for c in purchase_cols if c not in df.columns]
-    if not missing_cols:
-        purchase_long = df[purchase_cols].melt(
-            var_name='Purchase Type',
-            value_name='Score'
-        )
-        fig4 = px.histogram(
-            purchase_long,
-            x='Score',
-            color='Purchase Type',
-            barmode='overlay',
-            nbins=5,
-            title='Distribution of Purchase Behaviour'
-        )
-        fig4.update_layout(
-            xaxis=dict(tickmode='linear', tick0=1, dtick=1),
-            yaxis_title='Number of Respondents'
-        )
-        st.plotly_chart(fig4, use_container_width=True)
-        # -------------------------
-        # INTERPRETATION / INSIGHTS
-        # -------------------------
-        st.markdown("""
-        <div style="
-            background-color:#f8fafc;
-            padding:16px;
-            border-left:6px solid #6366f1;
-            border-radius:10px;
-            box-shadow:0 2px 6px rgba(0,0,0,0.05);
-            margin-top:10px;
-        ">
-        <h4 style="margin-bottom:8px;">📌 Key Insights</h4>
-
-        <ul style="margin-left:15px;">
-           <li>Most respondents show moderate to high agreement (levels 3 to 5) across all impulse buying indicators.</li>
-           <li>The highest concentration of responses appears at agreement levels 4 and 5, especially for impulse purchase behavior.</li>
-           <li>This pattern indicates that many purchases on TikTok Shop are made without prior planning or strong purchase intent.</li>
-           <li>Overall, the visualization highlights impulse buying as a common behavior among users, supporting the study’s focus on spontaneous purchasing in social commerce.</li>
-        </ul>
-        </div>
-        """, unsafe_allow_html=True)
-
-    else:
-        st.warning(f"Missing purchase columns: {missing_cols}")
+    with lazy_section("4️⃣ Purchase Behaviour Distribution", key="objective4_purchase") as visible:
+        if visible:
+            purchase_cols = ['no_purchase_plan', 'no_purchase_intent', 'impulse_purchase']
+            missing_cols = [c for c in purchase_cols if c not in df.columns]
+            if not missing_cols:
+                fig4 = overlay_histogram_figure(
+                    weighting.cube(df, margins),
+                    purchase_cols,
+                    title='Distribution of Purchase Behaviour',
+                    color_label='Purchase Type'
+                )
+                fig4.update_layout(
+                    xaxis=dict(tickmode='linear', tick0=1, dtick=1),
+                    yaxis_title='Number of Respondents'
+                )
+                st.plotly_chart(fig4, use_container_width=True)
+                # -------------------------
+                # INTERPRETATION / INSIGHTS
+                # -------------------------
+                st.markdown("""
+                <div style="
+                    background-color:#f8fafc;
+                    padding:16px;
+                    border-left:6px solid #6366f1;
+                    border-radius:10px;
+                    box-shadow:0 2px 6px rgba(0,0,0,0.05);
+                    margin-top:10px;
+                ">
+                <h4 style="margin-bottom:8px;">📌 Key Insights</h4>
+
+                <ul style="margin-left:15px;">
+                   <li>Most respondents show moderate to high agreement (levels 3 to 5) across all impulse buying indicators.</li>
+                   <li>The highest concentration of responses appears at agreement levels 4 and 5, especially for impulse purchase behavior.</li>
+                   <li>This pattern indicates that many purchases on TikTok Shop are made without prior planning or strong purchase intent.</li>
+                   <li>Overall, the visualization highlights impulse buying as a common behavior among users, supporting the study’s focus on spontaneous purchasing in social commerce.</li>
+                </ul>
+                </div>
+                """, unsafe_allow_html=True)
+
+            else:
+                st.warning(f"Missing purchase columns: {missing_cols}")
                      
 
     # =========================
     # 5. BOX PLOT – PRODUCT & BRAND FACTORS
     # =========================
-    st.markdown("### 5️⃣ Product & Brand Attraction Factors")
-    box_cols = [
-        'similar_to_famous_brand_attraction',
-        'new_product_urgency',
-        'brand_trust_influence',
-        'unique_design_attraction'
-    ]
-    missing_cols = [c for c in box_cols if c not in df.columns]
-    if not missing_cols:
-        box_long = df[box_cols].melt(
-            var_name='Factor',
-            value_name='Score'
-        )
-        fig5 = px.box(
-            box_long,
-            x='Factor',
-            y='Score',
-            points='outliers',
-            title='Distribution of Product Attraction & Trust Factors'
-        )
-        fig5.update_layout(
-            yaxis_title='Score (1 = Strongly Disagree, 5 = Strongly Agree)'
-        )
-        st.plotly_chart(fig5, use_container_width=True)
-        # -------------------------
-        # INTERPRETATION / INSIGHTS
-        # -------------------------
-        st.markdown("""
-        <div style="
-            background-color:#f8fafc;
-            padding:16px;
-            border-left:6px solid #10b981;
-            border-radius:10px;
-            box-shadow:0 2px 6px rgba(0,0,0,0.05);
-            margin-top:10px;
-        ">
-        <h4 style="margin-bottom:8px;">📌 Key Insights</h4>
-
-        <ul style="margin-left:15px;">
-           <li>The box plot shows that the median scores for all factors are around level 3 to 4, indicating moderate to high agreement among respondents.</li>
-           <li><em>Brand trust influence</em> and <em>unique design attraction</em> exhibit relatively consistent distributions, suggesting these factors are commonly perceived as important.</li>
-           <li><em>New product urgency</em> shows a wider spread, indicating varying levels of influence across respondents.</li>
-           <li>Several low-score outliers are observed, suggesting that a small group of students is less affected by brand-related attraction factors.</li>
-           <li>Overall, the visualization indicates that product attraction and trust play a meaningful role in shaping impulse buying behaviour on TikTok Shop.</li>
-        </ul>
-        </div>
-        """, unsafe_allow_html=True)
-
-    else:
-        st.warning(f"Missing box plot columns: {missing_cols}")
+    with lazy_section("5️⃣ Product & Brand Attraction Factors", key="objective4_box") as visible:
+        if visible:
+            box_cols = [
+                'similar_to_famous_brand_attraction',
+                'new_product_urgency',
+                'brand_trust_influence',
+                'unique_design_attraction'
+            ]
+            missing_cols = [c for c in box_cols if c not in df.columns]
+            if not missing_cols:
+                fig5 = box_figure(
+                    weighting.cube(df, margins),
+                    box_cols,
+                    title='Distribution of Product Attraction & Trust Factors',
+                    item_label='Factor',
+                    points='outliers'
+                )
+                fig5.update_layout(
+                    yaxis_title='Score (1 = Strongly Disagree, 5 = Strongly Agree)'
+                )
+                st.plotly_chart(fig5, use_container_width=True)
+                # -------------------------
+                # INTERPRETATION / INSIGHTS
+                # -------------------------
+                st.markdown("""
+                <div style="
+                    background-color:#f8fafc;
+                    padding:16px;
+                    border-left:6px solid #10b981;
+                    border-radius:10px;
+                    box-shadow:0 2px 6px rgba(0,0,0,0.05);
+                    margin-top:10px;
+                ">
+                <h4 style="margin-bottom:8px;">📌 Key Insights</h4>
+
+                <ul style="margin-left:15px;">
+                   <li>The box plot shows that the median scores for all factors are around level 3 to 4, indicating moderate to high agreement among respondents.</li>
+                   <li><em>Brand trust influence</em> and <em>unique design attraction</em> exhibit relatively consistent distributions, suggesting these factors are commonly perceived as important.</li>
+                   <li><em>New product urgency</em> shows a wider spread, indicating varying levels of influence across respondents.</li>
+                   <li>Several low-score outliers are observed, suggesting that a small group of students is less affected by brand-related attraction factors.</li>
+                   <li>Overall, the visualization indicates that product attraction and trust play a meaningful role in shaping impulse buying behaviour on TikTok Shop.</li>
+                </ul>
+                </div>
+                """, unsafe_allow_html=True)
+
+            else:
+                st.warning(f"Missing box plot columns: {missing_cols}")
@@ -0,0 +1,100 @@
+import query_backend
+import sql_backend
+import weighting
+from data_loader import filtered_view
+from result_cache import memoize
+
+# ==================================================
+# PAGE AGGREGATES
+# ==================================================
+# Counts, means, crosstabs, histograms and correlations used by the Objective
+# pages. They run on `df` with the configured compute backend
+# (TIKTOK_COMPUTE_BACKEND: pandas or polars). With the SQLite backend enabled
+# only the aggregate-only pages run (navigation.SQL_PAGES); their counts,
+# distinct values and crosstabs run as SQL and `df` is only a cache token
+# (see load_rows). Results are memoized per dataset version and filter
+# signature, and must not be modified by callers.
+#
+# Passing population `margins` (weighting.active_margins()) gives the raked,
+# weighted version instead: counts become sums of weights. Weighting needs
+# the respondent rows, so it is never combined with the SQL backend.
+
+
+def _backend():
+    return query_backend.get_backend()
+
+
+def _weighted(df, filters, margins):
+    view = filtered_view(df, filters)
+    return view, weighting.weights_for(df, view, margins)
+
+
+@memoize
+def count(df, filters=()):
+    if sql_backend.enabled():
+        return sql_backend.count(filters)
+    return _backend().count(df, filters)
+
+
+@memoize
+def distinct(df, column):
+    if sql_backend.enabled():
+        return sql_backend.distinct(column)
+    return sorted(df[column].dropna().unique().tolist())
+
+
+@memoize
+def value_counts(df, column, filters=(), margins=()):
+    if margins:
+        return weighting.weighted_value_counts(*_weighted(df, filters, margins), column)
+    if sql_backend.enabled():
+        return sql_backend.value_counts(column, filters)
+    return _backend().value_counts(df, column, filters)
+
+
+@memoize
+def means(df, columns, filters=(), margins=()):
+    if margins:
+        return weighting.weighted_means(*_weighted(df, filters, margins), columns)
+    return _backend().means(df, columns, filters)
+
+
+@memoize
+def group_means(df, by, columns, filters=(), margins=()):
+    if margins:
+        return weighting.weighted_group_means(*_weighted(df, filters, margins), by, columns)
+    return _backend().group_aggregate(df, by, columns, 'mean', filters)
+
+
+@memoize
+def crosstab(df, row_col, col_col, filters=(), margins=()):
+    if margins:
+        return weighting.weighted_crosstab(*_weighted(df, filters, margins), row_col, col_col)
+    if sql_backend.enabled():
+        return sql_backend.crosstab(row_col, col_col, filters)
+    return _backend().crosstab(df, row_col, col_col, filters)
+
+
+@memoize
+def histogram(df, column, bins=10, value_range=None, filters=(), margins=()):
+    """(counts, edges) as numpy.histogram; always computed from the respondent rows."""
+    if margins:
+        return weighting.weighted_histogram(*_weighted(df, filters, margins), column, bins, value_range)
+    return _backend().histogram(df, column, bins, value_range, filters)
+
+
+@memoize
+def correlation(df, columns, filters=(), margins=()):
+    """Pearson correlation matrix; always computed from the respondent rows."""
+    if margins:
+        return weighting.weighted_correlation(*_weighted(df, filters, margins), columns)
+    return _backend().correlation(df, columns, filters)
+
+
+def load_rows(loader):
+    """
+    Respondent-level frame for pandas mode. When SQL serves the aggregates no
+    rows are loaded; the table's version token stands in for the frame, so
+    memoized results are keyed to the table contents.
+    """
+    return sql_backend.data_version() if sql_backend.enabled() else loader()
@@ -1,5 +1,15 @@
+import importlib
+
 import streamlit as st
 
+import data_loader
+import irt_model
+import navigation
+import result_cache
+import snapshot
+import sql_backend
+import weighting
+
 # --------------------------------------------------
 # Page Configuration
 # --------------------------------------------------
@@ -8,6 +18,41 @@ st.set_page_config(
     layout="wide"
 )
 
+# --------------------------------------------------
+# Startup Warm-up
+# --------------------------------------------------
+# Loads precomputed artifacts (typed dataset, Likert cube, correlations,
+# default figures) for the current dataset, or builds the missing data
+# artifacts on a background thread pool while the page below renders.
+# Default figures come only from the deploy step (python snapshot.py).
+# Runs once per process. Skipped with the SQLite backend, which keeps the
+# respondent rows out of memory.
+ROWS_IN_MEMORY = not sql_backend.enabled()
+if ROWS_IN_MEMORY:
+    snapshot.start_warm_up()
+
+# --------------------------------------------------
+# Data Quality Check (ingest)
+# --------------------------------------------------
+if ROWS_IN_MEMORY:
+    quality = data_loader.validation_report()
+    if not quality['valid']:
+        with st.sidebar.expander(f"⚠️ Data quality: {len(quality['issues'])} issue(s)"):
+            st.json(quality['issues'])
+
+    # Skipped or off-scale answers filled at ingest (see imputation.py)
+    imputed = data_loader.imputation_mask(data_loader.load_data())
+    if imputed is not None:
+        st.sidebar.caption(
+            f"🩹 {int(imputed.to_numpy().sum())} missing answer(s) from "
+            f"{int(imputed.any(axis=1).sum())} respondent(s) imputed ({data_loader.IMPUTATION_METHOD})."
+        )
+else:
+    st.sidebar.caption(
+        f"🗄️ SQLite backend ({sql_backend.DB_PATH}): answers imputed at ingest "
+        f"({data_loader.IMPUTATION_METHOD}); only aggregate pages are available."
+    )
+
 # --------------------------------------------------
 # Sidebar Navigation
 # --------------------------------------------------
@@ -15,34 +60,49 @@ st.sidebar.title("📂 Navigation")
 
 page_selection = st.sidebar.radio(
     "Select Page:",
-    options=[
-        "Main Page",
-        "Objective 1 - Aina",
-        "Objective 2 - Nurin",
-        "Objective 3 - Nadia",
-        "Objective 4 - Athirah"
-    ]
+    options=list(navigation.PAGES)
 )
 
 # --------------------------------------------------
-# Page Import & Display Logic
+# Survey Weighting
 # --------------------------------------------------
-if page_selection == "Main Page":
-    import main
-    main.app()  # Make sure main.py has an app() function
+# Optional raking to population_margins.json (only offered once that file is
+# supplied, see population_margins.example.json); pages read weighting.active_margins()
+if weighting.available():
+    weighting.sidebar_toggle(data_loader.load_data())
 
-elif page_selection == "Objective 1 - Aina":
-    import Objective1_Aina
-    Objective1_Aina.app()
+# --------------------------------------------------
+# Construct Scoring
+# --------------------------------------------------
+# Optional graded-response scores in place of the item-mean composites
+if irt_model.available():
+    irt_model.sidebar_toggle(data_loader.load_data())
 
-elif page_selection == "Objective 2 - Nurin":
-    import Objective2_Nurin
-    Objective2_Nurin.app()
+# --------------------------------------------------
+# Page Import & Display Logic
+# --------------------------------------------------
+# Each page module provides an app() function (see navigation.PAGES)
+if not ROWS_IN_MEMORY and page_selection not in navigation.SQL_PAGES:
+    sql_backend.rows_unavailable_notice(page_selection)
+else:
+    importlib.import_module(navigation.PAGES[page_selection]).app()
 
-elif page_selection == "Objective 3 - Nadia":
-    import Objective3_Nadia
-    Objective3_Nadia.app()
+# --------------------------------------------------
+# Shared Dataset Guard
+# --------------------------------------------------
+# Every session reads the same in-memory frame; fail loudly if a page
+# added, retyped or reassigned columns on it instead of using a scratch frame.
+if ROWS_IN_MEMORY:
+    data_loader.check_shared_frame()
 
-elif page_selection == "Objective 4 - Athirah":
-    import Objective4_Athirah
-    Objective4_Athirah.app()
+# --------------------------------------------------
+# Result Cache Telemetry
+# --------------------------------------------------
+# Process-wide counters (all sessions) for sizing the cache budget per pod
+with st.sidebar.expander("📦 Result cache"):
+    cache_stats = result_cache.stats()
+    st.caption(
+        f"{cache_stats['entries']} entries, "
+        f"{cache_stats['bytes'] / 2 ** 20:.1f} of {cache_stats['budget_bytes'] / 2 ** 20:.0f} MB"
+    )
+    st.json(cache_stats)
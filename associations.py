@@ -0,0 +1,105 @@
+from itertools import combinations
+
+import numpy as np
+import pandas as pd
+from scipy.stats import chi2
+
+import aggregates
+import sql_backend
+from constructs import DEMOGRAPHIC_COLUMNS
+from result_cache import memoize
+
+# Rows bincounted at once; bounds the combined-code buffer (rows × pairs)
+BLOCK_ROWS = 1_000_000
+
+
+# ==================================================
+# CONTINGENCY TABLES (one bincount per row block)
+# ==================================================
+def _codes(series):
+    """Integer codes (-1 for missing) and level labels of a categorical column."""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return series.cat.codes.to_numpy(dtype=np.int64), list(series.cat.categories)
+    codes, levels = pd.factorize(series, sort=True)
+    return codes.astype(np.int64), list(levels)
+
+
+def contingency_tables(df, columns=DEMOGRAPHIC_COLUMNS):
+    """
+    {(a, b): DataFrame of counts} for every pair of columns.
+
+    Each pair's cell is code_a * levels_b + code_b, shifted by the pair's
+    offset into one shared bin range, so a single np.bincount per block of
+    rows fills every table. Rows missing either value are not counted.
+    """
+    codes, levels = {}, {}
+    for col in columns:
+        codes[col], levels[col] = _codes(df[col])
+    pairs = list(combinations(columns, 2))
+    sizes = [len(levels[a]) * len(levels[b]) for a, b in pairs]
+    offsets = np.concatenate([[0], np.cumsum(sizes)])
+
+    counts = np.zeros(offsets[-1], dtype=np.int64)
+    for start in range(0, len(df), BLOCK_ROWS):
+        block = []
+        for (a, b), offset in zip(pairs, offsets):
+            code_a = codes[a][start:start + BLOCK_ROWS]
+            code_b = codes[b][start:start + BLOCK_ROWS]
+            cell = code_a * len(levels[b]) + code_b + offset
+            block.append(cell[(code_a >= 0) & (code_b >= 0)])
+        counts += np.bincount(np.concatenate(block), minlength=offsets[-1])
+
+    return {
+        (a, b): pd.DataFrame(
+            counts[offset:offset + size].reshape(len(levels[a]), len(levels[b])),
+            index=pd.Index(levels[a], name=a),
+            columns=pd.Index(levels[b], name=b)
+        )
+        for (a, b), offset, size in zip(pairs, offsets, sizes)
+    }
+
+
+# ==================================================
+# TEST STATISTICS
+# ==================================================
+def chi_square(table):
+    """Pearson chi-square, degrees of freedom, p-value and Cramér's V of a count table."""
+    observed = np.asarray(table, dtype=np.float64)
+    # Levels nobody chose carry no information and would divide by zero
+    observed = observed[observed.sum(axis=1) > 0][:, observed.sum(axis=0) > 0]
+    n = observed.sum()
+    rows, cols = observed.shape
+    dof = (rows - 1) * (cols - 1)
+    if n == 0 or dof == 0:
+        return {'chi2': np.nan, 'dof': dof, 'p_value': np.nan, 'cramers_v': np.nan, 'n': int(n)}
+    expected = np.outer(observed.sum(axis=1), observed.sum(axis=0)) / n
+    stat = ((observed - expected) ** 2 / expected).sum()
+    return {
+        'chi2': stat,
+        'dof': dof,
+        'p_value': chi2.sf(stat, dof),
+        'cramers_v': np.sqrt(stat / (n * (min(rows, cols) - 1))),
+        'n': int(n)
+    }
+
+
+@memoize
+def association_table(df, columns=tuple(DEMOGRAPHIC_COLUMNS)):
+    """One row per column pair with chi-square, p-value and Cramér's V."""
+    if sql_backend.enabled():
+        # df is a version token in SQL mode; each pair's counts come from a GROUP BY
+        tables = {(a, b): aggregates.crosstab(df, a, b) for a, b in combinations(columns, 2)}
+    else:
+        tables = contingency_tables(df, list(columns))
+    return pd.DataFrame([
+        {'Variable A': a, 'Variable B': b, **chi_square(table)}
+        for (a, b), table in tables.items()
+    ])
+
+
+def cramers_v_matrix(results, columns=DEMOGRAPHIC_COLUMNS):
+    """Symmetric Cramér's V matrix (1 on the diagonal) for a heatmap."""
+    matrix = pd.DataFrame(np.eye(len(columns)), index=columns, columns=columns)
+    for row in results.itertuples(index=False):
+        matrix.loc[row[0], row[1]] = matrix.loc[row[1], row[0]] = row.cramers_v
+    return matrix
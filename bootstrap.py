@@ -0,0 +1,57 @@
+import numpy as np
+import pandas as pd
+
+# Resamples per scheduler task
+RESAMPLES_PER_TASK = 250
+
+# Cap on resampled values held at once (resamples × rows × columns)
+BLOCK_ELEMENTS = 5_000_000
+
+
+# ==================================================
+# RESAMPLING
+# ==================================================
+def _statistics(sample):
+    """Column means and the Pearson r of the first two columns, per resample (b, n, p)."""
+    means = sample.mean(axis=1)
+    centred = sample[:, :, :2] - means[:, None, :2]
+    cov = (centred[:, :, 0] * centred[:, :, 1]).sum(axis=1)
+    var = (centred ** 2).sum(axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        r = cov / np.sqrt(var[:, 0] * var[:, 1])
+    return np.column_stack([means, r])
+
+
+def bootstrap_chunk(X, n_resamples, seed):
+    """Statistics of `n_resamples` bootstrap resamples of the rows of X."""
+    rng = np.random.default_rng(seed)
+    n = len(X)
+    block = max(1, BLOCK_ELEMENTS // max(1, n * X.shape[1]))
+    out = []
+    for start in range(0, n_resamples, block):
+        size = min(block, n_resamples - start)
+        idx = rng.integers(0, n, size=(size, n))
+        out.append(_statistics(X[idx]))
+    return np.concatenate(out)
+
+
+def bootstrap_tasks(X, n_resamples=2000, seed=0, per_task=RESAMPLES_PER_TASK):
+    """(function, args) tasks with independent random streams, for job_scheduler."""
+    X = np.asarray(X, dtype=np.float64)
+    sizes = [min(per_task, n_resamples - start) for start in range(0, n_resamples, per_task)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    return [(bootstrap_chunk, (X, size, child)) for size, child in zip(sizes, seeds)]
+
+
+def percentile_intervals(X, replicates, names, level=0.95):
+    """Estimate and percentile interval for each column mean and the first-pair correlation."""
+    replicates = np.concatenate(replicates)
+    estimate = _statistics(np.asarray(X, dtype=np.float64)[None])[0]
+    tail = (1 - level) / 2 * 100
+    lower, upper = np.nanpercentile(replicates, [tail, 100 - tail], axis=0)
+    return pd.DataFrame({
+        'Statistic': [f"Mean {name}" for name in names] + [f"Correlation ({names[0]}, {names[1]})"],
+        'Estimate': estimate,
+        f'{level:.0%} CI Lower': lower,
+        f'{level:.0%} CI Upper': upper
+    })
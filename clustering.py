@@ -0,0 +1,240 @@
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+import streamlit as st
+
+import job_scheduler
+from constructs import CONSTRUCTS
+from data_loader import (
+    CLUSTER_COLUMN, CLUSTER_PATH, dataset_version, likert_matrix, load_data, reload_data
+)
+
+# Rows per chunk when assigning every respondent to its nearest centre
+ASSIGN_CHUNK_SIZE = 65536
+
+
+# ==================================================
+# MINI-BATCH K-MEANS
+# ==================================================
+def _squared_distances(X, centers):
+    """Squared Euclidean distances (n, k) between float32 rows and centres."""
+    return (
+        (X ** 2).sum(axis=1)[:, None]
+        - 2 * X @ centers.T
+        + (centers ** 2).sum(axis=1)[None, :]
+    )
+
+
+def kmeans_plus_plus(X, k, rng):
+    """k-means++ seeding: each new centre is drawn proportionally to D(x)^2."""
+    centers = [X[rng.integers(len(X))]]
+    closest = _squared_distances(X, centers[0][None, :])[:, 0]
+    for _ in range(1, k):
+        probs = np.clip(closest, 0, None)
+        total = probs.sum()
+        idx = rng.choice(len(X), p=probs / total) if total > 0 else rng.integers(len(X))
+        centers.append(X[idx])
+        closest = np.minimum(closest, _squared_distances(X, X[idx][None, :])[:, 0])
+    return np.array(centers, dtype=np.float32)
+
+
+def minibatch_kmeans(X, k, batch_size=1024, n_iter=100, init_size=10000, seed=0):
+    """
+    Sculley mini-batch k-means over a uint8 item matrix.
+
+    Only one batch at a time is converted to float32, so memory stays
+    proportional to the batch size. Returns the (k, p) float32 centres.
+    """
+    rng = np.random.default_rng(seed)
+    n_rows = len(X)
+    init_idx = rng.choice(n_rows, size=min(init_size, n_rows), replace=False)
+    centers = kmeans_plus_plus(X[init_idx].astype(np.float32), k, rng)
+    counts = np.zeros(k)
+
+    for _ in range(n_iter):
+        batch = X[rng.integers(n_rows, size=min(batch_size, n_rows))].astype(np.float32)
+        nearest = _squared_distances(batch, centers).argmin(axis=1)
+
+        batch_counts = np.bincount(nearest, minlength=k)
+        batch_sums = np.zeros_like(centers)
+        np.add.at(batch_sums, nearest, batch)
+
+        # Per-centre learning rate 1 / (points seen so far)
+        counts += batch_counts
+        seen = batch_counts > 0
+        centers[seen] += (
+            batch_sums[seen] - batch_counts[seen, None] * centers[seen]
+        ) / counts[seen, None]
+
+    return centers
+
+
+def assign_clusters(X, centers, max_workers=None):
+    """Nearest-centre labels for every row, chunked and spread across threads."""
+    starts = range(0, len(X), ASSIGN_CHUNK_SIZE)
+
+    def _assign(start):
+        chunk = X[start:start + ASSIGN_CHUNK_SIZE].astype(np.float32)
+        return _squared_distances(chunk, centers).argmin(axis=1)
+
+    with ThreadPoolExecutor(max_workers=max_workers or os.cpu_count()) as pool:
+        parts = list(pool.map(_assign, starts))
+    return np.concatenate(parts).astype(np.int16) if parts else np.empty(0, dtype=np.int16)
+
+
+def silhouette_score(X, labels):
+    """Mean silhouette coefficient computed from the full pairwise distance matrix of X."""
+    X = X.astype(np.float64)
+    dist = np.sqrt(np.clip(_squared_distances(X, X), 0, None))
+    k = labels.max() + 1
+    one_hot = np.eye(k)[labels]
+    sizes = one_hot.sum(axis=0)
+
+    # Mean distance from each point to every cluster (excluding itself for its own)
+    sums = dist @ one_hot
+    own = sizes[labels] - 1
+    a = sums[np.arange(len(X)), labels] / np.where(own > 0, own, 1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        other = sums / sizes
+    other[np.arange(len(X)), labels] = np.inf
+    other[:, sizes == 0] = np.inf
+    b = other.min(axis=1)
+
+    s = np.where(own > 0, (b - a) / np.maximum(a, b), 0.0)
+    return float(np.nan_to_num(s).mean())
+
+
+def _fit_candidate(args):
+    X, sample, k, seed = args
+    centers = minibatch_kmeans(X, k, seed=seed)
+    sample_labels = _squared_distances(sample.astype(np.float32), centers).argmin(axis=1)
+    if len(np.unique(sample_labels)) < 2:
+        return k, centers, np.nan
+    return k, centers, silhouette_score(sample, sample_labels)
+
+
+def candidate_tasks(X, candidates=range(2, 9), sample_size=2000, seed=0):
+    """One (function, args) task per candidate k, all scored on the same sample."""
+    rng = np.random.default_rng(seed)
+    sample = X[rng.choice(len(X), size=min(sample_size, len(X)), replace=False)]
+    return [(_fit_candidate, ((X, sample, k, seed),)) for k in candidates if k < len(X)]
+
+
+def combine_candidates(results):
+    """Scores DataFrame and {k: centres} dict from the candidate results."""
+    scores = pd.DataFrame([(k, score) for k, _, score in results], columns=['k', 'Silhouette'])
+    return scores, {k: centers for k, centers, _ in results}
+
+
+def select_k(X, candidates=range(2, 9), sample_size=2000, seed=0, max_workers=None):
+    """
+    Fit one model per candidate k in parallel and score each by silhouette on a sample.
+
+    Returns a DataFrame of scores and a {k: centres} dict.
+    """
+    tasks = [args for _, (args,) in candidate_tasks(X, candidates, sample_size, seed)]
+
+    workers = min(len(tasks), max_workers or os.cpu_count() or 1)
+    if workers > 1 and len(X) > 50000:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_fit_candidate, tasks))
+    else:
+        results = [_fit_candidate(task) for task in tasks]
+    return combine_candidates(results)
+
+
+def clustering_job(df, candidates=tuple(range(2, 9))):
+    """Candidate models fitted in the background, one scheduler task per k."""
+    key = ('cluster_respondents', dataset_version(df), candidates)
+    owner = job_scheduler.session_owner('cluster_respondents')
+    job = job_scheduler.lookup(key, owner)
+    if job is not None:
+        return job
+    return job_scheduler.submit(key, candidate_tasks(likert_matrix(df), candidates), combine_candidates, owner=owner)
+
+
+def save_assignments(labels, path=CLUSTER_PATH):
+    """Persist cluster labels (one per dataset row) so other pages can filter by cluster."""
+    pd.DataFrame({CLUSTER_COLUMN: labels}).to_csv(path, index_label='row')
+    reload_data()
+
+
+# ==================================================
+# SHOPPER PERSONAS PAGE
+# ==================================================
+def app():
+    st.header("🧩 Data-Driven Shopper Personas")
+
+    st.subheader("Problem Statement")
+    st.write("""
+    Fixed demographics only partly explain impulse buying. Clustering respondents
+    on their full Likert response profile reveals shopper personas that cut across
+    gender, age and faculty.
+    """)
+
+    df = load_data()
+    X = likert_matrix(df)
+    fitted = job_scheduler.poll(clustering_job(df), "Fitting candidate cluster models...")
+    if fitted is None:
+        return
+    scores, models = fitted
+
+    # ==================================================
+    # 1. CHOOSING K
+    # ==================================================
+    st.markdown("### 1️⃣ Number of Personas")
+    best_k = int(scores.loc[scores['Silhouette'].idxmax(), 'k'])
+    fig1 = go.Figure(go.Scatter(x=scores['k'], y=scores['Silhouette'], mode='lines+markers'))
+    fig1.update_layout(
+        title='Silhouette Score by Number of Clusters',
+        xaxis_title='k',
+        yaxis_title='Mean Silhouette',
+        template='plotly_white'
+    )
+    st.plotly_chart(fig1, use_container_width=True)
+
+    k = st.select_slider("Number of clusters:", options=scores['k'].tolist(), value=best_k)
+    st.info(f"**Interpretation:** 🔢 k = {best_k} gives the best separation (highest silhouette) on a sample of respondents.")
+
+    labels = assign_clusters(X, models[k])
+
+    # ==================================================
+    # 2. PERSONA RADAR CHART
+    # ==================================================
+    st.markdown("### 2️⃣ Persona Profiles")
+    construct_means = pd.DataFrame({
+        name: df[items].to_numpy(dtype=np.float32).mean(axis=1)
+        for name, items in CONSTRUCTS.items()
+    })
+    profiles = construct_means.groupby(labels).mean()
+    sizes = np.bincount(labels, minlength=k)
+
+    theta = list(CONSTRUCTS) + [list(CONSTRUCTS)[0]]
+    fig2 = go.Figure()
+    for cluster_id, row in profiles.iterrows():
+        values = row.tolist()
+        fig2.add_trace(go.Scatterpolar(
+            r=values + values[:1],
+            theta=theta,
+            fill='toself',
+            name=f"Cluster {cluster_id} (n={sizes[cluster_id]})"
+        ))
+    fig2.update_layout(
+        polar=dict(radialaxis=dict(visible=True, range=[0, 5])),
+        title="Construct Profile per Persona"
+    )
+    st.plotly_chart(fig2, use_container_width=True)
+
+    with st.expander("📌 Persona Profile Table"):
+        st.dataframe(profiles.assign(Respondents=sizes).round(2), use_container_width=True)
+
+    # ==================================================
+    # 3. SAVE ASSIGNMENTS
+    # ==================================================
+    st.markdown("### 3️⃣ Use Personas on Other Pages")
+    if st.button("💾 Save cluster assignments"):
+        save_assignments(labels)
+        st.success(f"Saved {len(labels)} assignments. Pages with data filters now offer a cluster filter.")
@@ -0,0 +1,81 @@
+# ==================================================
+# SURVEY SCHEMA & CONSTRUCT DEFINITIONS
+# ==================================================
+# Shared by the Objective pages and the analytics modules so that
+# every page agrees on which Likert items make up each construct.
+
+# Likert item blocks (questionnaire sections) behind each construct
+CONSTRUCTS = {
+    'Scarcity': [
+        'promo_deadline_focus',
+        'promo_time_worry',
+        'limited_quantity_concern',
+        'out_of_stock_worry'
+    ],
+    'Serendipity': [
+        'product_recall_exposure',
+        'surprise_finds',
+        'exceeds_expectations',
+        'fresh_interesting_info',
+        'relevant_surprising_info'
+    ],
+    'Trust': [
+        'trust_no_risk',
+        'trust_reliable',
+        'trust_variety_meets_needs',
+        'trust_sells_honestly',
+        'trust_quality_matches_description'
+    ],
+    'Motivation': [
+        'relax_reduce_stress',
+        'motivated_by_discount_promo',
+        'motivated_by_gifts'
+    ],
+    'BrandDesign': [
+        'similar_to_famous_brand_attraction',
+        'new_product_urgency',
+        'brand_trust_influence',
+        'unique_design_attraction'
+    ],
+    'Quality': [
+        'product_description_quality',
+        'image_quality_influence',
+        'multi_angle_visuals',
+        'info_richness_support'
+    ],
+    'ImpulseBuying': [
+        'no_purchase_plan',
+        'no_purchase_intent',
+        'impulse_purchase'
+    ]
+}
+
+# All 28 Likert items in questionnaire order
+LIKERT_ITEMS = [item for items in CONSTRUCTS.values() for item in items]
+
+# 5-point scale: 1 (Strongly Disagree) – 5 (Strongly Agree)
+LIKERT_LEVELS = [1, 2, 3, 4, 5]
+
+# Precomputed composite columns in the cleaned CSV and the items each one averages
+COMPOSITE_ITEMS = {
+    'promotion_score': ['promo_deadline_focus', 'promo_time_worry', 'new_product_urgency'],
+    'scarcity_score': ['limited_quantity_concern', 'out_of_stock_worry'],
+    'SL_score': CONSTRUCTS['BrandDesign'],
+    'PP_score': CONSTRUCTS['Quality'],
+    'OIB_score': CONSTRUCTS['ImpulseBuying'],
+    'Scarcity': CONSTRUCTS['Scarcity'],
+    'Serendipity': CONSTRUCTS['Serendipity'],
+    'Trust': CONSTRUCTS['Trust'],
+    'Motivation': CONSTRUCTS['Motivation'],
+    'BrandDesign': CONSTRUCTS['BrandDesign'],
+    'Quality': CONSTRUCTS['Quality'],
+    'ImpulseBuying': CONSTRUCTS['ImpulseBuying'],
+    'Trust_Score': CONSTRUCTS['Trust'],
+    'Motivation_Score': CONSTRUCTS['Motivation']
+}
+
+# Construct-level score columns (one per construct)
+CONSTRUCT_SCORES = list(CONSTRUCTS.keys())
+
+# Categorical respondent profile columns
+DEMOGRAPHIC_COLUMNS = ['gender', 'age', 'faculty', 'monthly_income', 'tiktok_shop_experience']
@@ -0,0 +1,315 @@
+import itertools
+import os
+import weakref
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+import imputation
+import response_log
+from constructs import DEMOGRAPHIC_COLUMNS, LIKERT_ITEMS
+from result_cache import memoize
+from validator import is_clean_likert, validate_frame
+
+DATA_PATH = "tiktok_impulse_buying_cleaned.csv"
+
+# Missing-answer handling at ingest: none, person_mean or chained (see imputation.py)
+IMPUTATION_METHOD = os.environ.get("TIKTOK_IMPUTATION", "person_mean")
+
+# Saved persona assignments from the clustering page (one row per respondent)
+CLUSTER_PATH = "cluster_assignments.csv"
+CLUSTER_COLUMN = "cluster"
+
+
+# ==================================================
+# DATASET LOADING
+# ==================================================
+def read_dataset(path=DATA_PATH):
+    """
+    Parse the CSV into a typed frame.
+
+    Demographics become categoricals and clean Likert items become uint8,
+    which keeps the frame several times smaller than the raw float64 parse.
+    Items with nulls or off-scale values keep their parsed dtype so the
+    validator can report them.
+    """
+    df = pd.read_csv(path)
+    df.columns = df.columns.str.strip()
+    return _typed(df)
+
+
+def _typed(df):
+    for col in DEMOGRAPHIC_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].astype('category')
+    for col in LIKERT_ITEMS:
+        if col in df.columns and is_clean_likert(df[col]):
+            df[col] = df[col].astype(np.uint8)
+    return df
+
+
+@st.cache_resource(show_spinner="Loading dataset...")
+def _base_frame(path):
+    # Reuse the startup snapshot's typed dataset when it is available
+    import snapshot
+    df = snapshot.artifact('dataset') if path == DATA_PATH else None
+    return df if df is not None else read_dataset(path)
+
+
+@st.cache_resource(show_spinner="Loading dataset...")
+def _ingested_frame(path):
+    # Fill skipped or off-scale answers instead of dropping respondents
+    return imputation.impute_frame(_base_frame(path).copy(), IMPUTATION_METHOD)
+
+
+def _cluster_stamp():
+    return os.stat(CLUSTER_PATH).st_mtime_ns if os.path.exists(CLUSTER_PATH) else None
+
+
+# path -> (logged rows, persona file stamp, frame, mask) of the newest shared frame
+_newest = {}
+
+
+@st.cache_resource(show_spinner="Loading dataset...", max_entries=2)
+def _shared_frame(path, log_version):
+    # Responses submitted since the CSV was cleaned (see response_log)
+    responses = response_log.read_responses() if log_version is not None else pd.DataFrame()
+    stamp = _cluster_stamp()
+    newest = _newest.get(path)
+    if newest is not None and newest[0] == len(responses) and newest[1] == stamp:
+        # Compaction rewrote the log without adding responses
+        return newest[2]
+
+    if newest is not None and newest[0] <= len(responses):
+        # Append only what was logged since the newest frame. Logged responses
+        # are validated complete, so nothing needs re-imputing.
+        n_logged, df, mask = newest[0], newest[2].drop(columns=CLUSTER_COLUMN, errors='ignore'), newest[3]
+    else:
+        (df, mask), n_logged = _ingested_frame(path), 0
+    new = responses.iloc[n_logged:]
+    if len(new):
+        n_rows = len(df)
+        df = _typed(pd.concat([df, new.reindex(columns=df.columns)], ignore_index=True))
+        if mask is not None:
+            appended = pd.DataFrame(False, index=df.index[n_rows:], columns=mask.columns)
+            mask = pd.concat([mask, appended])
+
+    # Attach saved persona assignments when they match the dataset
+    if stamp is not None:
+        clusters = pd.read_csv(CLUSTER_PATH, index_col='row')[CLUSTER_COLUMN]
+        if len(clusters) == len(df):
+            df = df.assign(**{CLUSTER_COLUMN: clusters.to_numpy()})
+    frozen = freeze_frame(df)
+    _shared[id(frozen)] = (weakref.ref(frozen), set(_fingerprints[id(frozen)][3]))
+    if mask is not None:
+        _masks[id(frozen)] = (weakref.ref(frozen), mask)
+    if newest is None or newest[0] <= len(responses):
+        _newest[path] = (len(responses), stamp, frozen, mask)
+    return frozen
+
+
+def load_data(path=DATA_PATH):
+    """
+    The shared, read-only dataset.
+
+    One frame serves every session and rerun without copying. Its column
+    arrays are read-only, so in-place writes raise; pages put derived columns
+    in their own scratch frames instead (see `scratch_frame`).
+
+    The frame includes responses from the append-only log. When new responses
+    arrive they are appended to the newest frame; the result is a new frame
+    with its own dataset version, so results cached for the previous one are
+    never served for it and age out of the caches.
+    """
+    log_version = response_log.version() if path == DATA_PATH else None
+    return _shared_frame(path, log_version)
+
+
+def reload_data():
+    """Drop the shared frame so the next load_data() rebuilds it (e.g. new cluster labels)."""
+    _shared_frame.clear()
+
+
+@st.cache_data(show_spinner=False)
+def validation_report(path=DATA_PATH):
+    """
+    Data-quality report for the CSV as parsed, before ingest imputation
+    (see validator.validate_frame). Imputed answers are reported separately
+    through `imputation_mask`.
+    """
+    return validate_frame(_base_frame(path))
+
+
+# ==================================================
+# READ-ONLY SHARED FRAME
+# ==================================================
+# Keyed by id(frame); freeze_frame registers a finalizer that drops a frame's
+# entries when it is collected, so a reused id never inherits stale state
+_fingerprints = {}
+_versions = {}
+_masks = {}
+_shared = {}  # id -> (frame, column buffers) for frames built by _shared_frame
+_version_counter = itertools.count(1)
+
+
+def _forget(frame_id):
+    for registry in (_fingerprints, _versions, _masks, _shared):
+        registry.pop(frame_id, None)
+
+
+def _buffer(series):
+    """Address of the array behind a column; assigning the column replaces it."""
+    values = series.array
+    if isinstance(values, pd.Categorical):
+        return values.codes.__array_interface__['data'][0]
+    if isinstance(values, pd.arrays.NumpyExtensionArray):
+        return values.to_numpy().__array_interface__['data'][0]
+    return id(values)
+
+
+def _fingerprint(df):
+    return tuple(df.columns), tuple(map(str, df.dtypes)), len(df), tuple(_buffer(df[c]) for c in df.columns)
+
+
+def freeze_frame(df, keep=()):
+    """
+    Rebuild df on read-only column arrays and record its layout. Columns in
+    `keep` are already read-only (taken from another frozen frame) and are
+    reused without copying.
+    """
+    columns = {}
+    for col in df.columns:
+        values = df[col].array
+        if col in keep:
+            columns[col] = values
+        elif isinstance(values, pd.Categorical):
+            codes = values.codes.copy()
+            codes.flags.writeable = False
+            columns[col] = pd.Categorical.from_codes(codes, dtype=values.dtype)
+        elif isinstance(values, pd.arrays.NumpyExtensionArray):
+            array = values.to_numpy().copy()
+            array.flags.writeable = False
+            columns[col] = array
+        else:
+            columns[col] = values
+    frozen = pd.DataFrame(columns, index=df.index, copy=False)
+    _fingerprints[id(frozen)] = _fingerprint(frozen)
+    _versions[id(frozen)] = (weakref.ref(frozen), next(_version_counter))
+    weakref.finalize(frozen, _forget, id(frozen))
+    return frozen
+
+
+def dataset_version(df):
+    """Version token of a frozen shared frame, or None for any other frame."""
+    ref, version = _versions.get(id(df), (None, None))
+    return version if ref is not None and ref() is df else None
+
+
+def is_shared_frame(df):
+    """True for a frame returned by load_data()."""
+    ref, _ = _shared.get(id(df), (None, None))
+    return ref is not None and ref() is df
+
+
+def shared_columns(df):
+    """Columns of df backed by the arrays of a live shared frame."""
+    buffers = set()
+    for ref, frame_buffers in list(_shared.values()):
+        if ref() is not None:
+            buffers |= frame_buffers
+    return [c for c in df.columns if _buffer(df[c]) in buffers]
+
+
+def imputation_mask(df):
+    """Boolean (respondent × Likert item) frame of imputed answers, or None if none were."""
+    ref, mask = _masks.get(id(df), (None, None))
+    return mask if ref is not None and ref() is df else None
+
+
+def derived_frame(df, **columns):
+    """
+    Read-only frame sharing df's column arrays except for the replaced ones
+    (e.g. IRT scores in place of the mean composites). It has its own dataset version,
+    so cached results never mix the two, and keeps df's imputation mask.
+    """
+    frozen = freeze_frame(df.assign(**columns), keep=[c for c in df.columns if c not in columns])
+    mask = imputation_mask(df)
+    if mask is not None:
+        _masks[id(frozen)] = (weakref.ref(frozen), mask)
+    return frozen
+
+
+def check_shared_frame(df=None):
+    """
+    Raise if a page added, removed, retyped or replaced columns of the shared
+    dataset. In-place writes already fail on the read-only arrays; assigning
+    a column (df[col] = ..., df[col] *= 2) swaps its array, which shows here.
+    """
+    df = load_data() if df is None else df
+    expected = _fingerprints.get(id(df))
+    if expected is not None and _fingerprint(df) != expected:
+        columns, dtypes, _, buffers = expected
+        added = [c for c in df.columns if c not in columns]
+        removed = [c for c in columns if c not in df.columns]
+        retyped = [
+            c for c, dtype in zip(columns, dtypes)
+            if c in df.columns and str(df[c].dtype) != dtype
+        ]
+        replaced = [
+            c for c, buffer in zip(columns, buffers)
+            if c in df.columns and c not in retyped and _buffer(df[c]) != buffer
+        ]
+        raise RuntimeError(
+            f"The shared dataset was modified (added: {added}, removed: {removed}, "
+            f"retyped: {retyped}, replaced: {replaced}). Pages must write derived columns to a scratch frame."
+        )
+
+
+def scratch_frame(index, **columns):
+    """Per-request frame for derived columns, aligned to the rows of a view."""
+    return pd.DataFrame(columns, index=index)
+
+
+def likert_matrix(df, items=LIKERT_ITEMS):
+    """Likert responses as a compact (n_rows, n_items) uint8 matrix."""
+    return df[items].to_numpy(dtype=np.uint8)
+
+
+# ==================================================
+# FILTERED VIEWS (keyed by filter signature)
+# ==================================================
+def filter_mask(df, filters=()):
+    """Boolean row mask for a filter signature: a tuple of (column, allowed values)."""
+    mask = np.ones(len(df), dtype=bool)
+    for col, values in filters:
+        mask &= df[col].isin(values).to_numpy()
+    return mask
+
+
+def filter_index(df, filters=()):
+    """Row positions selected by a filter signature."""
+    return np.flatnonzero(filter_mask(df, filters))
+
+
+def filtered_view(df, filters=(), columns=None):
+    """
+    Rows (and optionally columns) selected by a filter signature.
+
+    The unfiltered, all-column view is the shared frame itself; otherwise
+    only the selected rows of the requested columns are gathered.
+    """
+    if not filters and columns is None:
+        return df
+    rows = filter_index(df, filters) if filters else slice(None)
+    cols = [df.columns.get_loc(c) for c in columns] if columns is not None else slice(None)
+    return df.iloc[rows, cols]
+
+
+@memoize
+def item_covariance(df, filters=(), items=tuple(LIKERT_ITEMS)):
+    """Item covariance matrix and respondent count for the filtered sample."""
+    X = likert_matrix(filtered_view(df, filters, list(items)), list(items)).astype(np.float64)
+    if len(X) < 2:
+        return np.full((len(items), len(items)), np.nan), len(X)
+    return np.cov(X, rowvar=False), len(X)
@@ -0,0 +1,168 @@
+import os
+
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+from matplotlib.colors import to_hex
+
+# Above this many points the scatters are drawn as a binned density instead
+DENSITY_THRESHOLD = int(os.environ.get("TIKTOK_DENSITY_THRESHOLD", 20_000))
+
+# Cells along x and y; the browser cost of a density plot depends on this only
+GRID_SIZE = (240, 160)
+
+# Opacity of the sparsest and densest non-empty cells in the category image
+MIN_ALPHA, MAX_ALPHA = 70, 255
+
+
+def use_density(n_points, threshold=DENSITY_THRESHOLD):
+    return n_points > threshold
+
+
+# ==================================================
+# BINNING
+# ==================================================
+def grid_edges(values, bins):
+    """Equal-width cell edges spanning the finite values."""
+    values = np.asarray(values, dtype=np.float64)
+    values = values[np.isfinite(values)]
+    lo, hi = (values.min(), values.max()) if len(values) else (0.0, 1.0)
+    if lo == hi:
+        lo, hi = lo - 0.5, hi + 0.5
+    return np.linspace(lo, hi, bins + 1)
+
+
+def density_grid(x, y, x_edges, y_edges, codes=None, n_categories=1, weights=None):
+    """
+    Points (or summed weights) per cell as an (n_categories, ny, nx) array.
+
+    Each point's cell index is computed arithmetically from the equal-width
+    edges and all categories are counted in one bincount, so the cost is a
+    few passes over the points whatever the grid size. Points with a missing
+    coordinate or category (code -1) are skipped.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    nx, ny = len(x_edges) - 1, len(y_edges) - 1
+    codes = np.zeros(len(x), dtype=np.int64) if codes is None else np.asarray(codes, dtype=np.int64)
+    keep = np.isfinite(x) & np.isfinite(y) & (codes >= 0)
+    if weights is not None:
+        weights = np.asarray(weights, dtype=np.float64)[keep]
+    x, y, codes = x[keep], y[keep], codes[keep]
+
+    ix = np.clip(((x - x_edges[0]) * (nx / (x_edges[-1] - x_edges[0]))).astype(np.int64), 0, nx - 1)
+    iy = np.clip(((y - y_edges[0]) * (ny / (y_edges[-1] - y_edges[0]))).astype(np.int64), 0, ny - 1)
+    cells = (codes * ny + iy) * nx + ix
+    counts = np.bincount(cells, weights=weights, minlength=n_categories * ny * nx)
+    return counts.reshape(n_categories, ny, nx)
+
+
+def trend_line(x, y, weights=None, n_points=100):
+    """
+    Least-squares line across the x range; weighted in the weighted mode.
+    Empty when fewer than two distinct x values (or no weight) are left.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    if len(np.unique(x)) < 2 or (weights is not None and not np.sum(weights) > 0):
+        return np.array([]), np.array([])
+    # polyfit squares w, so pass the square roots of the survey weights
+    m, b = np.polyfit(x, y, 1, w=None if weights is None else np.sqrt(weights))
+    x_line = np.linspace(x.min(), x.max(), n_points)
+    return x_line, m * x_line + b
+
+
+# ==================================================
+# FIGURES
+# ==================================================
+def _centers(edges):
+    return (edges[:-1] + edges[1:]) / 2
+
+
+def _count_heatmap(counts, x_edges, y_edges):
+    """Single-colour density: log-scaled heatmap with the raw counts on hover."""
+    with np.errstate(divide='ignore'):
+        shade = np.where(counts > 0, np.log10(np.maximum(counts, 1e-12)), np.nan)
+    lo, hi = np.floor(np.nanmin(shade)), np.ceil(np.nanmax(shade))
+    ticks = np.arange(lo, hi + 1)
+    return go.Heatmap(
+        z=shade.astype(np.float32),
+        x=_centers(x_edges),
+        y=_centers(y_edges),
+        customdata=counts.astype(np.float32),
+        colorscale='Viridis',
+        colorbar=dict(title='Respondents', tickvals=ticks, ticktext=[f"{10 ** t:,.0f}" for t in ticks]),
+        hovertemplate='x: %{x:.2f}<br>y: %{y:.2f}<br>respondents: %{customdata:,.0f}<extra></extra>',
+        name='Density'
+    )
+
+
+def _category_image(counts, colors, x_edges, y_edges):
+    """
+    One RGBA image for several categories: each cell takes the count-weighted
+    mix of the category colours, and its opacity grows with the log count.
+    """
+    total = counts.sum(axis=0)
+    rgb = np.array([[int(c[i:i + 2], 16) for i in (1, 3, 5)] for c in colors], dtype=np.float64)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mix = np.tensordot(counts, rgb, axes=(0, 0)) / total[:, :, None]
+        alpha = MIN_ALPHA + (MAX_ALPHA - MIN_ALPHA) * np.log1p(total) / np.log1p(total.max())
+    image = np.zeros(total.shape + (4,), dtype=np.uint8)
+    filled = total > 0
+    image[filled, :3] = np.rint(mix[filled])
+    image[filled, 3] = np.rint(alpha[filled])
+    return go.Image(
+        z=image,
+        colormodel='rgba',
+        x0=_centers(x_edges)[0], dx=x_edges[1] - x_edges[0],
+        y0=_centers(y_edges)[0], dy=y_edges[1] - y_edges[0],
+        hoverinfo='skip'
+    )
+
+
+def _hex(color):
+    """'#rrggbb' for a named, hex or plotly 'rgb(r, g, b)' colour."""
+    if color.startswith('rgb'):
+        color = tuple(float(v) / 255 for v in color[color.index('(') + 1:color.index(')')].split(',')[:3])
+    return to_hex(color)
+
+
+def density_figure(x, y, color=None, weights=None, trendline=True, title=None,
+                   x_title=None, y_title=None, color_title=None, color_map=None, grid_size=GRID_SIZE):
+    """
+    Scatter replacement for large samples: the points are binned into a
+    grid_size density on the server and sent as one heatmap (or, when split
+    by `color`, one RGBA image with a legend entry per category), with the
+    fitted trend line drawn on top.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    weights = None if weights is None else np.asarray(weights, dtype=np.float64)
+    x_edges, y_edges = grid_edges(x, grid_size[0]), grid_edges(y, grid_size[1])
+    fig = go.Figure()
+
+    if color is None:
+        counts = density_grid(x, y, x_edges, y_edges, weights=weights)
+        fig.add_trace(_count_heatmap(counts[0], x_edges, y_edges))
+    else:
+        codes, categories = pd.factorize(pd.Series(color), sort=True)
+        palette = px.colors.qualitative.Plotly
+        color_map = color_map or {}
+        colors = [_hex(color_map.get(c, palette[i % len(palette)])) for i, c in enumerate(categories)]
+        counts = density_grid(x, y, x_edges, y_edges, codes, len(categories), weights)
+        fig.add_trace(_category_image(counts, colors, x_edges, y_edges))
+        for category, c in zip(categories, colors):
+            # Legend entries only: the image trace itself has no legend
+            fig.add_scatter(x=[None], y=[None], mode='markers', marker=dict(color=c, size=10), name=str(category))
+        fig.update_layout(legend_title_text=color_title)
+
+    if trendline:
+        present = np.isfinite(x) & np.isfinite(y)
+        x_line, y_line = trend_line(x[present], y[present], None if weights is None else weights[present])
+        fig.add_scatter(x=x_line, y=y_line, mode='lines', name='Trend Line', line=dict(color='red'))
+
+    fig.update_layout(title=title, xaxis_title=x_title, yaxis_title=y_title)
+    # Image traces reverse the y axis by default; keep it increasing upwards
+    fig.update_yaxes(autorange=True)
+    return fig
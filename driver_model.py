@@ -0,0 +1,168 @@
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import streamlit as st
+
+import irt_model
+from constructs import DEMOGRAPHIC_COLUMNS
+from data_loader import filtered_view, load_data
+from filters import sidebar_filters
+from segment_stats import segment_index, segment_moments
+
+OUTCOME = 'OIB_score'
+
+# SL_score and PP_score average exactly the same items as BrandDesign and
+# Quality, so only one column of each pair enters the model.
+PREDICTORS = ['Scarcity', 'Serendipity', 'Trust', 'Motivation', 'SL_score', 'PP_score']
+PREDICTOR_LABELS = {
+    'SL_score': 'SL_score (BrandDesign)',
+    'PP_score': 'PP_score (Quality)'
+}
+
+
+# ==================================================
+# BATCHED OLS FROM SEGMENT GRAM MATRICES
+# ==================================================
+def fit_segments(counts, cross):
+    """
+    Solve the normal equations of every segment at once.
+
+    cross: (S, q, q) moments of [1, X..., y] per segment (from segment_moments).
+    Returns coefficients (S, p+1), standard errors (S, p+1) and R² (S,).
+    """
+    n_coef = cross.shape[1] - 1
+    gram = cross[:, :n_coef, :n_coef]
+    xty = cross[:, :n_coef, -1]
+    yty = cross[:, -1, -1]
+    y_sum = cross[:, 0, -1]
+
+    # Pseudo-inverse keeps rank-deficient segments (e.g. constant predictors) finite
+    gram_inv = np.linalg.pinv(gram)
+    coef = np.einsum('sij,sj->si', gram_inv, xty)
+
+    rss = yty - np.einsum('si,si->s', coef, xty)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        dof = counts - n_coef
+        sigma2 = np.where(dof > 0, rss / dof, np.nan)
+        se = np.sqrt(np.clip(np.diagonal(gram_inv, axis1=1, axis2=2), 0, None) * sigma2[:, None])
+        tss = yty - y_sum ** 2 / counts
+        r2 = 1 - rss / tss
+
+    too_small = counts <= n_coef
+    coef[too_small] = np.nan
+    se[too_small] = np.nan
+    r2[too_small] = np.nan
+    return coef, se, r2
+
+
+def driver_models(df, predictors=PREDICTORS, outcome=OUTCOME, segment_columns=DEMOGRAPHIC_COLUMNS):
+    """
+    OLS of `outcome` on `predictors` for every demographic segment.
+
+    Returns (coefficients in long format, per-segment fit summary).
+    """
+    segments, ids = segment_index(df, [c for c in segment_columns if c in df.columns])
+    design = np.column_stack([
+        np.ones(len(df)),
+        df[predictors].to_numpy(dtype=np.float64),
+        df[outcome].to_numpy(dtype=np.float64)
+    ])
+    counts, _, cross = segment_moments(design, ids, len(segments))
+    coef, se, r2 = fit_segments(counts, cross)
+
+    terms = ['Intercept'] + [PREDICTOR_LABELS.get(p, p) for p in predictors]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        t_values = coef / se
+    coefficients = pd.concat([
+        segments.assign(
+            Term=term,
+            Coefficient=coef[:, j],
+            **{'Std. Error': se[:, j], 't': t_values[:, j]}
+        )
+        for j, term in enumerate(terms)
+    ], ignore_index=True)
+
+    fit = segments.assign(n=counts.astype(int), R2=r2)
+    return coefficients, fit
+
+
+# ==================================================
+# DRIVER MODEL PAGE
+# ==================================================
+def app():
+    st.header("🚦 Drivers of Impulse Buying (Multiple Regression)")
+
+    st.subheader("Problem Statement")
+    st.write("""
+    Objective 4 relates impulse buying to product presentation alone. Impulse buying is
+    likely driven by several constructs at once, so this page regresses the impulse buying
+    score on all construct scores together and compares the drivers across segments.
+    """)
+
+    df = irt_model.page_frame(load_data())
+    missing_cols = [c for c in PREDICTORS + [OUTCOME] if c not in df.columns]
+    if missing_cols:
+        st.warning(f"Missing columns for the driver model: {missing_cols}")
+        return
+
+    filters = sidebar_filters(df, key="driver_filters")
+    df = filtered_view(df, filters)
+    coefficients, fit = driver_models(df)
+
+    # ==================================================
+    # 1. OVERALL DRIVERS
+    # ==================================================
+    st.markdown("### 1️⃣ Coefficients for the Selected Sample")
+    overall = coefficients[(coefficients['Segment By'] == 'All') & (coefficients['Term'] != 'Intercept')]
+    overall_fit = fit[fit['Segment By'] == 'All'].iloc[0]
+
+    col1, col2 = st.columns(2)
+    col1.metric("Respondents", int(overall_fit['n']))
+    col2.metric("R²", f"{overall_fit['R2']:.2f}")
+
+    fig1 = px.bar(
+        overall,
+        x='Coefficient',
+        y='Term',
+        orientation='h',
+        error_x=1.96 * overall['Std. Error'],
+        title='Effect on Impulse Buying Score (±95% CI)'
+    )
+    st.plotly_chart(fig1, use_container_width=True)
+
+    strongest = overall.loc[overall['Coefficient'].abs().idxmax(), 'Term'] if overall['Coefficient'].notna().any() else None
+    if strongest:
+        st.info(f"**Interpretation:** 🎯 Holding the other constructs constant, **{strongest}** has the largest effect on impulse buying in the selected sample.")
+
+    # ==================================================
+    # 2. DRIVERS BY SEGMENT
+    # ==================================================
+    st.markdown("### 2️⃣ Drivers by Segment")
+    segment_by = st.selectbox(
+        "Compare segments by:",
+        [c for c in DEMOGRAPHIC_COLUMNS if c in df.columns]
+    )
+    by_segment = coefficients[
+        (coefficients['Segment By'] == segment_by) & (coefficients['Term'] != 'Intercept')
+    ]
+    heat = by_segment.pivot(index='Segment', columns='Term', values='Coefficient')
+
+    fig2 = px.imshow(
+        heat,
+        text_auto='.2f',
+        color_continuous_scale='RdBu',
+        color_continuous_midpoint=0,
+        aspect='auto',
+        title=f'Regression Coefficients by {segment_by}'
+    )
+    st.plotly_chart(fig2, use_container_width=True)
+
+    with st.expander("📌 Full Coefficient Table"):
+        segment_fit = fit[fit['Segment By'] == segment_by][['Segment', 'n', 'R2']]
+        st.dataframe(segment_fit.round(3), use_container_width=True)
+        st.dataframe(
+            coefficients[coefficients['Segment By'] == segment_by]
+            .drop(columns='Segment By').round(3),
+            use_container_width=True
+        )
+        st.caption("Segments with no more respondents than model terms are left empty.")
@@ -0,0 +1,189 @@
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+import streamlit as st
+
+from constructs import CONSTRUCTS, LIKERT_ITEMS
+from data_loader import item_covariance, load_data
+from filters import sidebar_filters
+from result_cache import memoize
+
+# Item sets wider than this use randomized SVD instead of a full eigendecomposition
+RANDOMIZED_SVD_THRESHOLD = 100
+
+
+# ==================================================
+# DECOMPOSITION
+# ==================================================
+def covariance_to_correlation(cov):
+    sd = np.sqrt(np.diag(cov))
+    return cov / np.outer(sd, sd)
+
+
+def randomized_svd(A, n_components, oversample=10, n_iter=4, seed=0):
+    """Halko–Martinsson–Tropp randomized SVD of a matrix A (returns U, s, Vt)."""
+    rng = np.random.default_rng(seed)
+    size = min(n_components + oversample, min(A.shape))
+    Q = A @ rng.standard_normal((A.shape[1], size))
+    # Power iterations sharpen the spectrum; QR keeps them stable
+    for _ in range(n_iter):
+        Q, _ = np.linalg.qr(A @ (A.T @ Q))
+    Q, _ = np.linalg.qr(Q)
+    U_small, s, Vt = np.linalg.svd(Q.T @ A, full_matrices=False)
+    return (Q @ U_small)[:, :n_components], s[:n_components], Vt[:n_components]
+
+
+def principal_components(corr, n_components):
+    """Eigenvalues (all available) and unrotated loadings of a correlation matrix."""
+    if corr.shape[0] > RANDOMIZED_SVD_THRESHOLD:
+        # Correlation matrices are symmetric PSD, so singular values are eigenvalues
+        vectors, eigenvalues, _ = randomized_svd(corr, n_components)
+    else:
+        eigenvalues, vectors = np.linalg.eigh(corr)
+        order = np.argsort(eigenvalues)[::-1]
+        eigenvalues, vectors = eigenvalues[order], vectors[:, order]
+
+    k = n_components
+    # Fix the sign so each component loads positively on balance
+    signs = np.sign(vectors[:, :k].sum(axis=0))
+    signs[signs == 0] = 1
+    loadings = vectors[:, :k] * signs * np.sqrt(np.clip(eigenvalues[:k], 0, None))
+    return eigenvalues, loadings
+
+
+def varimax(loadings, max_iter=100, tol=1e-6):
+    """Kaiser varimax rotation of a (p, k) loading matrix."""
+    p, k = loadings.shape
+    if k < 2:
+        return loadings
+    rotation = np.eye(k)
+    criterion = 0.0
+    for _ in range(max_iter):
+        rotated = loadings @ rotation
+        u, s, vt = np.linalg.svd(
+            loadings.T @ (rotated ** 3 - rotated @ np.diag((rotated ** 2).sum(axis=0)) / p)
+        )
+        rotation = u @ vt
+        new_criterion = s.sum()
+        if new_criterion < criterion * (1 + tol):
+            break
+        criterion = new_criterion
+    return loadings @ rotation
+
+
+@memoize
+def factor_solution(df, filters=(), n_factors=7):
+    """PCA + varimax for a filter signature, computed from the cached item covariance."""
+    cov, n = item_covariance(df, filters)
+    if n < 3 or np.isnan(cov).any():
+        return None
+    corr = covariance_to_correlation(cov)
+    corr = np.nan_to_num(corr)  # zero-variance items in small segments
+    eigenvalues, loadings = principal_components(corr, n_factors)
+    rotated = varimax(loadings)
+
+    factors = [f"F{i + 1}" for i in range(n_factors)]
+    return {
+        'n': n,
+        'eigenvalues': eigenvalues,
+        'explained': eigenvalues / np.trace(corr),
+        'loadings': pd.DataFrame(loadings, index=LIKERT_ITEMS, columns=factors),
+        'rotated': pd.DataFrame(rotated, index=LIKERT_ITEMS, columns=factors)
+    }
+
+
+# ==================================================
+# FACTOR ANALYSIS PAGE
+# ==================================================
+def app():
+    st.header("🧭 Exploratory Factor Analysis of the Likert Items")
+
+    st.subheader("Problem Statement")
+    st.write("""
+    The dashboard assumes that the 28 Likert items form seven constructs
+    (Scarcity, Serendipity, Trust, Motivation, Brand Design, Quality and Impulse Buying).
+    Principal component extraction with varimax rotation shows whether the items
+    actually group together the way the composite scores assume.
+    """)
+
+    df = load_data()
+    filters = sidebar_filters(df, key="factor_filters")
+
+    n_factors = st.slider(
+        "Number of factors to extract:",
+        min_value=2, max_value=10, value=len(CONSTRUCTS)
+    )
+    solution = factor_solution(df, filters, n_factors)
+    if solution is None:
+        st.warning("Not enough respondents in the selected segment to extract factors.")
+        return
+
+    st.caption(f"Based on {solution['n']} respondents.")
+
+    # ==================================================
+    # 1. SCREE PLOT
+    # ==================================================
+    st.markdown("### 1️⃣ Scree Plot")
+    eigenvalues = solution['eigenvalues']
+    fig1 = go.Figure()
+    fig1.add_trace(go.Scatter(
+        x=np.arange(1, len(eigenvalues) + 1),
+        y=eigenvalues,
+        mode='lines+markers',
+        name='Eigenvalue'
+    ))
+    fig1.add_hline(y=1, line_dash='dash', annotation_text='Kaiser criterion (λ = 1)')
+    fig1.update_layout(
+        title='Scree Plot of the Item Correlation Matrix',
+        xaxis_title='Component',
+        yaxis_title='Eigenvalue',
+        template='plotly_white'
+    )
+    st.plotly_chart(fig1, use_container_width=True)
+
+    n_kaiser = int((eigenvalues > 1).sum())
+    explained = solution['explained'][:n_factors].sum() * 100
+    st.info(f"**Interpretation:** 📉 {n_kaiser} components have eigenvalues above 1. "
+            f"The {n_factors} extracted factors explain {explained:.1f}% of the item variance.")
+
+    # ==================================================
+    # 2. LOADINGS HEATMAP
+    # ==================================================
+    st.markdown("### 2️⃣ Factor Loadings")
+    rotate = st.checkbox("Apply varimax rotation", value=True)
+    loadings = solution['rotated'] if rotate else solution['loadings']
+
+    construct_of = {item: name for name, items in CONSTRUCTS.items() for item in items}
+    labels = [f"{construct_of[item]} · {item}" for item in loadings.index]
+
+    fig2 = px.imshow(
+        loadings.set_axis(labels),
+        text_auto='.2f',
+        zmin=-1,
+        zmax=1,
+        color_continuous_scale='RdBu',
+        aspect='auto',
+        height=800,
+        title='Varimax-Rotated Loadings' if rotate else 'Unrotated Loadings'
+    )
+    st.plotly_chart(fig2, use_container_width=True)
+
+    # Dominant factor per item vs the construct the dashboard assumes
+    summary = pd.DataFrame({
+        'Item': loadings.index,
+        'Assumed Construct': [construct_of[item] for item in loadings.index],
+        'Dominant Factor': loadings.abs().idxmax(axis=1).values,
+        'Loading': loadings.abs().max(axis=1).values
+    })
+    with st.expander("📌 Item-to-Factor Assignment"):
+        st.dataframe(summary.round(2), use_container_width=True)
+        purity = (
+            summary.groupby('Assumed Construct')['Dominant Factor']
+            .agg(lambda s: s.value_counts().iloc[0] / len(s))
+        )
+        mixed = purity[purity < 1].index.tolist()
+        if mixed:
+            st.markdown(f"- Items of **{', '.join(mixed)}** load on more than one factor.")
+        else:
+            st.markdown("- Every construct's items share a single dominant factor.")
@@ -0,0 +1,71 @@
+import numpy as np
+
+# Trace attributes that never carry numeric data arrays
+_SKIP_KEYS = {'type', 'name', 'uid', 'meta', 'hovertemplate', 'texttemplate', 'legendgroup'}
+
+# Integer types tried in order; the first one that holds every value is used
+_INT_DTYPES = [np.uint8, np.int8, np.uint16, np.int16, np.uint32, np.int32]
+
+
+# ==================================================
+# COMPACT TYPED ARRAYS
+# ==================================================
+def compact_array(values, float_dtype=np.float32):
+    """
+    Narrowest typed array for numeric chart data, or None when not numeric.
+
+    Whole numbers (e.g. Likert levels and counts) become the smallest integer
+    type that holds them; other values become float32, which is well past
+    screen precision. Plotly serialises numpy arrays as base64 typed buffers
+    ({"dtype": "f4", "bdata": ...}) that plotly.js decodes directly.
+    """
+    array = np.asarray(values)
+    if array.dtype.kind not in 'biuf' or array.ndim == 0 or array.size == 0:
+        return None
+    if array.dtype.kind == 'b':
+        return array.astype(np.uint8)
+    if array.dtype.kind == 'f':
+        finite = np.isfinite(array)
+        if not finite.all() or not np.array_equal(array, np.round(array)):
+            return array.astype(float_dtype)
+    lo, hi = array.min(), array.max()
+    for dtype in _INT_DTYPES:
+        info = np.iinfo(dtype)
+        if info.min <= lo and hi <= info.max:
+            return array.astype(dtype)
+    return array.astype(float_dtype)
+
+
+def _numeric_paths(node, path=()):
+    """(path, value) for every list/array attribute in a trace's plotly JSON."""
+    if isinstance(node, dict):
+        for key, value in node.items():
+            if key not in _SKIP_KEYS:
+                yield from _numeric_paths(value, path + (key,))
+    elif isinstance(node, (list, tuple, np.ndarray)) and path:
+        yield path, node
+
+
+def compact_figure(fig, float_dtype=np.float32):
+    """
+    Re-encode the numeric data arrays of every trace as compact typed arrays.
+
+    Modifies and returns `fig`. Layout and string arrays (categories, labels)
+    are left untouched.
+    """
+    for trace in fig.data:
+        for path, values in list(_numeric_paths(trace.to_plotly_json())):
+            if isinstance(values, (list, tuple)) and any(isinstance(v, (dict, list, tuple)) for v in values):
+                continue
+            array = compact_array(values, float_dtype)
+            if array is not None:
+                # Plotly keeps a property's previous container type on
+                # reassignment, so clear it before setting the typed array
+                trace[path] = None
+                trace[path] = array
+    return fig
+
+
+def payload_size(fig):
+    """Bytes of the figure JSON as sent to the browser."""
+    return len(fig.to_json().encode())
@@ -0,0 +1,32 @@
+import streamlit as st
+
+from constructs import DEMOGRAPHIC_COLUMNS
+from data_loader import CLUSTER_COLUMN
+
+
+# ==================================================
+# SHARED SIDEBAR FILTERS
+# ==================================================
+def sidebar_filters(df, columns=('gender', 'age', 'monthly_income', CLUSTER_COLUMN), key="filters"):
+    """
+    Demographic multiselects in the sidebar.
+
+    Returns a hashable filter signature: a tuple of (column, selected values)
+    for every column where the user deselected something. An unfiltered
+    view has the empty signature, so it shares cache entries across pages.
+    """
+    st.sidebar.header("🔍 Data Filters")
+    signature = []
+    for col in columns:
+        if col not in df.columns or col not in DEMOGRAPHIC_COLUMNS + [CLUSTER_COLUMN]:
+            continue
+        options = sorted(df[col].dropna().unique().tolist())
+        selected = st.sidebar.multiselect(
+            f"Select {col.replace('_', ' ').title()}",
+            options=options,
+            default=options,
+            key=f"{key}_{col}"
+        )
+        if set(selected) != set(options):
+            signature.append((col, tuple(sorted(selected))))
+    return tuple(signature)
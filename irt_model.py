@@ -0,0 +1,326 @@
+import argparse
+import time
+import weakref
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+import sql_backend
+from constructs import COMPOSITE_ITEMS, CONSTRUCTS, LIKERT_LEVELS
+from data_loader import derived_frame
+from imputation import MISSING, encode
+from result_cache import memoize
+
+# Quadrature grid for the latent trait (standard normal prior)
+QUADRATURE_POINTS = 41
+THETA_RANGE = 4.0
+
+MAX_ITERATIONS = 200
+TOLERANCE = 1e-4  # largest parameter change that ends the EM iterations
+NEWTON_STEPS = 2  # Fisher-scoring steps per M-step
+
+# Weak ridge towards a=1, c=0 that keeps parameters of unused categories finite
+PRIOR_PRECISION = 0.01
+
+# Item sets up to this many possible patterns are compressed with one bincount
+DENSE_PATTERN_LIMIT = 1_000_000
+
+
+# ==================================================
+# PATTERN COMPRESSION
+# ==================================================
+def compress_patterns(X):
+    """
+    Distinct rows of an (n, J) uint8 answer matrix (0 = missing), how many
+    respondents gave each, and every respondent's pattern index.
+
+    A 5-item construct has at most 6^5 patterns whatever the sample size, so
+    the model is fitted on a few thousand weighted rows instead of millions.
+    """
+    base = len(LIKERT_LEVELS) + 1
+    n_items = X.shape[1]
+    if base ** n_items > DENSE_PATTERN_LIMIT:
+        patterns, inverse, counts = np.unique(X, axis=0, return_inverse=True, return_counts=True)
+        return patterns, counts, inverse.ravel()
+    powers = base ** np.arange(n_items, dtype=np.int64)
+    keys = X.astype(np.int64) @ powers
+    all_counts = np.bincount(keys, minlength=base ** n_items)
+    present = np.flatnonzero(all_counts)
+    lookup = np.full(len(all_counts), -1, dtype=np.int64)
+    lookup[present] = np.arange(len(present))
+    patterns = ((present[:, None] // powers) % base).astype(np.uint8)
+    return patterns, all_counts[present], lookup[keys]
+
+
+# ==================================================
+# GRADED RESPONSE MODEL
+# ==================================================
+def _quadrature():
+    theta = np.linspace(-THETA_RANGE, THETA_RANGE, QUADRATURE_POINTS)
+    prior = np.exp(-theta ** 2 / 2)
+    return theta, np.log(prior / prior.sum())
+
+
+def category_probabilities(a, c, theta):
+    """
+    P(answer = level k | θ) for every item, (J, Q, K), with its cumulative
+    curves S (J, Q, K+1): S_k = σ(a·θ + c_k) for the K-1 inner steps,
+    padded with 1 and 0, and P_k = S_k - S_{k+1}.
+    """
+    z = a[:, None, None] * theta[None, :, None] + c[:, None, :]
+    inner = 1 / (1 + np.exp(-z))
+    ones = np.ones(inner.shape[:2] + (1,))
+    S = np.concatenate([ones, inner, np.zeros_like(ones)], axis=2)
+    return S[:, :, :-1] - S[:, :, 1:], S
+
+
+def _posterior(patterns, counts, P, log_prior):
+    """Posterior weights of each pattern over the quadrature nodes, and the log-likelihood."""
+    log_P = np.log(np.clip(P, 1e-300, None))
+    log_like = np.zeros((len(patterns), P.shape[1]))
+    for j in range(patterns.shape[1]):
+        answered = patterns[:, j] != MISSING
+        log_like[answered] += log_P[j][:, patterns[answered, j] - LIKERT_LEVELS[0]].T
+    log_post = log_like + log_prior
+    peak = log_post.max(axis=1, keepdims=True)
+    post = np.exp(log_post - peak)
+    marginal = post.sum(axis=1, keepdims=True)
+    return post / marginal, float(counts @ (np.log(marginal[:, 0]) + peak[:, 0]))
+
+
+def _expected_counts(patterns, counts, post, n_levels):
+    """Expected respondents per (item, node, level): the E-step tables, (J, Q, K)."""
+    weighted = post * counts[:, None]
+    r = np.zeros((patterns.shape[1], post.shape[1], n_levels))
+    for j in range(patterns.shape[1]):
+        answered = patterns[:, j] != MISSING
+        onehot = np.eye(n_levels)[patterns[answered, j] - LIKERT_LEVELS[0]]
+        r[j] = weighted[answered].T @ onehot
+    return r
+
+
+def _fisher_step(a, c, r, theta):
+    """
+    One Fisher-scoring update of every item's (a, c) at once: gradient and
+    expected information of the expected complete-data log-likelihood,
+    solved as a batch of small linear systems.
+    """
+    P, S = category_probabilities(a, c, theta)
+    P = np.clip(P, 1e-12, None)
+    W = S * (1 - S)                                             # dS/dz, zero at the padding
+    J, Q, K = P.shape
+    D = np.zeros((J, Q, K, K))                                  # dP_k / d(a, c_1..c_K-1)
+    D[..., 0] = theta[None, :, None] * (W[:, :, :-1] - W[:, :, 1:])
+    for m in range(1, K):
+        D[:, :, m, m] += W[:, :, m]
+        D[:, :, m - 1, m] -= W[:, :, m]
+
+    params = np.column_stack([a, c])
+    prior = np.zeros_like(params)
+    prior[:, 0] = 1.0
+    grad = np.einsum('jqk,jqkp->jp', r / P, D) - PRIOR_PRECISION * (params - prior)
+    info = np.einsum('jq,jqkp,jqks->jps', r.sum(axis=2), D / P[..., None], D) + PRIOR_PRECISION * np.eye(K)
+    step = np.linalg.solve(info, grad[:, :, None])[:, :, 0]
+
+    # Halve the step of any item whose update would break a > 0 or c_1 > c_2 > ...
+    scale = np.ones(J)
+    for _ in range(20):
+        new = params + scale[:, None] * step
+        bad = (new[:, 0] <= 0.05) | (np.diff(new[:, 1:], axis=1) >= -1e-6).any(axis=1)
+        if not bad.any():
+            break
+        scale[bad] /= 2
+    new = params + scale[:, None] * step
+    return new[:, 0], new[:, 1:]
+
+
+def _initial_parameters(patterns, counts, n_levels):
+    """a = 1 and intercepts at the logits of each item's cumulative level shares."""
+    n_items = patterns.shape[1]
+    c = np.zeros((n_items, n_levels - 1))
+    for j in range(n_items):
+        answered = patterns[:, j] != MISSING
+        shares = np.bincount(patterns[answered, j] - LIKERT_LEVELS[0], weights=counts[answered], minlength=n_levels)
+        above = 1 - np.cumsum(shares)[:-1] / max(shares.sum(), 1)
+        above = np.clip(above, 0.01, 0.99)
+        c[j] = np.log(above / (1 - above)) - np.arange(n_levels - 1) * 1e-3
+    return np.ones(n_items), c
+
+
+def fit_grm(patterns, counts, items=None):
+    """
+    Samejima's graded response model by marginal maximum likelihood (EM).
+
+    patterns/counts: compressed answers (see compress_patterns). Each EM
+    iteration computes the posterior of every pattern over a fixed θ grid
+    (E-step) and takes Fisher-scoring steps for all items together (M-step),
+    so the cost depends on the number of distinct patterns, not respondents.
+    """
+    n_levels = len(LIKERT_LEVELS)
+    theta, log_prior = _quadrature()
+    a, c = _initial_parameters(patterns, counts, n_levels)
+    log_likelihood, converged = np.nan, False
+    for iteration in range(1, MAX_ITERATIONS + 1):
+        P, _ = category_probabilities(a, c, theta)
+        post, log_likelihood = _posterior(patterns, counts, P, log_prior)
+        r = _expected_counts(patterns, counts, post, n_levels)
+        old = np.column_stack([a, c])
+        for _ in range(NEWTON_STEPS):
+            a, c = _fisher_step(a, c, r, theta)
+        if np.abs(np.column_stack([a, c]) - old).max() < TOLERANCE:
+            converged = True
+            break
+    items = list(items) if items is not None else [f"item_{j + 1}" for j in range(patterns.shape[1])]
+    return {
+        'items': items,
+        'discrimination': a,
+        'intercepts': c,
+        'log_likelihood': log_likelihood,
+        'iterations': iteration,
+        'converged': converged,
+        'n_patterns': len(patterns),
+        'n_respondents': int(counts.sum())
+    }
+
+
+def item_parameters(model):
+    """Discrimination a and step difficulties b_k = -c_k / a, one row per item."""
+    b = -model['intercepts'] / model['discrimination'][:, None]
+    table = pd.DataFrame(b, index=model['items'], columns=[f"b{k}" for k in range(1, b.shape[1] + 1)])
+    table.insert(0, 'a', model['discrimination'])
+    return table
+
+
+def score_patterns(model, patterns):
+    """
+    Per pattern: EAP latent trait θ, its posterior SD, and the expected item
+    mean at θ (the test characteristic curve, on the 1–5 answer scale).
+    Patterns with no answers get NaN.
+    """
+    theta, log_prior = _quadrature()
+    P, _ = category_probabilities(model['discrimination'], model['intercepts'], theta)
+    post, _ = _posterior(patterns, np.ones(len(patterns)), P, log_prior)
+    eap = post @ theta
+    sd = np.sqrt(np.maximum(post @ theta ** 2 - eap ** 2, 0))
+
+    # Expected answer of every item on a fine θ grid, averaged and interpolated at the EAP
+    grid = np.linspace(-THETA_RANGE, THETA_RANGE, 401)
+    P_grid, _ = category_probabilities(model['discrimination'], model['intercepts'], grid)
+    curve = (P_grid @ np.asarray(LIKERT_LEVELS, dtype=np.float64)).mean(axis=0)
+    expected = np.interp(eap, grid, curve)
+
+    empty = (patterns == MISSING).all(axis=1)
+    for values in (eap, sd, expected):
+        values[empty] = np.nan
+    return eap, sd, expected
+
+
+def latent_scores(df, items):
+    """Fitted model plus θ, its SE and the expected-mean score of every respondent."""
+    X, _ = encode(df, items)
+    patterns, counts, inverse = compress_patterns(X)
+    model = fit_grm(patterns, counts, items)
+    eap, sd, expected = score_patterns(model, patterns)
+    return model, pd.DataFrame({'theta': eap[inverse], 'se': sd[inverse], 'score': expected[inverse]}, index=df.index)
+
+
+# ==================================================
+# SCORED DATASET
+# ==================================================
+_scored = {}
+
+
+@memoize
+def fitted_models(df):
+    """One graded response model per distinct composite item set of the shared frame."""
+    models, scores = {}, {}
+    for items in {tuple(items) for items in COMPOSITE_ITEMS.values()}:
+        if all(i in df.columns for i in items):
+            models[items], scores[items] = latent_scores(df, list(items))
+    return {'models': models, 'scores': scores}
+
+
+@memoize
+def scored_frame(df):
+    """
+    The shared frame with every composite column replaced by its IRT score
+    (expected item mean at the respondent's θ, so page axes keep the 1–5 scale).
+    """
+    fits = fitted_models(df)
+    columns = {
+        col: fits['scores'][tuple(items)]['score'].to_numpy()
+        for col, items in COMPOSITE_ITEMS.items() if tuple(items) in fits['scores'] and col in df.columns
+    }
+    scored = derived_frame(df, **columns)
+    _scored[id(scored)] = weakref.ref(scored)
+    return scored
+
+
+def is_scored(df):
+    ref = _scored.get(id(df))
+    return ref is not None and ref() is df
+
+
+def construct_models(df):
+    """Models of the questionnaire constructs, keyed by construct name."""
+    models = fitted_models(df)['models']
+    return {name: models[tuple(items)] for name, items in CONSTRUCTS.items() if tuple(items) in models}
+
+
+# ==================================================
+# STREAMLIT HELPERS
+# ==================================================
+def available():
+    # Scoring needs respondent rows, which the SQL backend does not load
+    return not sql_backend.enabled()
+
+
+def active():
+    return bool(st.session_state.get('irt_scores')) and available()
+
+
+def sidebar_toggle(df):
+    """Sidebar switch between mean composites and graded-response scores."""
+    if st.sidebar.toggle(
+        "📈 IRT construct scores",
+        key='irt_scores',
+        help="Replace the item-mean composites with graded response model scores "
+             "(each respondent's latent trait, shown as the expected item mean on the 1–5 scale)."
+    ):
+        models = fitted_models(df)['models'].values()
+        st.sidebar.caption(
+            f"Graded response models fitted on {sum(m['n_patterns'] for m in models):,} distinct "
+            f"answer patterns; {sum(not m['converged'] for m in models)} did not converge."
+        )
+
+
+def page_frame(df):
+    """The frame a page should read: IRT-scored when the toggle is on."""
+    return scored_frame(df) if active() else df
+
+
+if __name__ == "__main__":
+    # Benchmark: simulate graded responses for every construct and fit them back
+    parser = argparse.ArgumentParser(description="Benchmark the graded response model fit.")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    for name, items in CONSTRUCTS.items():
+        a = rng.uniform(0.8, 2.5, len(items))
+        b = np.sort(rng.normal(0, 1, (len(items), len(LIKERT_LEVELS) - 1)), axis=1)
+        theta = rng.normal(size=args.rows)
+        S = 1 / (1 + np.exp(-a[None, :, None] * (theta[:, None, None] - b[None])))
+        X = (rng.random((args.rows, len(items), 1)) < S).sum(axis=2).astype(np.uint8) + LIKERT_LEVELS[0]
+
+        start = time.perf_counter()
+        patterns, counts, inverse = compress_patterns(X)
+        model = fit_grm(patterns, counts, items)
+        eap, _, _ = score_patterns(model, patterns)
+        elapsed = time.perf_counter() - start
+        a_error = np.abs(model['discrimination'] - a).max()
+        r = np.corrcoef(eap[inverse], theta)[0, 1]
+        print(f"{name}: {elapsed:.2f}s, {len(patterns):,} patterns, {model['iterations']} iterations, "
+              f"max |a error| {a_error:.3f}, corr(θ̂, θ) {r:.3f}")
@@ -0,0 +1,214 @@
+import os
+import threading
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+
+import streamlit as st
+
+from result_cache import ResultCache
+
+MAX_WORKERS = int(os.environ.get("TIKTOK_JOB_WORKERS", os.cpu_count() or 1))
+
+# Finished job results kept per process (bytes)
+RESULT_BUDGET_BYTES = int(float(os.environ.get("TIKTOK_JOB_RESULTS_MB", "64")) * 2 ** 20)
+
+# Seconds between progress refreshes while a job runs
+POLL_INTERVAL = 1.0
+
+
+# ==================================================
+# JOBS
+# ==================================================
+class Job:
+    """
+    A unit of background work: independent chunk tasks run on the process
+    pool, then `combine` merges their results in the server process.
+    Progress is the fraction of finished chunks.
+    """
+
+    def __init__(self, key, futures, combine):
+        self.key = key
+        self.owners = set()
+        self._futures = futures
+        self._combine = combine
+        self._lock = threading.Lock()
+        self._has_result = False
+        self._result = None
+
+    @property
+    def total(self):
+        return len(self._futures)
+
+    @property
+    def completed(self):
+        return sum(f.done() for f in self._futures)
+
+    @property
+    def progress(self):
+        return self.completed / self.total if self.total else 1.0
+
+    def done(self):
+        return all(f.done() for f in self._futures)
+
+    def cancel(self):
+        """Drop chunks that have not started; running chunks finish and are discarded."""
+        for future in self._futures:
+            future.cancel()
+
+    def result(self):
+        with self._lock:
+            if not self._has_result:
+                self._result = self._combine([f.result() for f in self._futures])
+                self._has_result = True
+            return self._result
+
+
+class FinishedJob:
+    """A job whose result came from the completed-results cache."""
+
+    total = completed = 0
+    progress = 1.0
+
+    def __init__(self, key, result):
+        self.key = key
+        self._result = result
+
+    def done(self):
+        return True
+
+    def result(self):
+        return self._result
+
+
+# ==================================================
+# SCHEDULER (one per server process)
+# ==================================================
+class JobScheduler:
+    def __init__(self, max_workers=MAX_WORKERS, result_budget_bytes=RESULT_BUDGET_BYTES):
+        self.max_workers = max_workers
+        self._pool = None
+        # Re-entrant: a chunk that is already done runs its callback inside submit()
+        self._lock = threading.RLock()
+        self._jobs = {}      # key -> running Job
+        self._owned = {}     # owner -> key of the job it is waiting for
+        self.results = ResultCache(result_budget_bytes)
+
+    def _executor(self):
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._pool
+
+    def submit(self, key, tasks, combine, owner=None):
+        """
+        Job for `key`, starting it unless an identical job is running or finished.
+
+        tasks: list of (function, args) run on the process pool; combine receives
+        their results in order. A new job from the same `owner` (e.g. one session's
+        chart after a filter change) releases the owner's previous job, which is
+        cancelled once no other owner waits for it.
+        """
+        with self._lock:
+            job = self.lookup(key, owner)
+            if job is not None:
+                return job
+
+            pool = self._executor()
+            futures = [pool.submit(func, *args) for func, args in tasks]
+            job = self._jobs[key] = Job(key, futures, combine)
+            for future in futures:
+                future.add_done_callback(lambda _, job=job: self._maybe_finish(job))
+            if owner is not None:
+                job.owners.add(owner)
+                self._owned[owner] = key
+            if not futures:
+                self._finish(job)
+            return job
+
+    def lookup(self, key, owner=None):
+        """
+        Finished or running job for `key`, or None if it has to be submitted.
+
+        Lets callers skip building a job's inputs on reruns; `owner` is
+        registered (and its previous job released) exactly as in submit().
+        """
+        with self._lock:
+            if owner is not None and self._owned.get(owner, key) != key:
+                self._release(owner)
+
+            finished = self.results.get(key, _MISSING)
+            if finished is not _MISSING:
+                return FinishedJob(key, finished)
+
+            job = self._jobs.get(key)
+            if job is not None and owner is not None:
+                job.owners.add(owner)
+                self._owned[owner] = key
+            return job
+
+    def _release(self, owner):
+        key = self._owned.pop(owner)
+        job = self._jobs.get(key)
+        if job is None:
+            return
+        job.owners.discard(owner)
+        if not job.owners and not job.done():
+            job.cancel()
+            del self._jobs[key]
+
+    def _maybe_finish(self, job):
+        if job.done():
+            with self._lock:
+                if self._jobs.get(job.key) is job:
+                    self._finish(job)
+
+    def _finish(self, job):
+        # Only successful jobs are cached; failed or cancelled ones are retried on resubmit
+        del self._jobs[job.key]
+        try:
+            self.results.put(job.key, job.result())
+        except BaseException:
+            pass
+
+    def running(self):
+        with self._lock:
+            return len(self._jobs)
+
+
+_MISSING = object()
+scheduler = JobScheduler()
+
+
+def submit(key, tasks, combine, owner=None):
+    return scheduler.submit(key, tasks, combine, owner)
+
+
+def lookup(key, owner=None):
+    return scheduler.lookup(key, owner)
+
+
+# ==================================================
+# STREAMLIT HELPERS
+# ==================================================
+def session_owner(name):
+    """Owner token for one chart/table of the current session."""
+    session_id = st.session_state.setdefault('_job_session_id', uuid.uuid4().hex)
+    return session_id, name
+
+
+def poll(job, label="Computing..."):
+    """
+    Result of a finished job; otherwise show its progress, refresh it in a
+    fragment (so the rest of the page is not rerun) and return None. The page
+    reruns once when the job completes to fill in the results.
+    """
+    if job.done():
+        return job.result()
+
+    @st.fragment(run_every=POLL_INTERVAL)
+    def _progress():
+        if job.done():
+            st.rerun()
+        st.progress(job.progress, text=f"{label} ({job.completed}/{job.total} parts done)")
+
+    _progress()
+    return None
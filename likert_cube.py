@@ -0,0 +1,293 @@
+import copy
+import threading
+
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+import streamlit as st
+
+from constructs import DEMOGRAPHIC_COLUMNS, LIKERT_ITEMS, LIKERT_LEVELS
+from data_loader import likert_matrix
+
+LEVEL_LABELS = {
+    1: '1 - Strongly Disagree',
+    2: '2 - Disagree',
+    3: '3 - Neutral',
+    4: '4 - Agree',
+    5: '5 - Strongly Agree'
+}
+
+
+# ==================================================
+# RESPONSE-FREQUENCY TENSOR
+# ==================================================
+class LikertCube:
+    """
+    (segment × item × level) response counts.
+
+    Every Likert distribution chart reads from these counts, so charts never
+    melt the respondent-level frame. New responses are folded in with `add_frame`.
+    A weighted cube holds sums of respondent weights instead of counts.
+    """
+
+    def __init__(self, items=LIKERT_ITEMS, levels=LIKERT_LEVELS, segment_columns=DEMOGRAPHIC_COLUMNS,
+                 weighted=False):
+        self.items = list(items)
+        self.levels = list(levels)
+        self.segment_columns = list(segment_columns)
+        self.segments = [('All', 'All')]
+        self._segment_ids = {('All', 'All'): 0}
+        self.dtype = np.float64 if weighted else np.int64
+        self.counts = np.zeros((1, len(self.items), len(self.levels)), dtype=self.dtype)
+        self.n_rows = 0
+
+    @classmethod
+    def from_frame(cls, df, items=LIKERT_ITEMS, segment_columns=DEMOGRAPHIC_COLUMNS, weights=None):
+        cube = cls(items, segment_columns=[c for c in segment_columns if c in df.columns],
+                   weighted=weights is not None)
+        cube.add_frame(df, weights)
+        return cube
+
+    def _ids_for(self, df):
+        """Segment ids (n_rows, 1 + n_columns) for df, registering unseen segments."""
+        ids = [np.zeros(len(df), dtype=np.int64)]
+        for col in self.segment_columns:
+            codes, uniques = pd.factorize(df[col])
+            lookup = []
+            for value in uniques:
+                key = (col, value)
+                if key not in self._segment_ids:
+                    self._segment_ids[key] = len(self.segments)
+                    self.segments.append(key)
+                lookup.append(self._segment_ids[key])
+            lookup = np.array(lookup + [-1], dtype=np.int64)
+            ids.append(lookup[codes])  # code -1 (missing) picks the trailing -1
+        return np.column_stack(ids)
+
+    def add_frame(self, df, weights=None):
+        """Fold a batch of responses into the counts (O(batch), no re-scan)."""
+        ids = self._ids_for(df)
+        n_segments = len(self.segments)
+        if n_segments > self.counts.shape[0]:
+            grown = np.zeros((n_segments,) + self.counts.shape[1:], dtype=self.dtype)
+            grown[:self.counts.shape[0]] = self.counts
+            self.counts = grown
+        self.counts += self._bincount(likert_matrix(df, self.items), ids, n_segments, weights)
+        self.n_rows += len(df)
+
+    def copy(self):
+        """Independent cube with the same counts, for folding in new responses."""
+        cube = copy.copy(self)
+        cube.segments = list(self.segments)
+        cube._segment_ids = dict(self._segment_ids)
+        cube.counts = self.counts.copy()
+        return cube
+
+    def _bincount(self, X, ids, n_segments, weights=None):
+        n_items, n_levels = len(self.items), len(self.levels)
+        level_idx = X.astype(np.int64) - self.levels[0]
+        valid_level = (level_idx >= 0) & (level_idx < n_levels)
+        cell = np.arange(n_items) * n_levels + level_idx
+
+        size = n_segments * n_items * n_levels
+        counts = np.zeros(size, dtype=self.dtype)
+        if weights is not None:
+            weights = np.broadcast_to(np.asarray(weights, dtype=np.float64)[:, None], X.shape)
+        for g in range(ids.shape[1]):
+            seg = ids[:, g]
+            valid = valid_level & (seg >= 0)[:, None]
+            codes = (seg[:, None] * (n_items * n_levels) + cell)[valid]
+            counts += np.bincount(codes, weights=None if weights is None else weights[valid], minlength=size)
+        return counts.reshape(n_segments, n_items, n_levels)
+
+    def counts_for(self, items, selection=None):
+        """
+        (n_items, n_levels) counts for a selection of one grouping column.
+
+        selection: None for all respondents, or (column, values) where values
+        are the selected categories of that column (segments are disjoint, so
+        their counts add up).
+        """
+        item_idx = [self.items.index(item) for item in items]
+        if selection is None:
+            rows = [0]
+        else:
+            col, values = selection
+            rows = [self._segment_ids[(col, v)] for v in values if (col, v) in self._segment_ids]
+        return self.counts[rows][:, item_idx].sum(axis=0)
+
+    def long_counts(self, items, selection=None):
+        """Counts as a tidy (Item, Level, Count) frame for plotly express."""
+        counts = self.counts_for(items, selection)
+        return pd.DataFrame({
+            'Item': np.repeat(items, len(self.levels)),
+            'Level': np.tile(self.levels, len(items)),
+            'Count': counts.ravel()
+        })
+
+
+_cube_lock = threading.Lock()
+_newest_cube = (0, None)  # (rows counted, cube) for the newest shared frame
+
+
+def cached_cube(df):
+    """
+    Cube of the shared dataset (or a frame derived from it with the same
+    items). The shared frame only grows by appended responses, so rows added
+    since the previous call are folded into a copy of the previous cube.
+    """
+    global _newest_cube
+    with _cube_lock:
+        n_rows, cube = _newest_cube
+        if cube is None or n_rows > len(df):
+            import snapshot
+            cube = snapshot.artifact('cube')
+            if cube is None or cube.n_rows != len(df):
+                cube = LikertCube.from_frame(df)
+        elif n_rows < len(df):
+            cube = cube.copy()
+            cube.add_frame(df.iloc[n_rows:])
+        _newest_cube = (len(df), cube)
+        return cube
+
+
+# ==================================================
+# STATISTICS FROM COUNTS
+# ==================================================
+def quantile_from_counts(levels, counts, q):
+    """Linear-interpolated quantile (numpy 'linear' method) of values given their counts."""
+    cum = np.cumsum(counts)
+    n = cum[-1]
+    position = (n - 1) * q
+    lower, upper = int(np.floor(position)), int(np.ceil(position))
+    levels = np.asarray(levels, dtype=float)
+    lower_value = levels[np.searchsorted(cum, lower, side='right')]
+    upper_value = levels[np.searchsorted(cum, upper, side='right')]
+    return lower_value + (upper_value - lower_value) * (position - lower)
+
+
+def box_stats(levels, counts):
+    """Tukey box-plot statistics for a single item's level counts."""
+    levels = np.asarray(levels, dtype=float)
+    q1 = quantile_from_counts(levels, counts, 0.25)
+    median = quantile_from_counts(levels, counts, 0.5)
+    q3 = quantile_from_counts(levels, counts, 0.75)
+    iqr = q3 - q1
+    observed = counts > 0
+    within = (levels >= q1 - 1.5 * iqr) & (levels <= q3 + 1.5 * iqr)
+    inside = levels[observed & within]
+    return {
+        'q1': q1,
+        'median': median,
+        'q3': q3,
+        'lowerfence': inside.min(),
+        'upperfence': inside.max(),
+        'mean': (levels * counts).sum() / counts.sum(),
+        'outliers': observed & ~within  # levels answered outside the fences
+    }
+
+
+# ==================================================
+# FIGURES FROM COUNTS
+# ==================================================
+def stacked_bar_figure(cube, items, selection=None, title='Likert Scale Response Distribution'):
+    data = cube.long_counts(items, selection)
+    data['Agreement Level'] = data['Level'].astype(str)
+    return px.bar(
+        data,
+        x='Item',
+        y='Count',
+        color='Agreement Level',
+        barmode='stack',
+        title=title,
+        category_orders={'Agreement Level': [str(level) for level in cube.levels]}
+    )
+
+
+def overlay_histogram_figure(cube, items, selection=None, title='Distribution', color_label='Item'):
+    data = cube.long_counts(items, selection).rename(columns={'Item': color_label, 'Level': 'Score'})
+    fig = px.bar(data, x='Score', y='Count', color=color_label, barmode='overlay', title=title)
+    fig.update_traces(opacity=0.6)
+    return fig
+
+
+def diverging_bar_figure(cube, items, selection=None, title='Diverging Likert Responses'):
+    """Disagreement left of zero, agreement right of zero, neutral split across it."""
+    counts = cube.counts_for(items, selection).astype(float)
+    shares = counts / counts.sum(axis=1, keepdims=True) * 100
+    mid = len(cube.levels) // 2
+    colors = ['#b2182b', '#ef8a62', '#d9d9d9', '#67a9cf', '#2166ac']
+
+    # Relative bars stack negatives and positives outward in trace order,
+    # so each side starts from the neutral half nearest zero.
+    traces = [(mid, -shares[:, mid] / 2, True), (mid, shares[:, mid] / 2, False)]
+    traces += [(j, -shares[:, j], True) for j in range(mid - 1, -1, -1)]
+    traces += [(j, shares[:, j], True) for j in range(mid + 1, len(cube.levels))]
+
+    fig = go.Figure()
+    for j, x, show_legend in traces:
+        level = cube.levels[j]
+        fig.add_trace(go.Bar(
+            y=items,
+            x=x,
+            orientation='h',
+            name=LEVEL_LABELS.get(level, str(level)),
+            legendgroup=str(level),
+            showlegend=show_legend,
+            marker_color=colors[j % len(colors)],
+            customdata=shares[:, j],
+            hovertemplate='%{y}: %{customdata:.1f}%'
+        ))
+    fig.update_layout(
+        barmode='relative',
+        title=title,
+        xaxis_title='% of Respondents',
+        legend_traceorder='normal'
+    )
+    return fig
+
+
+def box_figure(cube, items, selection=None, title='Response Distribution', item_label='Item', points=None):
+    """
+    Box plots computed from level counts (no respondent-level rows needed).
+
+    points: None, 'outliers' or 'all' as in px.box. Answers are whole levels,
+    so the respondents at a level share one marker, sized by their share and
+    labelled with their count; outliers are the levels outside the fences.
+    """
+    counts = cube.counts_for(items, selection)
+    colors = px.colors.qualitative.Plotly
+    weighted = cube.dtype == np.float64
+    count_format, count_label = (',.1f', 'weighted respondents') if weighted else (',', 'respondents')
+    fig = go.Figure()
+    for i, (item, item_counts) in enumerate(zip(items, counts)):
+        if item_counts.sum() == 0:
+            continue
+        stats = box_stats(cube.levels, item_counts)
+        color = colors[i % len(colors)]
+        fig.add_trace(go.Box(
+            name=item,
+            q1=[stats['q1']],
+            median=[stats['median']],
+            q3=[stats['q3']],
+            lowerfence=[stats['lowerfence']],
+            upperfence=[stats['upperfence']],
+            mean=[stats['mean']],
+            x=[item],
+            marker_color=color
+        ))
+        shown = {None: np.zeros(len(cube.levels), dtype=bool), 'outliers': stats['outliers'],
+                 'all': item_counts > 0}[points]
+        if shown.any():
+            share = item_counts[shown] / item_counts.sum()
+            fig.add_trace(go.Scatter(
+                x=[item] * int(shown.sum()),
+                y=np.asarray(cube.levels)[shown],
+                mode='markers',
+                marker=dict(color=color, size=6 + 24 * np.sqrt(share)),
+                customdata=item_counts[shown],
+                hovertemplate=f"{item}<br>Response %{{y}}: %{{customdata:{count_format}}} {count_label}<extra></extra>"
+            ))
+    fig.update_layout(title=title, showlegend=False, xaxis_title=item_label, yaxis_title='Response')
+    return fig
@@ -0,0 +1,251 @@
+"""
+Concurrent-session load harness for the Streamlit dashboard.
+
+Starts one `streamlit run app.py` server (or targets a running one with
+--url) and drives simulated browser sessions against it over Streamlit's
+websocket protocol, all concurrently, so every session shares the server's
+caches and memory as real users do. Sessions follow realistic navigation
+scripts over every page in navigation.PAGES; the report gives rerun latency
+percentiles, throughput and the server's RSS per concurrency level.
+
+    python load_harness.py --concurrency 1 2 4 8 --steps 30
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+import urllib.request
+
+import numpy as np
+import websockets
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from streamlit.proto.WidgetStates_pb2 import WidgetState
+
+from navigation import PAGES
+
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.py")
+
+AGE_GROUPS = ["All", "17 - 21 years old", "22 - 26 years old", "27 - 31 years old"]
+GENDERS = ["Female (0)", "Male (1)"]
+VISUALIZATIONS = [
+    "Correlation Heatmap",
+    "Trust Bar Chart",
+    "Trust Box Plot",
+    "Motivation Bar Chart",
+    "Trust vs Motivation Scatter",
+    "Trust Radar Chart"
+]
+WIDGET_LABELS = {
+    "page": "Select Page:",
+    "age": "Select Age Group to filter Gender Distribution below:",
+    "gender": "Select Gender",
+    "viz": "Choose a visualization:"
+}
+
+
+# ==================================================
+# NAVIGATION SCRIPTS
+# ==================================================
+def navigation_script(n_steps, rng):
+    """
+    A plausible click path: switch pages, and on the Objective pages use
+    their controls (age selection, gender filter, visualization selector).
+    """
+    steps = []
+    page = "Main Page"
+    for _ in range(n_steps):
+        if page == "Objective 1 - Aina" and rng.random() < 0.6:
+            steps.append(("age", str(rng.choice(AGE_GROUPS))))
+        elif page == "Objective 3 - Nadia" and rng.random() < 0.7:
+            if rng.random() < 0.5:
+                genders = [g for g in GENDERS if rng.random() < 0.7] or GENDERS[:1]
+                steps.append(("gender", genders))
+            else:
+                steps.append(("viz", str(rng.choice(VISUALIZATIONS))))
+        else:
+            page = str(rng.choice(list(PAGES)))
+            steps.append(("page", page))
+    return steps
+
+
+# ==================================================
+# WEBSOCKET SESSION (one simulated browser tab)
+# ==================================================
+class Session:
+    """
+    Minimal Streamlit client: sends reruns with the widget states a browser
+    would send and reads the script's output until it finishes.
+    """
+
+    def __init__(self, websocket):
+        self.websocket = websocket
+        self.widgets = {}  # label -> (widget id, options) from the latest run
+        self.states = {}  # widget id -> WidgetState sent with every rerun
+        self.exceptions = 0
+
+    async def rerun(self):
+        """Run the script once; returns False if it raised or did not finish."""
+        msg = BackMsg()
+        msg.rerun_script.query_string = ""
+        msg.rerun_script.widget_states.widgets.extend(self.states.values())
+        await self.websocket.send(msg.SerializeToString())
+
+        self.widgets, self.exceptions = {}, 0
+        while True:
+            forward = ForwardMsg()
+            forward.ParseFromString(await self.websocket.recv())
+            kind = forward.WhichOneof('type')
+            if kind == 'script_finished':
+                return forward.script_finished == ForwardMsg.FINISHED_SUCCESSFULLY and not self.exceptions
+            if kind != 'delta' or forward.delta.WhichOneof('type') != 'new_element':
+                continue
+            element = forward.delta.new_element
+            element_type = element.WhichOneof('type')
+            if element_type == 'exception':
+                self.exceptions += 1
+            elif element_type in ('radio', 'selectbox', 'multiselect'):
+                widget = getattr(element, element_type)
+                self.widgets[widget.label] = (widget.id, list(widget.options))
+
+    def set_value(self, action, value):
+        """Record a widget interaction; raises KeyError if the widget is not on the page."""
+        widget_id, options = self.widgets[WIDGET_LABELS[action]]
+        state = WidgetState(id=widget_id)
+        if isinstance(value, list):
+            state.string_array_value.data[:] = [v for v in value if v in options]
+        else:
+            if value not in options:
+                raise KeyError(value)
+            state.string_value = value
+        self.states[widget_id] = state
+
+
+async def run_session(url, n_steps, seed):
+    """Open one session, follow a navigation script; return rerun latencies and errors."""
+    rng = np.random.default_rng(seed)
+    latencies, errors = [], 0
+    async with websockets.connect(url, subprotocols=["streamlit"], max_size=None) as websocket:
+        session = Session(websocket)
+        start = time.perf_counter()
+        errors += not await session.rerun()
+        latencies.append(time.perf_counter() - start)
+
+        for action, value in navigation_script(n_steps, rng):
+            try:
+                session.set_value(action, value)
+            except KeyError:
+                # The widget is not on the current page (e.g. after a failed rerun)
+                errors += 1
+                continue
+            start = time.perf_counter()
+            errors += not await session.rerun()
+            latencies.append(time.perf_counter() - start)
+    return latencies, errors
+
+
+# ==================================================
+# SERVER
+# ==================================================
+def start_server(port, timeout=120):
+    """Launch `streamlit run app.py` headless and wait until it is healthy."""
+    server = subprocess.Popen(
+        [sys.executable, "-m", "streamlit", "run", APP_PATH,
+         "--server.headless", "true",
+         "--server.port", str(port),
+         "--server.fileWatcherType", "none",
+         "--browser.gatherUsageStats", "false"],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL
+    )
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"streamlit exited with code {server.returncode}")
+        try:
+            with urllib.request.urlopen(f"http://localhost:{port}/_stcore/health", timeout=2):
+                return server
+        except OSError:
+            time.sleep(0.5)
+    server.terminate()
+    raise RuntimeError(f"streamlit did not become healthy within {timeout} s")
+
+
+def server_rss_mb(pid):
+    """Resident set size of the server process in MB, or None without /proc."""
+    if pid is None:
+        return None
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+# ==================================================
+# DRIVER
+# ==================================================
+async def _run_sessions(url, concurrency, n_steps, seed):
+    return await asyncio.gather(*(run_session(url, n_steps, seed + i) for i in range(concurrency)))
+
+
+def run_level(url, concurrency, n_steps, seed=0, pid=None):
+    start = time.perf_counter()
+    results = asyncio.run(_run_sessions(url, concurrency, n_steps, seed))
+    wall = time.perf_counter() - start
+
+    latencies = np.concatenate([r[0] for r in results]) * 1000
+    return {
+        'sessions': concurrency,
+        'reruns': int(latencies.size),
+        'errors': int(sum(r[1] for r in results)),
+        'p50_ms': float(np.percentile(latencies, 50)),
+        'p95_ms': float(np.percentile(latencies, 95)),
+        'p99_ms': float(np.percentile(latencies, 99)),
+        'throughput_rps': latencies.size / wall,
+        'server_rss_mb': server_rss_mb(pid)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 2, 4, 8],
+                        help="numbers of concurrent sessions to test")
+    parser.add_argument("--steps", type=int, default=30, help="navigation steps per session")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--port", type=int, default=8599, help="port for the server the harness starts")
+    parser.add_argument("--url", help="websocket of a running server, e.g. ws://host:8501/_stcore/stream")
+    parser.add_argument("--json", help="write the report to this file")
+    args = parser.parse_args()
+
+    server = None if args.url else start_server(args.port)
+    url = args.url or f"ws://localhost:{args.port}/_stcore/stream"
+    pid = server.pid if server else None
+    try:
+        print(f"{'sessions':>8} {'reruns':>6} {'errors':>6} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'rerun/s':>8} {'RSS MB':>8}")
+        report = []
+        for level in args.concurrency:
+            row = run_level(url, level, args.steps, args.seed, pid)
+            report.append(row)
+            rss = f"{row['server_rss_mb']:>8.0f}" if row['server_rss_mb'] is not None else f"{'n/a':>8}"
+            print(f"{row['sessions']:>8} {row['reruns']:>6} {row['errors']:>6} "
+                  f"{row['p50_ms']:>8.1f} {row['p95_ms']:>8.1f} {row['p99_ms']:>8.1f} "
+                  f"{row['throughput_rps']:>8.2f} {rss}")
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
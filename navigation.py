@@ -0,0 +1,21 @@
+# ==================================================
+# PAGE REGISTRY
+# ==================================================
+# Sidebar label -> module providing the page's app() function, in menu
+# order. app.py builds its navigation from this, and load_harness.py
+# visits every page listed here.
+PAGES = {
+    "Main Page": "main",
+    "Objective 1 - Aina": "Objective1_Aina",
+    "Objective 2 - Nurin": "Objective2_Nurin",
+    "Objective 3 - Nadia": "Objective3_Nadia",
+    "Objective 4 - Athirah": "Objective4_Athirah",
+    "Reliability Analysis": "reliability",
+    "Factor Analysis": "factor_analysis",
+    "Shopper Personas": "clustering",
+    "Driver Model": "driver_model",
+    "Path Model": "path_model"
+}
+
+# Pages whose figures all come from aggregates.py, which SQLite can serve
+SQL_PAGES = {"Main Page", "Objective 1 - Aina"}
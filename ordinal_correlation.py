@@ -0,0 +1,317 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+from scipy.stats import norm, t as t_dist
+
+from constructs import LIKERT_ITEMS, LIKERT_LEVELS
+
+METHODS = ['pearson', 'spearman', 'polychoric']
+
+# Rows one-hot encoded at once when accumulating the pair tables
+BLOCK_ROWS = 100_000
+
+# Above this many item pairs the polychoric fits are split across a process pool
+PARALLEL_PAIRS = 2000
+
+# Polychoric search range, golden-section steps and quadrature nodes
+RHO_BOUND = 0.999
+SEARCH_STEPS = 45
+QUADRATURE_NODES = 20
+
+# Stand-in for ±infinity as the outer thresholds (Φ(8) is 1 to double precision)
+OUTER_THRESHOLD = 8.0
+
+
+# ==================================================
+# LEVEL-COUNT TABLES
+# ==================================================
+def level_codes(view, columns):
+    """
+    (n_rows, n_columns) level index of every answer (-1 when missing) and
+    the sorted level values of each column. Likert items always use the
+    full 1–5 scale; other columns (e.g. composites) their observed values.
+    """
+    codes = np.empty((len(view), len(columns)), dtype=np.int64)
+    levels = []
+    for j, col in enumerate(columns):
+        values = view[col].to_numpy()
+        if values.dtype == np.uint8 and col in LIKERT_ITEMS:
+            # Imputed Likert columns: the level index is the answer minus 1
+            index = values.astype(np.int64) - LIKERT_LEVELS[0]
+            codes[:, j] = np.where(index < len(LIKERT_LEVELS), index, -1)
+            levels.append(np.asarray(LIKERT_LEVELS, dtype=np.float64))
+            continue
+        values = values.astype(np.float64)
+        present = np.isfinite(values)
+        col_levels = np.asarray(LIKERT_LEVELS, dtype=np.float64) if col in LIKERT_ITEMS else np.unique(values[present])
+        index = np.searchsorted(col_levels, values)
+        valid = present & (index < len(col_levels))
+        valid[valid] = col_levels[index[valid]] == values[valid]
+        codes[:, j] = np.where(valid, index, -1)
+        levels.append(col_levels)
+    return codes, levels
+
+
+def pair_tables(codes, n_levels, weights=None, block_rows=BLOCK_ROWS):
+    """
+    Joint level counts of every column pair, (m, m, L, L) with L the largest
+    level count (shorter scales are zero-padded).
+
+    All pairs come from one matrix product of the one-hot answers per row
+    block, O'·diag(w)·O, so a missing answer simply drops out of the tables
+    of its pairs (pairwise deletion). With weights the tables hold summed
+    weights, and a second table of summed squared weights is returned for
+    the effective sample sizes; otherwise that table is None.
+    """
+    n, m = codes.shape
+    L = max(n_levels)
+    width = m * L
+    tables = np.zeros((width, width))
+    squares = None if weights is None else np.zeros((width, width))
+    for start in range(0, n, block_rows):
+        block = codes[start:start + block_rows]
+        onehot = (block[:, :, None] == np.arange(L)).reshape(len(block), width)
+        onehot = onehot.astype(np.float32 if weights is None else np.float64)
+        if weights is None:
+            tables += onehot.T @ onehot
+        else:
+            w = np.asarray(weights[start:start + block_rows], dtype=np.float64)[:, None]
+            tables += onehot.T @ (onehot * w)
+            squares += onehot.T @ (onehot * w ** 2)
+    reshape = lambda T: T.reshape(m, L, m, L).transpose(0, 2, 1, 3)
+    return reshape(tables), None if squares is None else reshape(squares)
+
+
+def _pair_sizes(tables, squares):
+    """Respondents per pair, or Kish's effective sample size for weighted tables."""
+    totals = tables.sum(axis=(2, 3))
+    if squares is None:
+        return totals
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return totals ** 2 / squares.sum(axis=(2, 3))
+
+
+# ==================================================
+# PEARSON / SPEARMAN FROM COUNTS
+# ==================================================
+def _midranks(marginals):
+    """Average rank of every level given its counts (the per-item rank arrays)."""
+    return np.cumsum(marginals, axis=-1) - marginals / 2
+
+
+def _scored_correlation(tables, row_scores, col_scores):
+    """Pearson correlation of per-level scores, weighted by the pair tables."""
+    N = tables.sum(axis=(2, 3))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        p = tables / N[:, :, None, None]
+        rows, cols = p.sum(axis=3), p.sum(axis=2)
+        mu_r = (rows * row_scores).sum(axis=2, keepdims=True)
+        mu_c = (cols * col_scores).sum(axis=2, keepdims=True)
+        dr, dc = row_scores - mu_r, col_scores - mu_c
+        cov = np.einsum('ijab,ija,ijb->ij', p, dr, dc)
+        var_r = (rows * dr ** 2).sum(axis=2)
+        var_c = (cols * dc ** 2).sum(axis=2)
+        return cov / np.sqrt(var_r * var_c)
+
+
+def pearson_from_tables(tables, levels):
+    m, _, L, _ = tables.shape
+    values = np.array([np.pad(lv, (0, L - len(lv))) for lv in levels])
+    return _scored_correlation(tables, np.broadcast_to(values[:, None, :], (m, m, L)),
+                               np.broadcast_to(values[None, :, :], (m, m, L)))
+
+
+def spearman_from_tables(tables):
+    """
+    Spearman's rho of every pair: Pearson correlation of midranks, where the
+    midranks of each item's levels come from the pair's own marginal counts,
+    so ties are handled exactly without ranking any respondent rows.
+    """
+    return _scored_correlation(tables, _midranks(tables.sum(axis=3)), _midranks(tables.sum(axis=2)))
+
+
+# ==================================================
+# POLYCHORIC (two-step ML, batched over pairs)
+# ==================================================
+_NODES, _NODE_WEIGHTS = np.polynomial.legendre.leggauss(QUADRATURE_NODES)
+
+
+def _bivariate_cdf(h, k, rho):
+    """
+    Φ2(h, k; ρ) for arrays of thresholds h (P, A), k (P, B) and ρ (P,).
+
+    Uses Φ(h)Φ(k) + 1/2π ∫₀^asin ρ exp(-(h² - 2hk sin θ + k²) / 2cos²θ) dθ,
+    whose integrand is smooth even for |ρ| near 1, with Gauss–Legendre nodes.
+    """
+    theta_max = np.arcsin(rho)[:, None]
+    theta = theta_max * (_NODES + 1) / 2                       # (P, Q)
+    s, c2 = np.sin(theta), np.cos(theta) ** 2
+    h, k = h[:, :, None, None], k[:, None, :, None]
+    exponent = -(h ** 2 - 2 * h * k * s[:, None, None, :] + k ** 2) / (2 * c2[:, None, None, :])
+    integral = (np.exp(exponent) * _NODE_WEIGHTS).sum(axis=3) * theta_max[:, :, None] / 2
+    return norm.cdf(h[..., 0]) * norm.cdf(k[..., 0]) + integral / (2 * np.pi)
+
+
+def _thresholds(marginals):
+    """Normal cut points (P, L+1) of each pair's marginal level shares."""
+    cum = np.cumsum(marginals, axis=1) / marginals.sum(axis=1, keepdims=True)
+    inner = norm.ppf(np.clip(cum[:, :-1], 1e-12, 1 - 1e-12))
+    outer = np.full((len(marginals), 1), OUTER_THRESHOLD)
+    return np.hstack([-outer, np.clip(inner, -OUTER_THRESHOLD, OUTER_THRESHOLD), outer])
+
+
+def _log_likelihood(tables, a, b, rho):
+    F = _bivariate_cdf(a, b, rho)
+    cells = F[:, 1:, 1:] - F[:, :-1, 1:] - F[:, 1:, :-1] + F[:, :-1, :-1]
+    return (tables * np.log(np.clip(cells, 1e-300, None))).sum(axis=(1, 2))
+
+
+def _polychoric_batch(tables):
+    """
+    ρ and its standard error for a stack of (P, L, L) tables: thresholds from
+    the marginals, then a golden-section search of the likelihood run for all
+    pairs at once (one likelihood evaluation per step for the whole batch).
+    """
+    a, b = _thresholds(tables.sum(axis=2)), _thresholds(tables.sum(axis=1))
+    ratio = (np.sqrt(5) - 1) / 2
+    lo, hi = np.full(len(tables), -RHO_BOUND), np.full(len(tables), RHO_BOUND)
+    c, d = hi - ratio * (hi - lo), lo + ratio * (hi - lo)
+    fc, fd = _log_likelihood(tables, a, b, c), _log_likelihood(tables, a, b, d)
+    for _ in range(SEARCH_STEPS):
+        left = fc > fd  # the maximum lies in [lo, d]
+        lo, hi = np.where(left, lo, c), np.where(left, d, hi)
+        new = np.where(left, hi - ratio * (hi - lo), lo + ratio * (hi - lo))
+        f_new = _log_likelihood(tables, a, b, new)
+        c, d, fc, fd = (np.where(left, new, d), np.where(left, c, new),
+                        np.where(left, f_new, fd), np.where(left, fc, f_new))
+    rho = (lo + hi) / 2
+
+    # Standard error from the curvature of the log-likelihood at the estimate
+    step = 1e-4
+    r0 = np.clip(rho, -RHO_BOUND + step, RHO_BOUND - step)
+    curvature = (_log_likelihood(tables, a, b, r0 + step) - 2 * _log_likelihood(tables, a, b, r0)
+                 + _log_likelihood(tables, a, b, r0 - step)) / step ** 2
+    with np.errstate(invalid='ignore', divide='ignore'):
+        se = np.where(curvature < 0, 1 / np.sqrt(-curvature), np.nan)
+    return rho, se
+
+
+def polychoric_from_tables(tables, sizes=None, max_workers=None):
+    """
+    Polychoric correlation and standard error of every pair (upper triangle
+    fitted, mirrored). With `sizes` (effective sample sizes of weighted
+    tables) each table is rescaled to that many respondents first, so the
+    standard errors reflect the design effect.
+    """
+    m = tables.shape[0]
+    i, j = np.triu_indices(m, k=1)
+    batch = tables[i, j]
+    totals = batch.sum(axis=(1, 2))
+    if sizes is not None:
+        with np.errstate(invalid='ignore', divide='ignore'):
+            batch = batch * (sizes[i, j] / totals)[:, None, None]
+    fit = totals > 0
+
+    rho, se = np.full(len(i), np.nan), np.full(len(i), np.nan)
+    workers = max_workers or os.cpu_count() or 1
+    if fit.sum() < PARALLEL_PAIRS or workers == 1:
+        rho[fit], se[fit] = _polychoric_batch(batch[fit])
+    else:
+        chunks = np.array_split(np.flatnonzero(fit), workers)
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for idx, (r, s) in zip(chunks, pool.map(_polychoric_batch, [batch[idx] for idx in chunks])):
+                rho[idx], se[idx] = r, s
+
+    R, SE = np.eye(m), np.zeros((m, m))
+    R[i, j] = R[j, i] = rho
+    SE[i, j] = SE[j, i] = se
+    return R, SE
+
+
+# ==================================================
+# SIGNIFICANCE AND CONFIDENCE INTERVALS
+# ==================================================
+def significance(r, n, method, se=None, level=0.95):
+    """
+    Two-sided p-values and confidence limits for a correlation matrix.
+
+    Pearson and Spearman use the t test on n - 2 degrees of freedom and a
+    Fisher-z interval (Bonett–Wright standard error for Spearman); the
+    polychoric estimate uses a Wald test with its likelihood standard error.
+    """
+    z_crit = norm.ppf(0.5 + level / 2)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        if method == 'polychoric':
+            p = 2 * norm.sf(np.abs(r / se))
+            se_z = se / (1 - r ** 2)
+        else:
+            t = r * np.sqrt((n - 2) / (1 - r ** 2))
+            p = 2 * t_dist.sf(np.abs(t), np.maximum(n - 2, 1))
+            se_z = np.sqrt((1 + r ** 2 / 2 if method == 'spearman' else 1) / (n - 3))
+        z = np.arctanh(np.clip(r, -RHO_BOUND, RHO_BOUND))
+        lo, hi = np.tanh(z - z_crit * se_z), np.tanh(z + z_crit * se_z)
+    for matrix in (p, lo, hi):
+        np.fill_diagonal(matrix, np.nan)
+    return p, lo, hi
+
+
+def correlation_test(view, columns, method='spearman', weights=None, max_workers=None):
+    """
+    Correlation matrix of `columns` with p-values, confidence limits and the
+    (effective) number of respondents per pair, as DataFrames keyed
+    'r', 'p_value', 'ci_low', 'ci_high' and 'n'.
+    """
+    if method not in METHODS:
+        raise ValueError(f"Unknown correlation method '{method}' (choose from {METHODS})")
+    columns = list(columns)
+    codes, levels = level_codes(view, columns)
+    tables, squares = pair_tables(codes, [len(lv) for lv in levels], weights)
+    n = _pair_sizes(tables, squares)
+
+    se = None
+    if method == 'pearson':
+        r = pearson_from_tables(tables, levels)
+    elif method == 'spearman':
+        r = spearman_from_tables(tables)
+    else:
+        r, se = polychoric_from_tables(tables, None if squares is None else n, max_workers)
+    np.fill_diagonal(r, 1.0)
+    p, lo, hi = significance(r, n, method, se)
+
+    frame = lambda values: pd.DataFrame(values, index=columns, columns=columns)
+    return {'r': frame(r), 'p_value': frame(p), 'ci_low': frame(lo), 'ci_high': frame(hi), 'n': frame(n)}
+
+
+def pair_table(result):
+    """One row per column pair (upper triangle) of a correlation_test result."""
+    columns = list(result['r'].columns)
+    i, j = np.triu_indices(len(columns), k=1)
+    values = {key: result[key].to_numpy()[i, j] for key in ('r', 'ci_low', 'ci_high', 'p_value', 'n')}
+    return pd.DataFrame({
+        'Variable 1': np.asarray(columns)[i],
+        'Variable 2': np.asarray(columns)[j],
+        **values
+    })
+
+
+# ==================================================
+# STREAMLIT HELPERS
+# ==================================================
+def significance_table(test):
+    """Every item pair with its correlation, 95% CI and p-value."""
+    pairs = pair_table(test).sort_values('p_value')
+    st.dataframe(
+        pairs.rename(columns={'r': 'Correlation', 'ci_low': 'CI low', 'ci_high': 'CI high', 'p_value': 'p-value'}),
+        hide_index=True,
+        use_container_width=True,
+        column_config={
+            'Correlation': st.column_config.NumberColumn(format='%.3f'),
+            'CI low': st.column_config.NumberColumn(format='%.3f'),
+            'CI high': st.column_config.NumberColumn(format='%.3f'),
+            'p-value': st.column_config.NumberColumn(format='%.4f'),
+            'n': st.column_config.NumberColumn(format='%.0f')
+        }
+    )
@@ -0,0 +1,537 @@
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+import streamlit as st
+
+import job_scheduler
+from bootstrap import BLOCK_ELEMENTS, RESAMPLES_PER_TASK
+from constructs import CONSTRUCTS
+from data_loader import dataset_version, filtered_view, load_data
+from filters import sidebar_filters
+from imputation import encode
+from irt_model import compress_patterns
+from result_cache import memoize
+
+# Trust → Motivation → Impulse Buying, with the direct path kept for mediation
+MEDIATION_PATHS = (
+    ('Trust', 'Motivation'),
+    ('Motivation', 'ImpulseBuying'),
+    ('Trust', 'ImpulseBuying')
+)
+OUTCOME = 'ImpulseBuying'
+
+# Further direct drivers of impulse buying offered on the page (SL and PP by default)
+DEFAULT_DRIVERS = ['BrandDesign', 'Quality']
+
+CONSTRUCT_LABELS = {
+    'BrandDesign': 'Lifestyle (SL)',
+    'Quality': 'Presentation (PP)',
+    'ImpulseBuying': 'Impulse Buying'
+}
+
+MAX_ITERATIONS = 300
+TOLERANCE = 1e-7  # largest outer-weight change that ends the PLS iterations
+
+N_RESAMPLES = 2000
+MIN_RESPONDENTS = 10
+
+# Above this many distinct answer patterns the bootstrap draws groups of respondents
+MAX_UNITS = 4096
+
+# Half-width and half-height of the construct ellipses in the diagram (axis units)
+NODE_RADII = (0.32, 0.28)
+
+
+def label(construct):
+    return CONSTRUCT_LABELS.get(construct, construct)
+
+
+# ==================================================
+# MODEL SPECIFICATION
+# ==================================================
+def model_spec(paths):
+    """
+    Constructs (in questionnaire order), their items, the block index of
+    every item and the (m, m) path adjacency, adjacency[k, j] meaning k → j.
+    """
+    used = {c for path in paths for c in path}
+    constructs = [c for c in CONSTRUCTS if c in used]
+    position = {c: i for i, c in enumerate(constructs)}
+    items = [item for c in constructs for item in CONSTRUCTS[c]]
+    blocks = np.repeat(np.arange(len(constructs)), [len(CONSTRUCTS[c]) for c in constructs])
+    adjacency = np.zeros((len(constructs), len(constructs)), dtype=bool)
+    for source, target in paths:
+        adjacency[position[source], position[target]] = True
+    return constructs, items, blocks, adjacency
+
+
+def mediations(paths):
+    """(X, M, Y) triples where both X → M and M → Y are paths."""
+    return [(x, m, y) for x, m in paths for m2, y in paths if m2 == m and y != x]
+
+
+@memoize
+def model_patterns(df, filters, paths):
+    """
+    Distinct complete answer patterns of the model's items in the filtered
+    view, with how many respondents gave each. Every statistic below only
+    needs the Gram matrix of the items, which these weighted rows reproduce.
+    """
+    _, items, _, _ = model_spec(paths)
+    X, missing = encode(filtered_view(df, filters), items)
+    patterns, counts, _ = compress_patterns(X[~missing.any(axis=1)])
+    return patterns, counts
+
+
+# ==================================================
+# PLS ON ITEM GRAM MATRICES
+# ==================================================
+def moment_vectors(X):
+    """Per-row moments [1, x, x xᵀ] (n, 1 + p + p²); summed over rows they give n, the item sums and the Gram matrix."""
+    return np.column_stack([np.ones(len(X)), X, (X[:, :, None] * X[:, None, :]).reshape(len(X), -1)])
+
+
+def item_correlations(moments):
+    """Item correlation matrices (B, p, p) from summed moment vectors (B, 1 + p + p²)."""
+    moments = np.atleast_2d(moments)
+    # 1 + p + p² columns, so p is the integer part of the square root
+    n_items = int(np.sqrt(moments.shape[1]))
+    n = moments[:, 0]
+    mean = moments[:, 1:n_items + 1] / n[:, None]
+    gram = moments[:, n_items + 1:].reshape(-1, n_items, n_items)
+    cov = gram / n[:, None, None] - mean[:, :, None] * mean[:, None, :]
+    sd = np.sqrt(np.clip(np.diagonal(cov, axis1=1, axis2=2), 0, None))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return cov / (sd[:, :, None] * sd[:, None, :])
+
+
+def _solve(A, b):
+    # Pseudo-inverse keeps collinear predictors (e.g. in small resamples) finite
+    return (np.linalg.pinv(A) @ b[..., None])[..., 0]
+
+
+def _standardize(S, w, membership):
+    """Scale the outer weights to unit-variance construct scores; returns w, item-score and score correlations."""
+    W = w[:, :, None] * membership
+    T = S @ W
+    sd = np.sqrt(np.einsum('bpm,bpm->bm', W, T))
+    W = W / sd[:, None, :]
+    T = T / sd[:, None, :]
+    return (W * membership).sum(axis=2), T, W.transpose(0, 2, 1) @ T
+
+
+def _inner_weights(R, adjacency):
+    """Path weighting scheme: regression weights from predecessors, correlations to successors."""
+    E = np.zeros_like(R)
+    for j in range(len(adjacency)):
+        predecessors = np.flatnonzero(adjacency[:, j])
+        if len(predecessors):
+            E[:, j, predecessors] = _solve(R[:, predecessors][:, :, predecessors], R[:, predecessors, j])
+        successors = np.flatnonzero(adjacency[j])
+        E[:, j, successors] = R[:, j, successors]
+    return E
+
+
+def pls_batch(S, blocks, adjacency):
+    """
+    Reflective (mode A) PLS path model for a stack of item correlation
+    matrices S (B, p, p), all resamples iterated together.
+
+    Construct scores never materialise: with standardised items, the score
+    variances, item-score and score-score correlations are all quadratic
+    forms of S in the outer weights. Samples whose S is undefined (a
+    constant item) come back as NaN.
+    """
+    valid = np.isfinite(S).all(axis=(1, 2))
+    S = np.where(valid[:, None, None], S, np.eye(S.shape[1]))
+    membership = (blocks[:, None] == np.arange(len(adjacency))).astype(np.float64)
+
+    w = np.ones(S.shape[:2])
+    previous = None
+    for iteration in range(1, MAX_ITERATIONS + 1):
+        w, T, R = _standardize(S, w, membership)
+        if previous is not None and np.abs(w - previous).max() < TOLERANCE:
+            break
+        previous = w
+        w = ((T @ _inner_weights(R, adjacency).transpose(0, 2, 1)) * membership).sum(axis=2)
+
+    # Structural model: OLS of every endogenous construct on its predecessors
+    B, m = len(S), len(adjacency)
+    paths = np.zeros((B, m, m))
+    r2 = np.full((B, m), np.nan)
+    for j in range(m):
+        predecessors = np.flatnonzero(adjacency[:, j])
+        if len(predecessors):
+            coef = _solve(R[:, predecessors][:, :, predecessors], R[:, predecessors, j])
+            paths[:, predecessors, j] = coef
+            r2[:, j] = (coef * R[:, predecessors, j]).sum(axis=1)
+
+    # Total effects sum every route: B + B² + ... = (I - B)^-1 - I
+    total = np.linalg.inv(np.eye(m) - paths) - np.eye(m)
+
+    result = {
+        'weights': w,
+        'loadings': np.take_along_axis(T, blocks[None, :, None], axis=2)[:, :, 0],
+        'paths': paths,
+        'total': total,
+        'r2': r2,
+        'iterations': iteration
+    }
+    for key in ('weights', 'loadings', 'paths', 'total', 'r2'):
+        result[key][~valid] = np.nan
+    return result
+
+
+def _effects(result, positions, paths, triples):
+    """Path coefficients, then the indirect and total effect of every mediation, per sample (B, K)."""
+    columns = [result['paths'][:, positions[s], positions[t]] for s, t in paths]
+    for x, m, y in triples:
+        columns.append(result['paths'][:, positions[x], positions[m]] * result['paths'][:, positions[m], positions[y]])
+        columns.append(result['total'][:, positions[x], positions[y]])
+    return np.column_stack(columns)
+
+
+def effect_names(paths):
+    names = [f"{label(s)} → {label(t)}" for s, t in paths]
+    for x, m, y in mediations(paths):
+        names += [f"Indirect: {label(x)} → {label(m)} → {label(y)}", f"Total: {label(x)} → {label(y)}"]
+    return names
+
+
+# ==================================================
+# ESTIMATION AND BOOTSTRAP
+# ==================================================
+@memoize
+def fit_path_model(df, filters, paths):
+    """PLS estimates for the filtered respondents, as display-ready tables."""
+    patterns, counts = model_patterns(df, filters, paths)
+    constructs, items, blocks, adjacency = model_spec(paths)
+    if counts.sum() < MIN_RESPONDENTS:
+        return {'n': int(counts.sum())}
+
+    moments = counts @ moment_vectors(patterns.astype(np.float64))
+    result = pls_batch(item_correlations(moments), blocks, adjacency)
+    positions = {c: i for i, c in enumerate(constructs)}
+    loadings = result['loadings'][0]
+    measurement = pd.DataFrame({
+        'Construct': [label(constructs[b]) for b in blocks],
+        'Item': items,
+        'Outer Weight': result['weights'][0],
+        'Loading': loadings
+    })
+
+    # Average variance extracted and composite reliability from the loadings
+    quality = []
+    for j, construct in enumerate(constructs):
+        L = loadings[blocks == j]
+        quality.append({
+            'Construct': label(construct),
+            'Items': len(L),
+            'AVE': np.mean(L ** 2),
+            'Composite Reliability': L.sum() ** 2 / (L.sum() ** 2 + (1 - L ** 2).sum()),
+            'R²': result['r2'][0, j]
+        })
+
+    return {
+        'n': int(counts.sum()),
+        'constructs': constructs,
+        'effects': pd.Series(_effects(result, positions, paths, mediations(paths))[0], index=effect_names(paths)),
+        'r2': pd.Series(result['r2'][0], index=constructs),
+        'measurement': measurement,
+        'quality': pd.DataFrame(quality),
+        'iterations': result['iterations']
+    }
+
+
+def resampling_units(patterns, counts, max_units=MAX_UNITS, seed=0):
+    """
+    Moment vectors of the units a bootstrap resample draws, with their
+    selection probabilities and the number of draws per resample.
+
+    The units are normally the distinct answer patterns, so a resample is n
+    respondent draws and its Gram matrix one product with the pattern
+    moments. With more patterns than `max_units` (very large samples) the
+    respondents are shuffled into `max_units` equal groups whose summed
+    moments are drawn instead: the resampled sums keep the mean and
+    covariance of a respondent-level bootstrap, which is all the smooth PLS
+    estimates depend on asymptotically, at a cost independent of n.
+    """
+    n = int(counts.sum())
+    if len(patterns) <= max_units:
+        return moment_vectors(patterns.astype(np.float64)), counts / n, n
+
+    rows = np.repeat(np.arange(len(patterns)), counts)
+    np.random.default_rng(seed).shuffle(rows)
+    # Row i of the shuffled order joins group i % max_units; zero rows pad the last round
+    X = np.zeros((-(-n // max_units) * max_units, patterns.shape[1]))
+    X[:n] = patterns[rows]
+    groups = X.reshape(-1, max_units, X.shape[1]).transpose(1, 0, 2)
+    sizes = np.bincount(np.arange(n) % max_units, minlength=max_units)
+    gram = groups.transpose(0, 2, 1) @ groups
+    units = np.column_stack([sizes, groups.sum(axis=1), gram.reshape(max_units, -1)])
+    return units, np.full(max_units, 1 / max_units), max_units
+
+
+@memoize
+def model_units(df, filters, paths):
+    return resampling_units(*model_patterns(df, filters, paths))
+
+
+def bootstrap_chunk(units, probabilities, draws, paths, n_resamples, seed):
+    """Effects of `n_resamples` bootstrap resamples, each drawn as unit counts."""
+    rng = np.random.default_rng(seed)
+    constructs, _, blocks, adjacency = model_spec(paths)
+    positions = {c: i for i, c in enumerate(constructs)}
+    triples = mediations(paths)
+    block = max(1, BLOCK_ELEMENTS // max(units.shape))
+    out = []
+    for start in range(0, n_resamples, block):
+        size = min(block, n_resamples - start)
+        weights = rng.multinomial(draws, probabilities, size=size)
+        result = pls_batch(item_correlations(weights @ units), blocks, adjacency)
+        out.append(_effects(result, positions, paths, triples))
+    return np.concatenate(out)
+
+
+def bootstrap_tasks(units, probabilities, draws, paths, n_resamples=N_RESAMPLES, seed=0, per_task=RESAMPLES_PER_TASK):
+    """(function, args) tasks with independent random streams, for job_scheduler."""
+    sizes = [min(per_task, n_resamples - start) for start in range(0, n_resamples, per_task)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    return [
+        (bootstrap_chunk, (units, probabilities, draws, paths, size, child))
+        for size, child in zip(sizes, seeds)
+    ]
+
+
+def effect_intervals(estimates, replicates, level=0.95):
+    """Estimate, bootstrap SE, percentile interval and two-sided bootstrap p-value of every effect."""
+    replicates = np.concatenate(replicates)
+    tail = (1 - level) / 2 * 100
+    lower, upper = np.nanpercentile(replicates, [tail, 100 - tail], axis=0)
+    valid = np.isfinite(replicates).sum(axis=0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        below = (replicates <= 0).sum(axis=0) / valid
+        above = (replicates >= 0).sum(axis=0) / valid
+    return pd.DataFrame({
+        'Estimate': estimates.to_numpy(),
+        'Bootstrap SE': np.nanstd(replicates, axis=0, ddof=1),
+        f'{level:.0%} CI Lower': lower,
+        f'{level:.0%} CI Upper': upper,
+        'p-value': np.minimum(1, 2 * np.minimum(below, above))
+    }, index=estimates.index)
+
+
+def bootstrap_job(df, filters, paths, n_resamples=N_RESAMPLES):
+    """Background bootstrap of the path coefficients and mediation effects."""
+    key = ('path_model_bootstrap', dataset_version(df), filters, paths, n_resamples)
+    # A filter or driver change replaces this session's job and cancels the stale one
+    owner = job_scheduler.session_owner('path_model_bootstrap')
+    job = job_scheduler.lookup(key, owner)
+    if job is not None:
+        return job
+
+    estimates = fit_path_model(df, filters, paths)['effects']
+    return job_scheduler.submit(
+        key,
+        bootstrap_tasks(*model_units(df, filters, paths), paths, n_resamples),
+        lambda replicates: effect_intervals(estimates, replicates),
+        owner=owner
+    )
+
+
+# ==================================================
+# PATH DIAGRAM
+# ==================================================
+def _layout(paths):
+    """
+    Node positions: x is the longest chain of paths leading to the construct;
+    intermediate constructs (mediators) sit above the rest so no arrow crosses a node.
+    """
+    # Path order, so the mediation chain's source heads the first column
+    depth = {c: 0 for path in paths for c in path}
+    for _ in depth:
+        for source, target in paths:
+            depth[target] = max(depth[target], depth[source] + 1)
+    last = max(depth.values())
+    columns = {}
+    for c in depth:
+        columns.setdefault(depth[c], []).append(c)
+    top = max(len(columns.get(0, [])), len(columns.get(last, []))) / 2
+    position = {}
+    for x, column in columns.items():
+        offset = top + 0.5 if 0 < x < last else 0
+        for i, c in enumerate(column):
+            position[c] = (x, offset + (len(column) - 1) / 2 - i)
+    return position
+
+
+def _edge(start, end):
+    """Arrow endpoints where the straight line leaves the source and target ellipses."""
+    (x0, y0), (x1, y1) = start, end
+    dx, dy = x1 - x0, y1 - y0
+    t = 1 / np.hypot(dx / NODE_RADII[0], dy / NODE_RADII[1])
+    return (x0 + t * dx, y0 + t * dy), (x1 - t * dx, y1 - t * dy)
+
+
+def _stars(p):
+    return '***' if p < 0.001 else '**' if p < 0.01 else '*' if p < 0.05 else ''
+
+
+def path_diagram(model, paths, intervals=None):
+    """
+    Constructs as nodes (with R² for the endogenous ones) and paths as arrows
+    whose width follows |β|; with bootstrap results, non-significant paths
+    are greyed out and significant ones starred.
+    """
+    position = _layout(paths)
+    fig = go.Figure()
+
+    for (source, target), name in zip(paths, effect_names(paths)):
+        beta = model['effects'][name]
+        color = '#1f77b4' if beta >= 0 else '#d62728'
+        text = f"β = {beta:.2f}"
+        if intervals is not None:
+            p = intervals.loc[name, 'p-value']
+            text += _stars(p)
+            if not p < 0.05:
+                color = '#bbbbbb'
+        (x0, y0), (x1, y1) = _edge(position[source], position[target])
+        fig.add_annotation(
+            x=x1, y=y1, ax=x0, ay=y0, xref='x', yref='y', axref='x', ayref='y',
+            showarrow=True, arrowhead=2, arrowsize=1, arrowwidth=1 + 6 * min(abs(beta), 1),
+            arrowcolor=color, text=''
+        )
+        fig.add_annotation(
+            x=(x0 + x1) / 2, y=(y0 + y1) / 2, text=text, showarrow=False,
+            font=dict(size=13, color=color), bgcolor='rgba(255,255,255,0.85)'
+        )
+
+    for construct, (x, y) in position.items():
+        r2 = model['r2'][construct]
+        text = f"<b>{label(construct)}</b>" + (f"<br>R² = {r2:.2f}" if np.isfinite(r2) else '')
+        fig.add_shape(
+            type='circle', x0=x - NODE_RADII[0], x1=x + NODE_RADII[0], y0=y - NODE_RADII[1], y1=y + NODE_RADII[1],
+            line=dict(color='#444444'), fillcolor='#f3f6fa', layer='below'
+        )
+        fig.add_annotation(x=x, y=y, text=text, showarrow=False, font=dict(size=13))
+
+    xs = [x for x, _ in position.values()]
+    ys = [y for _, y in position.values()]
+    fig.update_xaxes(visible=False, range=[min(xs) - 0.5, max(xs) + 0.5])
+    fig.update_yaxes(visible=False, range=[min(ys) - 0.5, max(ys) + 0.5])
+    fig.update_layout(
+        title='PLS Path Model (standardised coefficients)',
+        height=520,
+        plot_bgcolor='white',
+        margin=dict(l=20, r=20, t=60, b=20)
+    )
+    return fig
+
+
+def mediation_type(direct, indirect):
+    """Classification of Zhao, Lynch and Chen (2010) from the bootstrap tests."""
+    direct_sig, indirect_sig = direct['p-value'] < 0.05, indirect['p-value'] < 0.05
+    if indirect_sig and not direct_sig:
+        return "full (indirect-only) mediation"
+    if indirect_sig:
+        same_sign = np.sign(direct['Estimate']) == np.sign(indirect['Estimate'])
+        return "complementary partial mediation" if same_sign else "competitive partial mediation"
+    return "no mediation (direct-only effect)" if direct_sig else "no effect"
+
+
+# ==================================================
+# PATH MODEL PAGE
+# ==================================================
+def app():
+    st.header("🕸️ Path Model: Trust → Motivation → Impulse Buying (PLS-SEM)")
+
+    st.subheader("Problem Statement")
+    st.write("""
+    Objectives 3 and 4 suggest that trust supports motivation and that shopping lifestyle
+    and product presentation drive impulse buying, but they only compare constructs in pairs.
+    This page estimates all the relationships together as a partial least squares path model
+    over the construct item blocks and bootstraps whether trust works on impulse buying
+    through motivation.
+    """)
+
+    df = load_data()
+    items = [item for path in MEDIATION_PATHS for c in path for item in CONSTRUCTS[c]]
+    missing_cols = sorted({c for c in items if c not in df.columns})
+    if missing_cols:
+        st.warning(f"Missing Likert columns for the path model: {missing_cols}")
+        return
+
+    filters = sidebar_filters(df, key="path_filters")
+    options = [c for c in CONSTRUCTS if c not in {c for path in MEDIATION_PATHS for c in path}]
+    drivers = st.multiselect(
+        "Other drivers of impulse buying:",
+        options,
+        default=[c for c in DEFAULT_DRIVERS if c in options],
+        format_func=label
+    )
+    paths = MEDIATION_PATHS + tuple((c, OUTCOME) for c in options if c in drivers)
+
+    model = fit_path_model(df, filters, paths)
+    if model['n'] < MIN_RESPONDENTS:
+        st.warning(f"At least {MIN_RESPONDENTS} respondents with complete answers are needed; the selection has {model['n']}.")
+        return
+
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Respondents", f"{model['n']:,}")
+    col2.metric("R² Motivation", f"{model['r2']['Motivation']:.2f}")
+    col3.metric("R² Impulse Buying", f"{model['r2'][OUTCOME]:.2f}")
+
+    # ==================================================
+    # 1. PATH DIAGRAM
+    # ==================================================
+    st.markdown("### 1️⃣ Path Diagram")
+    intervals = job_scheduler.poll(bootstrap_job(df, filters, paths), "Bootstrapping...")
+    st.plotly_chart(path_diagram(model, paths, intervals), use_container_width=True)
+    if intervals is None:
+        st.caption("Significance is added once the bootstrap finishes.")
+    else:
+        st.caption(
+            f"Percentile tests from {N_RESAMPLES:,} bootstrap resamples: * p < 0.05, ** p < 0.01, *** p < 0.001; "
+            "grey paths are not significant."
+        )
+
+    # ==================================================
+    # 2. MEDIATION
+    # ==================================================
+    st.markdown("### 2️⃣ Does Motivation Mediate Trust → Impulse Buying?")
+    x, m, y = mediations(MEDIATION_PATHS)[0]
+    direct = f"{label(x)} → {label(y)}"
+    indirect = f"Indirect: {label(x)} → {label(m)} → {label(y)}"
+    total = f"Total: {label(x)} → {label(y)}"
+
+    effects = model['effects']
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Direct Effect", f"{effects[direct]:.3f}")
+    col2.metric("Indirect Effect", f"{effects[indirect]:.3f}")
+    col3.metric("Total Effect", f"{effects[total]:.3f}")
+
+    if intervals is not None:
+        st.dataframe(intervals.loc[[direct, indirect, total]].round(3), use_container_width=True)
+        interpretation = (
+            f"**Interpretation:** 🔗 The bootstrap points to "
+            f"**{mediation_type(intervals.loc[direct], intervals.loc[indirect])}**"
+        )
+        # The variance accounted for is only a share when both routes point the same way
+        if effects[direct] * effects[indirect] >= 0 and effects[total]:
+            interpretation += f"; the route through motivation carries {effects[indirect] / effects[total]:.0%} of trust's total effect (VAF)"
+        st.info(interpretation + ".")
+
+    with st.expander("📌 All Path Coefficients and Effects"):
+        table = intervals if intervals is not None else effects.to_frame('Estimate')
+        st.dataframe(table.round(3), use_container_width=True)
+
+    # ==================================================
+    # 3. MEASUREMENT MODEL
+    # ==================================================
+    with st.expander("📏 Measurement Model"):
+        st.dataframe(model['quality'].round(3), use_container_width=True)
+        st.dataframe(model['measurement'].round(3), use_container_width=True)
+        st.caption(
+            f"Reflective (mode A) blocks with the path weighting scheme, converged in {model['iterations']} iterations. "
+            "Loadings above 0.7, AVE above 0.5 and composite reliability above 0.7 support the measurement."
+        )
@@ -0,0 +1,147 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+# Above this many permutations the work is split across a process pool
+PARALLEL_THRESHOLD = 20000
+
+# Label-matrix cells materialised per block; the permutations per block
+# shrink as the respondent count grows, so memory stays bounded
+BLOCK_ELEMENTS = 5_000_000
+
+# Permutations per task when the work is run as a background job
+PERMUTATIONS_PER_TASK = 2500
+
+
+# ==================================================
+# CORE ENGINE
+# ==================================================
+def _count_extreme_differences(values, labels, observed, n_permutations, seed, block_size=None):
+    """Count permutations whose |mean difference| reaches the observed one, per column."""
+    rng = np.random.default_rng(seed)
+    n_rows = labels.shape[0]
+    if block_size is None:
+        block_size = max(1, BLOCK_ELEMENTS // n_rows)
+    n_group = labels.sum()
+    n_rest = n_rows - n_group
+    column_totals = values.sum(axis=0)
+    threshold = np.abs(observed) - 1e-12
+
+    exceed = np.zeros(values.shape[1], dtype=np.int64)
+    done = 0
+    while done < n_permutations:
+        size = min(block_size, n_permutations - done)
+        # Shuffled label matrix: one permutation of the labels per row
+        shuffled = rng.permuted(np.broadcast_to(labels, (size, n_rows)), axis=1).astype(values.dtype)
+
+        group_sums = shuffled @ values
+        diffs = group_sums / n_group - (column_totals - group_sums) / n_rest
+        exceed += (np.abs(diffs) >= threshold).sum(axis=0)
+        done += size
+    return exceed
+
+
+def _run_chunk(args):
+    return _count_extreme_differences(*args)
+
+
+def fdr_bh(p_values):
+    """Benjamini–Hochberg adjusted p-values (q-values)."""
+    p_values = np.asarray(p_values, dtype=float)
+    n = p_values.size
+    if n == 0:
+        return p_values
+    order = np.argsort(p_values)
+    ranked = p_values[order] * n / np.arange(1, n + 1)
+    ranked = np.minimum.accumulate(ranked[::-1])[::-1]
+    q_values = np.empty(n)
+    q_values[order] = np.clip(ranked, 0, 1)
+    return q_values
+
+
+def _prepare(values, labels):
+    values = np.asarray(values, dtype=np.float64)
+    labels = np.asarray(labels, dtype=bool)
+    n_group = labels.sum()
+    if n_group == 0 or n_group == labels.size:
+        raise ValueError("Both groups need at least one respondent.")
+    observed = values[labels].mean(axis=0) - values[~labels].mean(axis=0)
+    return values, labels, observed
+
+
+def _chunk_tasks(values, labels, observed, n_permutations, seed, block_size, n_chunks):
+    # Independent random streams per chunk keep the result reproducible
+    chunks = np.array_split(np.arange(n_permutations), n_chunks)
+    seeds = np.random.SeedSequence(seed).spawn(len(chunks))
+    return [
+        (values, labels, observed, len(chunk), chunk_seed, block_size)
+        for chunk, chunk_seed in zip(chunks, seeds) if len(chunk)
+    ]
+
+
+def permutation_tasks(values, labels, n_permutations=5000, seed=0,
+                      block_size=None, per_task=PERMUTATIONS_PER_TASK):
+    """
+    The permutation test as (function, args) tasks for job_scheduler.
+
+    Returns (observed differences, tasks); the p-values are
+    (sum of task results + 1) / (n_permutations + 1).
+    """
+    values, labels, observed = _prepare(values, labels)
+    n_chunks = max(1, -(-n_permutations // per_task))
+    tasks = _chunk_tasks(values, labels, observed, n_permutations, seed, block_size, n_chunks)
+    return observed, [(_run_chunk, (task,)) for task in tasks]
+
+
+def permutation_test(values, labels, n_permutations=5000, seed=0,
+                     block_size=None, max_workers=None):
+    """
+    Two-sided permutation test of the group mean difference for every column at once.
+
+    values: (n_rows, n_columns) numeric matrix; labels: boolean group membership.
+    Returns (observed differences, p-values).
+    """
+    values, labels, observed = _prepare(values, labels)
+
+    workers = max_workers or os.cpu_count() or 1
+    if n_permutations < PARALLEL_THRESHOLD or workers == 1:
+        exceed = _count_extreme_differences(
+            values, labels, observed, n_permutations, seed, block_size
+        )
+    else:
+        tasks = _chunk_tasks(values, labels, observed, n_permutations, seed, block_size, workers)
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            exceed = sum(pool.map(_run_chunk, tasks))
+
+    p_values = (exceed + 1) / (n_permutations + 1)
+    return observed, p_values
+
+
+# ==================================================
+# DATAFRAME WRAPPER
+# ==================================================
+def group_difference_table(df, columns, groups, group_value,
+                           n_permutations=5000, alpha=0.05, seed=0):
+    """Permutation p-values with FDR correction for `group_value` vs the rest of `groups`."""
+    labels = np.asarray(groups) == group_value
+    values = df[columns].to_numpy(dtype=np.float64)
+
+    observed, p_values = permutation_test(values, labels, n_permutations, seed)
+    return difference_table(columns, values, labels, group_value, observed, p_values, alpha)
+
+
+def difference_table(columns, values, labels, group_value, observed, p_values, alpha=0.05):
+    """Group means, differences, p-values and BH q-values as a results table."""
+    q_values = fdr_bh(p_values)
+
+    return pd.DataFrame({
+        'Variable': columns,
+        f'Mean ({group_value})': values[labels].mean(axis=0),
+        'Mean (Other)': values[~labels].mean(axis=0),
+        'Difference': observed,
+        'p-value': p_values,
+        'q-value (FDR)': q_values,
+        'Significant': q_values < alpha
+    })
@@ -0,0 +1,258 @@
+import argparse
+import os
+import sys
+import threading
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from data_loader import filtered_view
+from result_cache import memoize
+
+# Engine for page aggregations on the in-memory dataset: "pandas" (default) or
+# "polars" (multi-threaded, columnar; falls back to pandas if polars is missing)
+BACKEND = os.environ.get("TIKTOK_COMPUTE_BACKEND", "pandas").lower()
+
+
+# ==================================================
+# PANDAS (reference implementation)
+# ==================================================
+class PandasBackend:
+    """
+    Backend-neutral query operations. Every backend takes the pandas frame
+    plus a filter signature of (column, allowed values) pairs and returns
+    pandas results, so pages do not depend on the engine.
+    """
+
+    name = 'pandas'
+
+    def filter(self, df, filters=(), columns=None):
+        return filtered_view(df, filters, columns)
+
+    def count(self, df, filters=()):
+        return len(self.filter(df, filters))
+
+    def value_counts(self, df, column, filters=()):
+        return self.filter(df, filters)[column].value_counts()
+
+    def means(self, df, columns, filters=()):
+        return self.filter(df, filters)[list(columns)].mean()
+
+    def group_aggregate(self, df, by, columns, agg='mean', filters=()):
+        """One row per value of `by` (sorted), one column per aggregated column."""
+        return self.filter(df, filters).groupby(by)[list(columns)].agg(agg).sort_index()
+
+    def crosstab(self, df, row_col, col_col, filters=()):
+        view = self.filter(df, filters)
+        return pd.crosstab(view[row_col], view[col_col])
+
+    def histogram(self, df, column, bins=10, value_range=None, filters=()):
+        """(counts, edges) with numpy.histogram's binning (last bin closed)."""
+        values = self.filter(df, filters)[column].to_numpy(dtype=np.float64)
+        values = values[~np.isnan(values)]
+        return np.histogram(values, bins=bins, range=value_range)
+
+    def correlation(self, df, columns, filters=()):
+        return self.filter(df, filters)[list(columns)].corr()
+
+
+# ==================================================
+# POLARS (multi-threaded columnar engine)
+# ==================================================
+@memoize
+def _polars_frame(df):
+    # Converted once per dataset version; the shared frame never changes in place
+    import polars as pl
+    return pl.from_pandas(df)
+
+
+class PolarsBackend(PandasBackend):
+    """Same operations evaluated lazily by Polars on all cores."""
+
+    name = 'polars'
+
+    def __init__(self):
+        import polars as pl
+        self.pl = pl
+
+    def _lazy(self, df, filters=()):
+        pl = self.pl
+        frame = _polars_frame(df).lazy()
+        for col, values in filters:
+            frame = frame.filter(pl.col(col).cast(pl.String).is_in([str(v) for v in values]))
+        return frame
+
+    def _collect(self, frame):
+        return frame.collect().to_pandas()
+
+    def count(self, df, filters=()):
+        return int(self._lazy(df, filters).select(self.pl.len()).collect().item())
+
+    def value_counts(self, df, column, filters=()):
+        pl = self.pl
+        counts = self._collect(
+            self._lazy(df, filters)
+            .filter(pl.col(column).is_not_null())
+            .group_by(column)
+            .agg(pl.len().alias('count'))
+            .sort(['count', column], descending=[True, False])
+        )
+        counts = counts.set_index(column)['count'].astype('int64')
+        if isinstance(df[column].dtype, pd.CategoricalDtype):
+            # Like pandas, list unused categories with a zero count
+            missing = [c for c in df[column].cat.categories if c not in counts.index]
+            counts = counts.reindex(list(counts.index) + missing, fill_value=0)
+        return counts
+
+    def means(self, df, columns, filters=()):
+        pl = self.pl
+        row = self._collect(self._lazy(df, filters).select([pl.col(c).mean() for c in columns]))
+        return row.iloc[0].astype(float)
+
+    def group_aggregate(self, df, by, columns, agg='mean', filters=()):
+        pl = self.pl
+        result = self._collect(
+            self._lazy(df, filters)
+            .filter(pl.col(by).is_not_null())
+            .group_by(by)
+            .agg([getattr(pl.col(c), agg)() for c in columns])
+        )
+        return result.set_index(by).sort_index()
+
+    def crosstab(self, df, row_col, col_col, filters=()):
+        pl = self.pl
+        long = self._collect(
+            self._lazy(df, filters)
+            .filter(pl.col(row_col).is_not_null() & pl.col(col_col).is_not_null())
+            .group_by([row_col, col_col])
+            .agg(pl.len().alias('count'))
+        )
+        table = long.pivot(index=row_col, columns=col_col, values='count').fillna(0).astype(int)
+        return table.sort_index().sort_index(axis=1)
+
+    def histogram(self, df, column, bins=10, value_range=None, filters=()):
+        pl = self.pl
+        values = self._lazy(df, filters).select(pl.col(column).cast(pl.Float64)).drop_nulls().drop_nans()
+        if value_range is None:
+            lo, hi = values.select(pl.col(column).min().alias('lo'), pl.col(column).max().alias('hi')).collect().row(0)
+            lo, hi = (0.0, 1.0) if lo is None else (lo, hi)
+        else:
+            lo, hi = value_range
+        edges = np.histogram_bin_edges([], bins=bins, range=(lo, hi) if lo != hi else (lo - 0.5, hi + 0.5))
+        # Bin = number of inner edges at or below the value, so edge values land
+        # in the same bin as numpy (right-open bins, last bin closed)
+        col = pl.col(column)
+        codes = (
+            values.filter(col.is_between(edges[0], edges[-1]))
+            .select(pl.sum_horizontal([(col >= edge).cast(pl.Int64) for edge in edges[1:-1]]).alias('bin'))
+            .group_by('bin').agg(pl.len().alias('n'))
+            .collect()
+        )
+        counts = np.zeros(bins, dtype=np.int64)
+        counts[codes['bin'].to_numpy()] = codes['n'].to_numpy()
+        return counts, edges
+
+    def correlation(self, df, columns, filters=()):
+        columns = list(columns)
+        corr = self._lazy(df, filters).select(columns).collect().corr().to_pandas()
+        corr.index = columns
+        return corr
+
+
+# ==================================================
+# SELECTION BY CONFIGURATION
+# ==================================================
+BACKENDS = {'pandas': PandasBackend, 'polars': PolarsBackend}
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_backend(name=None):
+    """Configured backend; falls back to pandas when the engine is not installed."""
+    global _backend
+    if name is not None:
+        return BACKENDS[name]()
+    with _backend_lock:
+        if _backend is None:
+            try:
+                _backend = BACKENDS[BACKEND]()
+            except (ImportError, KeyError):
+                warnings.warn(f"Compute backend '{BACKEND}' unavailable; using pandas.", RuntimeWarning)
+                _backend = PandasBackend()
+    return _backend
+
+
+# ==================================================
+# PARITY CHECK
+# ==================================================
+def _same(a, b, tolerance):
+    if isinstance(a, tuple):
+        return all(_same(x, y, tolerance) for x, y in zip(a, b))
+    if isinstance(a, (pd.Series, pd.DataFrame)):
+        a = a.rename(index=str).sort_index()
+        b = b.rename(index=str).sort_index()
+        if isinstance(a, pd.DataFrame):
+            a = a.rename(columns=str).sort_index(axis=1)
+            b = b.rename(columns=str).sort_index(axis=1)
+            if list(a.columns) != list(b.columns):
+                return False
+        if list(a.index) != list(b.index):
+            return False
+        a, b = a.to_numpy(dtype=float), b.to_numpy(dtype=float)
+    return np.allclose(a, b, rtol=tolerance, atol=tolerance, equal_nan=True)
+
+
+def parity_queries(df):
+    """(description, method name, args) covering every operation under several filters."""
+    from constructs import CONSTRUCT_SCORES, LIKERT_ITEMS
+    signatures = [()]
+    for col in ['gender', 'age', 'monthly_income']:
+        values = sorted(df[col].dropna().unique().tolist())
+        signatures.append(((col, tuple(values[:1])),))
+    signatures.append((('gender', tuple(sorted(df['gender'].dropna().unique())[-1:])),
+                       ('monthly_income', tuple(sorted(df['monthly_income'].dropna().unique())[:2]))))
+
+    queries = []
+    for filters in signatures:
+        queries += [
+            (f"count {filters}", 'count', (filters,)),
+            (f"value_counts faculty {filters}", 'value_counts', ('faculty', filters)),
+            (f"means {filters}", 'means', (CONSTRUCT_SCORES, filters)),
+            (f"group mean by age {filters}", 'group_aggregate', ('age', CONSTRUCT_SCORES, 'mean', filters)),
+            (f"group max by income {filters}", 'group_aggregate', ('monthly_income', LIKERT_ITEMS[:5], 'max', filters)),
+            (f"crosstab age x gender {filters}", 'crosstab', ('age', 'gender', filters)),
+            (f"histogram OIB_score {filters}", 'histogram', ('OIB_score', 8, (1, 5), filters)),
+            (f"histogram Trust auto range {filters}", 'histogram', ('Trust', 5, None, filters)),
+            (f"correlation {filters}", 'correlation', (CONSTRUCT_SCORES, filters)),
+        ]
+    return queries
+
+
+def check_parity(df, backend='polars', reference='pandas', tolerance=1e-9):
+    """Run every parity query on both backends; returns the descriptions that differ."""
+    left, right = get_backend(reference), get_backend(backend)
+    mismatches = []
+    for description, method, args in parity_queries(df):
+        expected = getattr(left, method)(df, *args)
+        actual = getattr(right, method)(df, *args)
+        if not _same(expected, actual, tolerance):
+            mismatches.append(description)
+    return mismatches
+
+
+if __name__ == "__main__":
+    from data_loader import read_dataset
+
+    parser = argparse.ArgumentParser(description="Check that a compute backend matches pandas.")
+    parser.add_argument("--backend", default="polars", choices=sorted(BACKENDS))
+    args = parser.parse_args()
+
+    data = read_dataset()
+    failures = check_parity(data, args.backend)
+    n_queries = len(parity_queries(data))
+    print(f"{args.backend}: {n_queries - len(failures)}/{n_queries} queries match pandas.")
+    for failure in failures:
+        print(f"  MISMATCH {failure}")
+    sys.exit(1 if failures else 0)
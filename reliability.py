@@ -0,0 +1,196 @@
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import streamlit as st
+
+import irt_model
+from constructs import CONSTRUCTS, DEMOGRAPHIC_COLUMNS, LIKERT_ITEMS
+from data_loader import likert_matrix, load_data
+from result_cache import memoize
+from segment_stats import segment_covariances, segment_index
+
+
+# ==================================================
+# RELIABILITY FROM COVARIANCE MATRICES
+# ==================================================
+def construct_reliability(cov):
+    """
+    Cronbach's alpha, alpha-if-item-deleted and corrected item-total correlations.
+
+    cov: (S, k, k) stack of item covariance matrices, one per segment.
+    Returns alpha (S,), alpha_if_deleted (S, k) and item_total (S, k).
+    """
+    k = cov.shape[-1]
+    item_var = np.diagonal(cov, axis1=1, axis2=2)
+    total_var = cov.sum(axis=(1, 2))
+    row_sums = cov.sum(axis=2)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        alpha = k / (k - 1) * (1 - item_var.sum(axis=1) / total_var)
+
+        # Scale without item j: drop its row and column from the covariance sum
+        rest_var = total_var[:, None] - 2 * row_sums + item_var
+        rest_item_var = item_var.sum(axis=1)[:, None] - item_var
+        if k > 2:
+            alpha_if_deleted = (k - 1) / (k - 2) * (1 - rest_item_var / rest_var)
+        else:
+            alpha_if_deleted = np.full_like(item_var, np.nan)
+
+        # Correlation between item j and the sum of the remaining items
+        item_total = (row_sums - item_var) / np.sqrt(item_var * rest_var)
+
+    return alpha, alpha_if_deleted, item_total
+
+
+def reliability_tables(df, constructs=CONSTRUCTS, segment_columns=DEMOGRAPHIC_COLUMNS):
+    """
+    Reliability of every construct in every demographic segment.
+
+    All segment covariance matrices come from a single pass over the item
+    matrix; each construct then reads its sub-block.
+    Returns (alpha_df, item_df).
+    """
+    items = [item for block in constructs.values() for item in block]
+    segments, ids = segment_index(df, [c for c in segment_columns if c in df.columns])
+    cov, counts = segment_covariances(likert_matrix(df, items), ids, len(segments))
+
+    position = {item: i for i, item in enumerate(items)}
+    alpha_rows, item_rows = [], []
+    for construct, block in constructs.items():
+        idx = [position[item] for item in block]
+        alpha, alpha_deleted, item_total = construct_reliability(cov[:, idx][:, :, idx])
+
+        alpha_rows.append(segments.assign(
+            Construct=construct, Items=len(block), n=counts.astype(int), Alpha=alpha
+        ))
+        for j, item in enumerate(block):
+            item_rows.append(segments.assign(
+                Construct=construct,
+                Item=item,
+                n=counts.astype(int),
+                **{
+                    'Alpha if Deleted': alpha_deleted[:, j],
+                    'Corrected Item-Total r': item_total[:, j]
+                }
+            ))
+
+    return pd.concat(alpha_rows, ignore_index=True), pd.concat(item_rows, ignore_index=True)
+
+
+@memoize
+def cached_reliability_tables(df):
+    return reliability_tables(df)
+
+
+# ==================================================
+# RELIABILITY PANEL
+# ==================================================
+def app():
+    st.header("🧪 Construct Reliability Analysis")
+
+    st.subheader("Problem Statement")
+    st.write("""
+    The dashboard averages Likert items into composite scores (Trust, Motivation,
+    Lifestyle, Product Presentation, Impulse Buying, ...). Composites are only meaningful
+    when their items measure the same construct consistently, so this panel checks
+    internal consistency for every construct and demographic segment.
+    """)
+
+    df = load_data()
+    missing_cols = [c for c in LIKERT_ITEMS if c not in df.columns]
+    if missing_cols:
+        st.warning(f"Missing Likert columns: {missing_cols}")
+        return
+
+    alpha_df, item_df = cached_reliability_tables(df)
+
+    # ==================================================
+    # 1. ALPHA HEATMAP
+    # ==================================================
+    st.markdown("### 1️⃣ Cronbach's Alpha by Segment")
+    segment_by = st.selectbox(
+        "Segment respondents by:",
+        ['All'] + [c for c in DEMOGRAPHIC_COLUMNS if c in df.columns]
+    )
+    view = alpha_df[alpha_df['Segment By'] == segment_by]
+    heat = view.pivot(index='Segment', columns='Construct', values='Alpha')[list(CONSTRUCTS)]
+
+    fig = px.imshow(
+        heat,
+        text_auto='.2f',
+        zmin=0,
+        zmax=1,
+        color_continuous_scale='RdYlGn',
+        aspect='auto',
+        title="Cronbach's Alpha per Construct"
+    )
+    st.plotly_chart(fig, use_container_width=True)
+
+    sizes = view.drop_duplicates('Segment').set_index('Segment')['n']
+    small = sizes[sizes < 10]
+    if not small.empty:
+        st.caption(f"Segments with fewer than 10 respondents give unstable estimates: {', '.join(map(str, small.index))}")
+
+    with st.expander("📌 Reading Cronbach's Alpha"):
+        st.markdown("""
+        <ul style="margin-left:15px;">
+            <li>α ≥ 0.8 indicates good internal consistency, 0.7–0.8 is acceptable.</li>
+            <li>α below 0.6 suggests the items do not measure a single construct in that segment.</li>
+            <li>Empty cells mean the segment is too small to estimate a covariance matrix.</li>
+        </ul>
+        """, unsafe_allow_html=True)
+
+    # ==================================================
+    # 2. ITEM DIAGNOSTICS
+    # ==================================================
+    st.markdown("### 2️⃣ Item Diagnostics")
+    col1, col2 = st.columns(2)
+    construct = col1.selectbox("Construct:", list(CONSTRUCTS))
+    segment = col2.selectbox("Segment:", view['Segment'].unique().tolist())
+
+    items_view = item_df[
+        (item_df['Segment By'] == segment_by) &
+        (item_df['Segment'] == segment) &
+        (item_df['Construct'] == construct)
+    ]
+    construct_alpha = view.loc[
+        (view['Segment'] == segment) & (view['Construct'] == construct), 'Alpha'
+    ].iloc[0]
+
+    st.metric(f"Cronbach's Alpha – {construct}", f"{construct_alpha:.2f}")
+    st.dataframe(
+        items_view[['Item', 'n', 'Alpha if Deleted', 'Corrected Item-Total r']].round(3),
+        use_container_width=True
+    )
+
+    weak_items = items_view[items_view['Alpha if Deleted'] > construct_alpha]['Item'].tolist()
+    if weak_items:
+        st.info(f"Removing {', '.join(weak_items)} would raise alpha for this segment.")
+    else:
+        st.info("Every item contributes to the construct's reliability in this segment.")
+
+    # ==================================================
+    # 3. GRADED RESPONSE MODEL
+    # ==================================================
+    if not irt_model.available():
+        return
+    st.markdown("### 3️⃣ Graded Response Model")
+    model = irt_model.construct_models(df).get(construct)
+    if model is None:
+        st.info(f"No graded response model was fitted for {construct}.")
+        return
+
+    st.dataframe(irt_model.item_parameters(model).round(3), use_container_width=True)
+    st.caption(
+        f"{construct}: fitted on {model['n_patterns']:,} distinct answer patterns from "
+        f"{model['n_respondents']:,} respondents, "
+        f"{'converged' if model['converged'] else 'not converged'} after {model['iterations']} EM iterations."
+    )
+    with st.expander("📌 Reading the item parameters"):
+        st.markdown("""
+        <ul style="margin-left:15px;">
+            <li>a is the item's discrimination: higher values separate respondents with nearby trait levels more sharply.</li>
+            <li>b1–b4 are the trait levels at which answering above 1, 2, 3 and 4 becomes more likely than not.</li>
+            <li>Turn on "IRT construct scores" in the sidebar to use these models for the composites on every page.</li>
+        </ul>
+        """, unsafe_allow_html=True)
@@ -0,0 +1,299 @@
+import argparse
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+try:
+    import fcntl
+except ImportError:  # Windows: fall back to the in-process lock only
+    fcntl = None
+
+from constructs import COMPOSITE_ITEMS, DEMOGRAPHIC_COLUMNS, LIKERT_ITEMS
+from validator import validate_frame
+
+LOG_DIR = os.environ.get("TIKTOK_RESPONSE_LOG_DIR", "response_log")
+LOG_NAME = "responses.log"
+LOCK_NAME = "log.lock"
+COMPACT_LOCK_NAME = "compact.lock"
+
+# Each compaction turns the live log into one immutable partition; runs of
+# partitions below MERGE_ROWS are then merged into one spanning partition
+PARTITION_PREFIX = "part-"
+COMPACTING_PREFIX = "compacting-"
+MERGE_ROWS = int(os.environ.get("TIKTOK_PARTITION_MERGE_ROWS", "50000"))
+
+_thread_locks = {LOCK_NAME: threading.Lock(), COMPACT_LOCK_NAME: threading.Lock()}
+
+
+# ==================================================
+# LOCKING (writers vs. log rotation)
+# ==================================================
+@contextmanager
+def _file_lock(log_dir, name=LOCK_NAME):
+    """
+    Exclusive lock across threads and processes. LOCK_NAME is shared by
+    appenders and log rotation; COMPACT_LOCK_NAME serialises compactors.
+    """
+    os.makedirs(log_dir, exist_ok=True)
+    with _thread_locks[name]:
+        with open(os.path.join(log_dir, name), 'a') as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+# ==================================================
+# APPEND (O(record), durable)
+# ==================================================
+def make_record(response):
+    """
+    Complete one survey response: demographics and Likert items are required,
+    composite scores are recomputed from the items. Raises ValueError when the
+    response fails validation.
+    """
+    required = DEMOGRAPHIC_COLUMNS + LIKERT_ITEMS
+    missing = [c for c in required if c not in response]
+    unknown = [c for c in response if c not in required and c not in COMPOSITE_ITEMS]
+    if missing or unknown:
+        raise ValueError(f"Invalid response (missing: {missing}, unknown: {unknown})")
+
+    record = {c: response[c] for c in required}
+    for col, items in COMPOSITE_ITEMS.items():
+        record[col] = float(np.mean([record[i] for i in items]))
+
+    report = validate_frame(pd.DataFrame([record]))
+    if not report['valid']:
+        raise ValueError(f"Invalid response: {report['issues']}")
+    return record
+
+
+def append_response(response, log_dir=LOG_DIR):
+    """Validate a response and append it to the log; returns after fsync."""
+    line = (json.dumps(make_record(response)) + "\n").encode()
+    with _file_lock(log_dir):
+        fd = os.open(os.path.join(log_dir, LOG_NAME), os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, line)
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+
+# ==================================================
+# COMPACTION (log → immutable columnar partition)
+# ==================================================
+def _partition_path(log_dir, span):
+    first, last = span
+    suffix = f"{first:06d}" if first == last else f"{first:06d}-{last:06d}"
+    return os.path.join(log_dir, f"{PARTITION_PREFIX}{suffix}.npz")
+
+
+def _compacting_path(log_dir, seq):
+    return os.path.join(log_dir, f"{COMPACTING_PREFIX}{seq:06d}.log")
+
+
+def _sequence(name, prefix):
+    return int(name[len(prefix):].split('.')[0])
+
+
+def _span(name):
+    """(first, last) sequence numbers held by a partition file."""
+    bounds = name[len(PARTITION_PREFIX):].split('.')[0].split('-')
+    return int(bounds[0]), int(bounds[-1])
+
+
+def _covered(span, spans):
+    return any(s != span and s[0] <= span[0] and span[1] <= s[1] for s in spans)
+
+
+def _covers(spans, seq):
+    return any(first <= seq <= last for first, last in spans)
+
+
+def _all_partitions(log_dir):
+    return sorted(_span(n) for n in os.listdir(log_dir)
+                  if n.startswith(PARTITION_PREFIX) and n.endswith(".npz") and ".tmp" not in n)
+
+
+def _listing(log_dir):
+    """
+    Sorted live partition spans and pending (rotated, not yet compacted) log
+    sequence numbers. Partitions already merged into a wider one are skipped.
+    """
+    if not os.path.isdir(log_dir):
+        return [], []
+    spans = _all_partitions(log_dir)
+    partitions = [span for span in spans if not _covered(span, spans)]
+    pending = sorted(_sequence(n, COMPACTING_PREFIX) for n in os.listdir(log_dir)
+                     if n.startswith(COMPACTING_PREFIX) and n.endswith(".log"))
+    return partitions, pending
+
+
+def _write_partition(df, path):
+    """One array per column; strings become fixed-width unicode so no pickling is needed."""
+    arrays = {}
+    for col in df.columns:
+        values = df[col].to_numpy()
+        arrays[col] = values.astype(str) if values.dtype == object else values
+    tmp_path = f"{path}.{os.getpid()}.tmp.npz"
+    np.savez(tmp_path, **arrays)
+    os.replace(tmp_path, path)
+
+
+def _partition_rows(path):
+    # Reads a single column rather than the whole partition
+    with np.load(path, allow_pickle=False) as data:
+        return len(data[data.files[0]]) if data.files else 0
+
+
+def _merge_partitions(log_dir):
+    """
+    Merge adjacent partitions until each holds at least MERGE_ROWS responses
+    (the newest may hold fewer), so the partition count grows with the data
+    rather than with the number of compactions. The merged partition spans
+    the sequence numbers of its parts and hides them until they are deleted;
+    a crash in between never exposes a response twice.
+    """
+    partitions, _ = _listing(log_dir)
+    runs, rows = [], MERGE_ROWS
+    for span in partitions:
+        if rows >= MERGE_ROWS:
+            runs.append([])
+            rows = 0
+        runs[-1].append(span)
+        rows += _partition_rows(_partition_path(log_dir, span))
+
+    for run in runs:
+        if len(run) < 2:
+            continue
+        frames = [_load_partition(_partition_path(log_dir, span)) for span in run]
+        _write_partition(pd.concat(frames, ignore_index=True), _partition_path(log_dir, (run[0][0], run[-1][1])))
+
+    # Remove merged partitions, including any left behind by a crash
+    spans = _all_partitions(log_dir)
+    for span in spans:
+        if _covered(span, spans):
+            os.remove(_partition_path(log_dir, span))
+
+
+def compact(log_dir=LOG_DIR):
+    """
+    Fold the live log into a new partition and merge small partitions.
+    Returns the number of records compacted.
+
+    The log is first renamed under the writer lock, so appends continue into a
+    fresh log while the rotated one is converted. A crash at any step leaves
+    either the rotated log or its finished partition, never both live.
+    """
+    with _file_lock(log_dir, COMPACT_LOCK_NAME):
+        with _file_lock(log_dir):
+            partitions, pending = _listing(log_dir)
+            log_path = os.path.join(log_dir, LOG_NAME)
+            if os.path.exists(log_path) and os.path.getsize(log_path) > 0:
+                seq = max([last for _, last in partitions] + pending, default=0) + 1
+                os.replace(log_path, _compacting_path(log_dir, seq))
+                pending.append(seq)
+
+        compacted = 0
+        for seq in pending:
+            compacting_path = _compacting_path(log_dir, seq)
+            if not _covers(partitions, seq):
+                records = _read_log(compacting_path)
+                _write_partition(records, _partition_path(log_dir, (seq, seq)))
+                compacted += len(records)
+            os.remove(compacting_path)
+        _merge_partitions(log_dir)
+        return compacted
+
+
+# ==================================================
+# READER (partitions + log tail)
+# ==================================================
+def _read_log(path):
+    with open(path, 'rb') as f:
+        lines = f.read().splitlines()
+    # A torn final line (crash mid-append) is skipped
+    records = []
+    for line in lines:
+        try:
+            records.append(json.loads(line))
+        except ValueError:
+            continue
+    return pd.DataFrame(records)
+
+
+def _load_partition(path):
+    with np.load(path, allow_pickle=False) as data:
+        return pd.DataFrame({col: data[col] for col in data.files})
+
+
+# Partitions never change once written, so they are parsed once per process
+_read_partition = lru_cache(maxsize=256)(_load_partition)
+
+
+def version(log_dir=LOG_DIR):
+    """Cheap token that changes whenever responses are appended or compacted."""
+    partitions, pending = _listing(log_dir)
+    log_path = os.path.join(log_dir, LOG_NAME)
+    log_size = os.path.getsize(log_path) if os.path.exists(log_path) else 0
+    return tuple(partitions), tuple(pending), log_size
+
+
+def has_responses(log_dir=LOG_DIR):
+    return version(log_dir) != ((), (), 0)
+
+
+def read_responses(log_dir=LOG_DIR):
+    """All logged responses: compacted partitions followed by the uncompacted tail."""
+    while True:
+        try:
+            return _merge(log_dir)
+        except FileNotFoundError:
+            # A compaction finished between listing and reading; list again
+            continue
+
+
+def _merge(log_dir):
+    partitions, pending = _listing(log_dir)
+    frames = [_read_partition(_partition_path(log_dir, span)) for span in partitions]
+    frames += [_read_log(_compacting_path(log_dir, seq)) for seq in pending if not _covers(partitions, seq)]
+    log_path = os.path.join(log_dir, LOG_NAME)
+    if os.path.exists(log_path):
+        frames.append(_read_log(log_path))
+    frames = [f for f in frames if len(f)]
+    if not frames:
+        return pd.DataFrame()
+    return pd.concat(frames, ignore_index=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Append survey responses or compact the response log.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    append_cmd = commands.add_parser("append", help="append responses from a JSON file (object or list)")
+    append_cmd.add_argument("path")
+    compact_cmd = commands.add_parser("compact", help="fold the log into a columnar partition")
+    compact_cmd.add_argument("--every", type=float, help="keep compacting every N seconds")
+    args = parser.parse_args()
+
+    if args.command == "append":
+        with open(args.path) as f:
+            responses = json.load(f)
+        for response in responses if isinstance(responses, list) else [responses]:
+            append_response(response)
+        print(f"Appended to {os.path.join(LOG_DIR, LOG_NAME)}")
+    else:
+        while True:
+            print(f"Compacted {compact()} responses.")
+            if not args.every:
+                break
+            time.sleep(args.every)
@@ -0,0 +1,209 @@
+import functools
+import os
+import sys
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+
+import numpy as np
+import pandas as pd
+
+# Process-wide byte budget shared by every session
+BUDGET_BYTES = int(float(os.environ.get("TIKTOK_RESULT_CACHE_MB", "256")) * 2 ** 20)
+
+
+# ==================================================
+# SIZE ESTIMATE
+# ==================================================
+def sizeof(value):
+    """Approximate memory held by a cached result, in bytes."""
+    if isinstance(value, pd.DataFrame):
+        from data_loader import is_shared_frame, shared_columns
+        if is_shared_frame(value):
+            return 0  # the shared frame itself is owned by data_loader
+        # Derived frames (e.g. IRT-scored) count only the columns they own
+        shared = shared_columns(value)
+        if shared:
+            value = value.drop(columns=shared)
+    polars = sys.modules.get('polars')
+    if polars is not None and isinstance(value, (polars.DataFrame, polars.Series)):
+        return int(value.estimated_size())
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        usage = value.memory_usage(deep=True, index=True)
+        return int(usage.sum() if isinstance(value, pd.DataFrame) else usage)
+    if isinstance(value, pd.Index):
+        return int(value.memory_usage(deep=True))
+    if isinstance(value, np.ndarray):
+        return int(value.nbytes)
+    if isinstance(value, (tuple, list, set, frozenset)):
+        return sys.getsizeof(value) + sum(sizeof(v) for v in value)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(sizeof(k) + sizeof(v) for k, v in value.items())
+    return sys.getsizeof(value)
+
+
+# ==================================================
+# SIZE-AWARE LRU WITH SINGLE-FLIGHT
+# ==================================================
+class ResultCache:
+    """
+    LRU cache bounded by total bytes rather than entry count.
+
+    Concurrent requests for a key that is being computed wait for that
+    computation instead of starting their own (single flight). Results are
+    shared between sessions and must be treated as read-only.
+    """
+
+    def __init__(self, budget_bytes=BUDGET_BYTES):
+        self.budget_bytes = budget_bytes
+        self._entries = OrderedDict()  # key -> (value, size)
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.deduplicated = 0
+        self.evictions = 0
+        self.evicted_bytes = 0
+        self.oversized = 0
+        self.uncacheable = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key][0]
+            self.misses += 1
+            return default
+
+    def get_or_compute(self, key, compute):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key][0]
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = self._inflight[key] = Future()
+                self.misses += 1
+            else:
+                self.deduplicated += 1
+
+        if not leader:
+            return future.result()
+
+        try:
+            value = compute()
+        except BaseException as exc:
+            with self._lock:
+                del self._inflight[key]
+            future.set_exception(exc)
+            raise
+
+        self.put(key, value)
+        with self._lock:
+            del self._inflight[key]
+        future.set_result(value)
+        return value
+
+    def put(self, key, value):
+        size = sizeof(value)
+        with self._lock:
+            if size > self.budget_bytes:
+                self.oversized += 1
+                return
+            self._entries[key] = (value, size)
+            self.bytes += size
+            while self.bytes > self.budget_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.bytes -= evicted_size
+                self.evictions += 1
+                self.evicted_bytes += evicted_size
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses + self.deduplicated
+            return {
+                'entries': len(self._entries),
+                'bytes': self.bytes,
+                'budget_bytes': self.budget_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'deduplicated': self.deduplicated,
+                'hit_rate': (self.hits + self.deduplicated) / lookups if lookups else None,
+                'evictions': self.evictions,
+                'evicted_bytes': self.evicted_bytes,
+                'oversized': self.oversized,
+                'uncacheable': self.uncacheable
+            }
+
+
+_cache = ResultCache()
+
+
+# ==================================================
+# MEMOIZE DECORATOR
+# ==================================================
+class _Uncacheable(Exception):
+    pass
+
+
+def _key_part(value):
+    """Hashable stand-in for an argument; frames are keyed by their dataset version."""
+    if isinstance(value, pd.DataFrame):
+        from data_loader import dataset_version
+        version = dataset_version(value)
+        if version is None:
+            # Per-request frames (e.g. filtered copies) have no stable identity
+            raise _Uncacheable
+        return ('dataset', version)
+    if isinstance(value, (list, tuple)):
+        return tuple(_key_part(v) for v in value)
+    if isinstance(value, dict):
+        return tuple(sorted((k, _key_part(v)) for k, v in value.items()))
+    if isinstance(value, (set, frozenset)):
+        return frozenset(value)
+    try:
+        hash(value)
+    except TypeError:
+        raise _Uncacheable
+    return value
+
+
+def memoize(func):
+    """
+    Cache func's results keyed by (function, arguments, dataset version).
+
+    Pass the shared frame (load_data()) and a filter signature rather than a
+    filtered copy: the frame is keyed by its version, so results cached from
+    an older dataset are never served.
+    """
+    name = f"{func.__module__}.{func.__qualname__}"
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        try:
+            key = (name, _key_part(args), _key_part(kwargs))
+        except _Uncacheable:
+            with _cache._lock:
+                _cache.uncacheable += 1
+            return func(*args, **kwargs)
+        return _cache.get_or_compute(key, lambda: func(*args, **kwargs))
+
+    return wrapper
+
+
+def stats():
+    """Hit rate, memory use and eviction counters of the process-wide cache."""
+    return _cache.stats()
+
+
+def clear():
+    _cache.clear()
@@ -0,0 +1,32 @@
+from contextlib import contextmanager
+
+import streamlit as st
+
+# Open/closed state of every lazy section, kept for the whole session
+OPEN_SECTIONS_KEY = '_open_sections'
+
+
+def _remember(key):
+    st.session_state[OPEN_SECTIONS_KEY][key] = st.session_state[key]
+
+
+@contextmanager
+def lazy_section(label, key, expanded=False):
+    """
+    Expander whose body only runs while it is open.
+
+    Yields True when the section is open; the caller computes its data and
+    figure only then. Opening or closing a section reruns the page, and the
+    choice is remembered for the session, also across page switches (widget
+    state alone is dropped when the page that owns it is not shown).
+    """
+    opened = st.session_state.setdefault(OPEN_SECTIONS_KEY, {})
+    expander = st.expander(
+        label,
+        expanded=opened.get(key, expanded),
+        key=key,
+        on_change=_remember,
+        args=(key,)
+    )
+    with expander:
+        yield bool(expander.open)
@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+
+# Rows processed per pass when accumulating cross-product moments
+CHUNK_SIZE = 8192
+
+
+# ==================================================
+# SEGMENT INDEX
+# ==================================================
+def segment_index(df, columns):
+    """
+    Global segment ids for every respondent under every grouping column.
+
+    Returns (segments, ids): segments is a DataFrame of (Segment By, Segment)
+    labels starting with an 'All' row; ids is an (n_rows, 1 + len(columns))
+    int array whose column g holds each row's segment id under grouping g
+    (-1 for missing values).
+    """
+    labels = [('All', 'All')]
+    ids = [np.zeros(len(df), dtype=np.int64)]
+    for col in columns:
+        codes, uniques = pd.factorize(df[col], sort=True)
+        offset = len(labels)
+        ids.append(np.where(codes >= 0, codes + offset, -1))
+        labels.extend((col, value) for value in uniques)
+
+    segments = pd.DataFrame(labels, columns=['Segment By', 'Segment'])
+    return segments, np.column_stack(ids)
+
+
+# ==================================================
+# PER-SEGMENT MOMENTS (ONE PASS)
+# ==================================================
+def segment_moments(X, ids, n_segments, chunk_size=CHUNK_SIZE):
+    """
+    Counts, sums and cross-product matrices of X for every segment in one pass.
+
+    Returns counts (S,), sums (S, p) and cross (S, p, p).
+    """
+    n_rows, p = X.shape
+    counts = np.zeros(n_segments)
+    sums = np.zeros((n_segments, p))
+    cross = np.zeros((n_segments, p * p))
+
+    for start in range(0, n_rows, chunk_size):
+        block = X[start:start + chunk_size].astype(np.float64)
+        block_ids = ids[start:start + chunk_size]
+        rows = len(block)
+
+        # Membership of each chunk row in every segment it belongs to
+        membership = np.zeros((n_segments, rows))
+        row_idx = np.broadcast_to(np.arange(rows)[:, None], block_ids.shape)
+        valid = block_ids >= 0
+        membership[block_ids[valid], row_idx[valid]] = 1.0
+
+        counts += membership.sum(axis=1)
+        sums += membership @ block
+        cross += membership @ (block[:, :, None] * block[:, None, :]).reshape(rows, p * p)
+
+    return counts, sums, cross.reshape(n_segments, p, p)
+
+
+def segment_covariances(X, ids, n_segments, chunk_size=CHUNK_SIZE):
+    """Sample covariance matrix (S, p, p) and size (S,) of every segment."""
+    counts, sums, cross = segment_moments(X, ids, n_segments, chunk_size)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        means = sums / counts[:, None]
+        cov = (cross - counts[:, None, None] * means[:, :, None] * means[:, None, :])
+        cov /= (counts - 1)[:, None, None]
+    cov[counts < 2] = np.nan
+    return cov, counts
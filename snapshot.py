@@ -0,0 +1,223 @@
+import hashlib
+import os
+import pickle
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import plotly.io as pio
+
+import imputation
+import irt_model
+import response_log
+from constructs import COMPOSITE_ITEMS, CONSTRUCTS, LIKERT_ITEMS
+from data_loader import DATA_PATH, IMPUTATION_METHOD, read_dataset
+
+SNAPSHOT_DIR = ".snapshots"
+
+# Bump when an artifact builder changes, so stale snapshots are not reused
+SNAPSHOT_VERSION = "5"
+
+
+# ==================================================
+# CONTENT ADDRESSING
+# ==================================================
+def dataset_hash(path=DATA_PATH):
+    """SHA-256 of the dataset bytes (plus the snapshot format version and imputation method)."""
+    digest = hashlib.sha256(f"{SNAPSHOT_VERSION}:{IMPUTATION_METHOD}".encode())
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()[:16]
+
+
+def _artifact_path(key, name):
+    return os.path.join(SNAPSHOT_DIR, key, f"{name}.pkl")
+
+
+def _write(key, name, value):
+    path = _artifact_path(key, name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)  # readers never see a partial file
+
+
+def _read(key, name):
+    path = _artifact_path(key, name)
+    if not os.path.exists(path):
+        return None
+    with open(path, 'rb') as f:
+        return pickle.load(f)
+
+
+# ==================================================
+# ARTIFACT BUILDERS
+# ==================================================
+def _build_dataset(get):
+    return read_dataset(DATA_PATH)
+
+
+def _ingested(df):
+    # Derived artifacts describe the frame pages see, after ingest imputation
+    items = [i for i in LIKERT_ITEMS if i in df.columns]
+    if not imputation.encode(df, items)[1].any():
+        return df
+    return imputation.impute_frame(df.copy(), IMPUTATION_METHOD)[0]
+
+
+def _build_cube(get):
+    from likert_cube import LikertCube
+    return LikertCube.from_frame(_ingested(get('dataset')))
+
+
+def _build_correlations(get):
+    df = _ingested(get('dataset'))
+    composites = [c for c in COMPOSITE_ITEMS if c in df.columns]
+    return {
+        'items': df[LIKERT_ITEMS].corr(),
+        'composites': df[composites].corr()
+    }
+
+
+def _build_figures(get):
+    # Default-filter figures, stored as Plotly JSON
+    import Objective2_Nurin
+    import Objective3_Nadia
+    import Objective4_Athirah
+
+    df = _ingested(get('dataset'))
+    corr = get('correlations')
+    corr_items = CONSTRUCTS['Trust'] + CONSTRUCTS['Motivation']
+    corr_cols = ['SL_score', 'PP_score', 'OIB_score']
+
+    figures = {
+        'objective2_density': Objective2_Nurin.oib_density_figure(df, Objective2_Nurin.oib_category(df)),
+        'objective3_correlation': Objective3_Nadia.trust_motivation_heatmap(corr['items'].loc[corr_items, corr_items]),
+        'objective4_scatter': Objective4_Athirah.pp_oib_scatter(df),
+        'objective4_correlation': Objective4_Athirah.construct_heatmap(corr['composites'].loc[corr_cols, corr_cols])
+    }
+    return {name: fig.to_json() for name, fig in figures.items()}
+
+
+BUILDERS = {
+    'dataset': _build_dataset,
+    'cube': _build_cube,
+    'correlations': _build_correlations,
+    'figures': _build_figures
+}
+
+# Built only by the deploy step (build_snapshot); the warm-up just loads them.
+# Building figures imports the pages and runs Plotly on pool threads while
+# the script thread renders, which races on half-imported modules.
+OFFLINE_ARTIFACTS = {'figures'}
+
+
+def build_snapshot(path=DATA_PATH):
+    """Build every artifact for the current dataset (deploy-time build step)."""
+    key = dataset_hash(path)
+    built = {}
+    for name, builder in BUILDERS.items():
+        built[name] = builder(built.__getitem__)
+        _write(key, name, built[name])
+    return key
+
+
+# ==================================================
+# STARTUP WARM-UP (once per server process)
+# ==================================================
+_lock = threading.Lock()
+_executor = None
+_futures = {}
+_memory = {}
+
+
+def _ensure(key, name):
+    """Load an artifact from disk, or build and persist it."""
+    value = _read(key, name)
+    if value is None:
+        value = BUILDERS[name](lambda dep: _wait(dep))
+        _write(key, name, value)
+    _memory[name] = value
+    return value
+
+
+def _load(key, name):
+    """Load a deploy-time artifact from disk; None when the deploy step did not build it."""
+    value = _read(key, name)
+    if value is not None:
+        _memory[name] = value
+    return value
+
+
+def _preload_modules():
+    """
+    Import what the builders use on the calling thread. Plotly's dataframe
+    layer (narwhals) probes for polars by module name, so a polars import
+    still running on another thread fails the first chart with a
+    "partially initialized module" error.
+    """
+    import narwhals
+    import plotly.express
+
+    import likert_cube
+    try:
+        import polars
+    except ImportError:
+        pass
+
+
+def _wait(name):
+    future = _futures.get(name)
+    return future.result() if future is not None else None
+
+
+def start_warm_up(path=DATA_PATH, max_workers=4):
+    """
+    Load the snapshot for the current dataset or build missing artifacts
+    on a background thread pool. Safe to call on every rerun. Figures are
+    never built here: without a deploy-time snapshot the pages draw them.
+    """
+    global _executor
+    with _lock:
+        if _executor is not None:
+            return
+        _preload_modules()
+        _executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="warm-up")
+        key = dataset_hash(path)
+        # Submit in dependency order so a builder only waits on earlier futures
+        for name in BUILDERS:
+            task = _load if name in OFFLINE_ARTIFACTS else _ensure
+            _futures[name] = _executor.submit(task, key, name)
+
+
+def artifact(name):
+    """
+    Snapshot artifact for the current dataset, or None when warm-up was not
+    started. Only the CSV-derived 'dataset' is served once responses have been
+    logged, since the other artifacts would miss the new rows. The cube is
+    built from the raw items, so it also stands while IRT scores are shown.
+    """
+    if name != 'dataset' and response_log.has_responses():
+        return None
+    if name in ('correlations', 'figures') and irt_model.active():
+        return None
+    if name in _memory:
+        return _memory[name]
+    try:
+        return _wait(name)
+    except Exception:
+        # A failed warm-up falls back to computing on the page
+        return None
+
+
+def figure(name, build):
+    """Precomputed default figure, or build() when the snapshot has none."""
+    figures = artifact('figures')
+    if figures and name in figures:
+        return pio.from_json(figures[name])
+    return build()
+
+
+if __name__ == "__main__":
+    print(f"Snapshot written to {os.path.join(SNAPSHOT_DIR, build_snapshot())}")
@@ -0,0 +1,251 @@
+import os
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+import pandas as pd
+import streamlit as st
+
+import imputation
+import response_log
+from constructs import DEMOGRAPHIC_COLUMNS
+from data_loader import DATA_PATH, IMPUTATION_METHOD
+
+# Opt-in: TIKTOK_STORAGE_BACKEND=sqlite pushes the demographic counts and
+# crosstabs of the aggregate-only pages (navigation.SQL_PAGES) down to SQLite.
+# Pages that read respondent rows are off in this mode. The table holds what
+# load_data() merges: the CSV and the logged responses, with missing answers
+# imputed at ingest. Persona labels are not included.
+BACKEND = os.environ.get("TIKTOK_STORAGE_BACKEND", "pandas").lower()
+DB_PATH = os.environ.get("TIKTOK_SQLITE_PATH", "tiktok_impulse_buying.sqlite")
+TABLE = "responses"
+META_TABLE = "meta"
+POOL_SIZE = int(os.environ.get("TIKTOK_SQLITE_POOL_SIZE", "8"))
+
+# Rows per batch when loading the CSV, so the build never holds the whole file
+BUILD_CHUNK_SIZE = 100000
+
+# Ingest imputation that is row-local, so filling chunk by chunk gives the
+# same values as load_data(); 'chained' fits across all rows
+IMPUTATION_METHODS = ('none', 'person_mean')
+
+
+def enabled():
+    return BACKEND == "sqlite"
+
+
+# ==================================================
+# DATABASE BUILD
+# ==================================================
+def source_signature(csv_path=DATA_PATH):
+    """Identity of the CSV and the imputation method the table was built from."""
+    stat = os.stat(csv_path)
+    return f"{os.path.abspath(csv_path)}:{stat.st_size}:{stat.st_mtime_ns}:{IMPUTATION_METHOD}"
+
+
+def _ingest(chunk):
+    # Same ingest imputation as load_data()
+    chunk.columns = chunk.columns.str.strip()
+    return imputation.impute_frame(chunk, IMPUTATION_METHOD)[0]
+
+
+def build_database(csv_path=DATA_PATH, db_path=DB_PATH):
+    """Stream the CSV into an indexed SQLite table; logged responses follow via sync_responses."""
+    if IMPUTATION_METHOD not in IMPUTATION_METHODS:
+        raise ValueError(
+            f"TIKTOK_IMPUTATION={IMPUTATION_METHOD} is not supported with the SQLite backend "
+            f"(choose from {list(IMPUTATION_METHODS)})"
+        )
+    tmp_path = db_path + ".tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    conn = sqlite3.connect(tmp_path)
+    try:
+        for chunk in pd.read_csv(csv_path, chunksize=BUILD_CHUNK_SIZE):
+            _ingest(chunk).to_sql(TABLE, conn, if_exists='append', index=False)
+        columns = {row[1] for row in conn.execute(f'PRAGMA table_info("{TABLE}")')}
+        for col in DEMOGRAPHIC_COLUMNS:
+            if col in columns:
+                conn.execute(f'CREATE INDEX IF NOT EXISTS "idx_{col}" ON "{TABLE}" ("{col}")')
+        conn.execute(f'CREATE TABLE "{META_TABLE}" (key TEXT PRIMARY KEY, value TEXT)')
+        conn.executemany(
+            f'INSERT INTO "{META_TABLE}" VALUES (?, ?)',
+            [('source', source_signature(csv_path)), ('log_rows', '0')]
+        )
+        conn.execute("ANALYZE")
+        conn.commit()
+    finally:
+        conn.close()
+    os.replace(tmp_path, db_path)
+
+
+def _meta(db_path=DB_PATH):
+    """The build's meta entries, or {} for a missing or pre-meta database."""
+    if not os.path.exists(db_path):
+        return {}
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        return dict(conn.execute(f'SELECT key, value FROM "{META_TABLE}"'))
+    except sqlite3.OperationalError:
+        return {}
+    finally:
+        conn.close()
+
+
+def sync_responses(db_path=DB_PATH):
+    """
+    Append responses logged since the last sync (the log only grows, in
+    order). Returns the number of logged rows now in the table.
+    """
+    conn = sqlite3.connect(db_path)
+    try:
+        synced = int(dict(conn.execute(f'SELECT key, value FROM "{META_TABLE}"'))['log_rows'])
+        responses = response_log.read_responses()
+        if len(responses) > synced:
+            columns = [row[1] for row in conn.execute(f'PRAGMA table_info("{TABLE}")')]
+            new = _ingest(responses.iloc[synced:].reindex(columns=columns).reset_index(drop=True))
+            new.to_sql(TABLE, conn, if_exists='append', index=False)
+            conn.execute(f'UPDATE "{META_TABLE}" SET value = ? WHERE key = ?', (str(len(responses)), 'log_rows'))
+            conn.commit()
+        return max(synced, len(responses))
+    finally:
+        conn.close()
+
+
+# ==================================================
+# CONNECTION POOL (shared by all sessions)
+# ==================================================
+class ConnectionPool:
+    """
+    Fixed-size pool of read-only SQLite connections.
+
+    Queries use constant SQL text with bound parameters, so each connection's
+    statement cache serves them as prepared statements.
+    """
+
+    def __init__(self, db_path=DB_PATH, size=POOL_SIZE):
+        self.db_path = db_path
+        self._pool = queue.Queue(maxsize=size)
+        for _ in range(size):
+            conn = sqlite3.connect(
+                f"file:{db_path}?mode=ro",
+                uri=True,
+                check_same_thread=False,
+                cached_statements=256
+            )
+            self._pool.put(conn)
+        with self.connection() as conn:
+            self.columns = [row[1] for row in conn.execute(f'PRAGMA table_info("{TABLE}")')]
+
+    @contextmanager
+    def connection(self):
+        conn = self._pool.get()
+        try:
+            yield conn
+        finally:
+            self._pool.put(conn)
+
+    def query(self, sql, params=()):
+        with self.connection() as conn:
+            return conn.execute(sql, params).fetchall()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+_synced = (None, None)  # (response log version, logged rows in the table)
+
+
+def get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # (Re)build when the CSV or imputation method changed since the last build
+            if _meta().get('source') != source_signature():
+                build_database()
+            _pool = ConnectionPool()
+    return _pool
+
+
+def data_version():
+    """
+    Token of the table contents, passed as `df` to the memoized aggregates so
+    their results follow the data. Folds in newly logged responses first.
+    """
+    global _synced
+    get_pool()
+    with _pool_lock:
+        log_version = response_log.version()
+        if _synced[0] != log_version:
+            _synced = (log_version, sync_responses())
+        return ('sqlite', _synced[1])
+
+
+# ==================================================
+# QUERY BUILDING
+# ==================================================
+def _column(name):
+    """Quote a column name after checking it exists (identifiers can't be bound)."""
+    if name not in get_pool().columns:
+        raise KeyError(name)
+    return f'"{name}"'
+
+
+def _where(filters):
+    """WHERE clause and parameters for a filter signature of (column, values) pairs."""
+    clauses, params = [], []
+    for col, values in filters:
+        values = list(values)
+        if not values:
+            clauses.append("0")
+            continue
+        clauses.append(f"{_column(col)} IN ({', '.join('?' * len(values))})")
+        params.extend(values)
+    return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+
+def count(filters=()):
+    where, params = _where(filters)
+    return get_pool().query(f'SELECT COUNT(*) FROM "{TABLE}"{where}', params)[0][0]
+
+
+def distinct(column):
+    col = _column(column)
+    rows = get_pool().query(f'SELECT DISTINCT {col} FROM "{TABLE}" WHERE {col} IS NOT NULL ORDER BY {col}')
+    return [row[0] for row in rows]
+
+
+def value_counts(column, filters=()):
+    col = _column(column)
+    where, params = _where(filters)
+    rows = get_pool().query(
+        f'SELECT {col}, COUNT(*) AS n FROM "{TABLE}"{where} GROUP BY {col} ORDER BY n DESC', params
+    )
+    counts = pd.Series({value: n for value, n in rows if value is not None}, name='count', dtype=int)
+    return counts.rename_axis(column)
+
+
+def crosstab(row_col, col_col, filters=()):
+    r, c = _column(row_col), _column(col_col)
+    where, params = _where(filters)
+    rows = get_pool().query(
+        f'SELECT {r}, {c}, COUNT(*) FROM "{TABLE}"{where} GROUP BY {r}, {c}', params
+    )
+    table = pd.DataFrame(rows, columns=[row_col, col_col, 'count'])
+    return table.pivot(index=row_col, columns=col_col, values='count').fillna(0).astype(int)
+
+
+# ==================================================
+# STREAMLIT HELPERS
+# ==================================================
+def rows_unavailable_notice(page):
+    st.info(
+        f"**{page}** works on individual respondents, which the SQLite backend keeps out of "
+        "memory. Unset TIKTOK_STORAGE_BACKEND to use this page."
+    )
+
+
+if __name__ == "__main__":
+    build_database()
+    sync_responses()
+    print(f"Built {DB_PATH} with {count()} responses.")
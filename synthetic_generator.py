@@ -0,0 +1,236 @@
+"""
+Synthetic survey respondents with the schema of the cleaned dataset.
+
+Fits a Gaussian copula to the real data (per-column marginals plus the
+correlation of normal scores) and streams any number of synthetic rows to
+CSV in parallel chunks, so large files never have to fit in memory.
+
+    python synthetic_generator.py synthetic.csv --rows 10000000
+"""
+import argparse
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from scipy.stats import norm, rankdata
+
+from constructs import COMPOSITE_ITEMS, DEMOGRAPHIC_COLUMNS, LIKERT_ITEMS, LIKERT_LEVELS
+from data_loader import DATA_PATH
+
+CHUNK_ROWS = 250_000
+
+# Pseudo-count per level, so every Likert level keeps a small chance of appearing
+SMOOTHING = 0.5
+
+
+# ==================================================
+# COPULA FIT
+# ==================================================
+def _normal_scores(codes):
+    """Mid-rank normal scores of one column (0 for a constant column)."""
+    ranks = rankdata(codes, method='average')
+    scores = norm.ppf((ranks - 0.5) / len(codes))
+    return scores - scores.mean() if scores.std() > 0 else np.zeros(len(codes))
+
+
+def _nearest_correlation(corr):
+    """Clip negative eigenvalues so the matrix has a Cholesky factor."""
+    values, vectors = np.linalg.eigh(corr)
+    fixed = vectors @ np.diag(np.clip(values, 1e-6, None)) @ vectors.T
+    scale = np.sqrt(np.diag(fixed))
+    return fixed / np.outer(scale, scale)
+
+
+def _column_codes(series, col):
+    """Levels of a column and each row's level code (-1 when missing or off-scale)."""
+    if col in LIKERT_ITEMS:
+        values = series.to_numpy(dtype=np.float64)
+        codes = np.where(np.isin(values, LIKERT_LEVELS), values - LIKERT_LEVELS[0], -1)
+        return list(LIKERT_LEVELS), codes.astype(np.int64)
+    codes, uniques = pd.factorize(series, sort=True)
+    return [str(level) for level in uniques], codes.astype(np.int64)
+
+
+def fit_copula(df, smoothing=SMOOTHING):
+    """
+    Model of the survey: the level probabilities of every demographic and
+    Likert column and the correlation of their normal scores. JSON-ready,
+    so it can be shared without the respondent rows.
+    """
+    columns = [c for c in DEMOGRAPHIC_COLUMNS + LIKERT_ITEMS if c in df.columns]
+    levels, probabilities, codes = [], [], []
+    for col in columns:
+        col_levels, col_codes = _column_codes(df[col], col)
+        counts = np.bincount(col_codes[col_codes >= 0], minlength=len(col_levels)).astype(np.float64)
+        if col in LIKERT_ITEMS:
+            counts += smoothing
+        levels.append(col_levels)
+        probabilities.append((counts / counts.sum()).tolist())
+        codes.append(col_codes)
+
+    # Normal-score correlation over respondents who answered every column
+    codes = np.column_stack(codes)
+    complete = (codes >= 0).all(axis=1)
+    Z = np.column_stack([_normal_scores(codes[complete, j]) for j in range(len(columns))])
+    varying = Z.std(axis=0) > 0
+    corr = np.eye(len(columns))
+    corr[np.ix_(varying, varying)] = np.corrcoef(Z[:, varying], rowvar=False)
+    return {
+        'columns': columns,
+        'levels': levels,
+        'probabilities': probabilities,
+        'correlation': _nearest_correlation(corr).tolist(),
+        'schema': list(df.columns),
+        'n_source_rows': int(len(df))
+    }
+
+
+# ==================================================
+# GENERATION
+# ==================================================
+def _prepare(model):
+    """Cholesky factor and normal-scale level cut points of a fitted model."""
+    cuts = [norm.ppf(np.cumsum(p)[:-1]) for p in model['probabilities']]
+    return np.linalg.cholesky(np.asarray(model['correlation'])), cuts
+
+
+def _sample_codes(model, n_rows, seed):
+    """Level code of every modelled column for n_rows synthetic respondents."""
+    L, cuts = _prepare(model)
+    rng = np.random.default_rng(seed)
+    Z = rng.standard_normal((n_rows, len(model['columns']))) @ L.T
+    return {col: np.searchsorted(cuts[j], Z[:, j]) for j, col in enumerate(model['columns'])}
+
+
+def _composite_sums(codes):
+    """Composite columns as the sum of their item codes, with the item count."""
+    return {
+        col: (np.sum([codes[i] for i in items], axis=0), len(items))
+        for col, items in COMPOSITE_ITEMS.items() if all(i in codes for i in items)
+    }
+
+
+def generate_chunk(model, n_rows, seed):
+    """
+    n_rows synthetic respondents in the source column order.
+
+    Correlated standard normals are cut at each column's marginal quantiles,
+    so every column keeps its level shares and the columns keep their rank
+    correlations. Composites are the means of their items, as in the source.
+    """
+    codes = _sample_codes(model, n_rows, seed)
+    data = {}
+    for col, col_levels in zip(model['columns'], model['levels']):
+        if col in LIKERT_ITEMS:
+            data[col] = (codes[col] + LIKERT_LEVELS[0]).astype(np.float64)
+        else:
+            data[col] = pd.Categorical.from_codes(codes[col], categories=col_levels)
+    for col, (sums, k) in _composite_sums(codes).items():
+        data[col] = (sums + k * LIKERT_LEVELS[0]) / k
+    return pd.DataFrame(data)[[c for c in model['schema'] if c in data]]
+
+
+def _csv_field(value):
+    """Quote a text cell the way DataFrame.to_csv does."""
+    if any(c in value for c in ',"\n'):
+        return '"' + value.replace('"', '""') + '"'
+    return value
+
+
+def _csv_chunk(model, n_rows, seed):
+    """
+    Worker task: one chunk rendered to CSV bytes without a DataFrame.
+
+    Every column takes few distinct values (composite means included), so
+    each is written through a small table of pre-formatted strings, matching
+    what DataFrame.to_csv writes for the same values.
+    """
+    codes = _sample_codes(model, n_rows, seed)
+    cells = {}
+    for col, col_levels in zip(model['columns'], model['levels']):
+        text = [repr(float(v)) if col in LIKERT_ITEMS else _csv_field(v) for v in col_levels]
+        cells[col] = np.array(text, dtype=object)[codes[col]]
+    for col, (sums, k) in _composite_sums(codes).items():
+        table = [repr((total + k * LIKERT_LEVELS[0]) / k) for total in range(k * (len(LIKERT_LEVELS) - 1) + 1)]
+        cells[col] = np.array(table, dtype=object)[sums]
+    rows = np.column_stack([cells[c] for c in model['schema'] if c in cells])
+    return ("\n".join(map(",".join, rows.tolist())) + "\n").encode()
+
+
+def generate_csv(path, model, n_rows, chunk_rows=CHUNK_ROWS, workers=None, seed=0):
+    """
+    Stream n_rows synthetic respondents to a CSV file.
+
+    Chunks are generated on a process pool with independent random streams
+    and written in order; at most two chunks per worker are in flight, so
+    memory stays flat however many rows are requested.
+    """
+    workers = workers or os.cpu_count() or 1
+    sizes = [min(chunk_rows, n_rows - start) for start in range(0, n_rows, chunk_rows)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    tmp_path = f"{path}.tmp"
+    with ProcessPoolExecutor(max_workers=workers) as pool, open(tmp_path, 'wb') as out:
+        out.write((",".join(model['schema']) + "\n").encode())
+        pending = deque()
+        for size, child in zip(sizes, seeds):
+            pending.append(pool.submit(_csv_chunk, model, size, child))
+            if len(pending) >= 2 * workers:
+                out.write(pending.popleft().result())
+        while pending:
+            out.write(pending.popleft().result())
+    os.replace(tmp_path, path)
+    return len(sizes)
+
+
+# ==================================================
+# FIDELITY CHECK
+# ==================================================
+def compare(real, synthetic):
+    """Largest gaps between real and synthetic level shares and item correlations."""
+    def shares(df, col):
+        values = df[col].astype(np.float64) if col in LIKERT_ITEMS else df[col].astype(str)
+        return values.value_counts(normalize=True)
+
+    share_gap = max(
+        shares(real, col).subtract(shares(synthetic, col), fill_value=0).abs().max()
+        for col in DEMOGRAPHIC_COLUMNS + LIKERT_ITEMS
+    )
+    corr_gap = (real[LIKERT_ITEMS].corr(method='spearman') - synthetic[LIKERT_ITEMS].corr(method='spearman')).abs()
+    return {'max_share_gap': float(share_gap), 'max_spearman_gap': float(np.nanmax(corr_gap.to_numpy()))}
+
+
+if __name__ == "__main__":
+    from data_loader import read_dataset
+    from validator import validate_frame
+
+    parser = argparse.ArgumentParser(description="Generate synthetic survey respondents.")
+    parser.add_argument("output", help="CSV file to write")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--source", default=DATA_PATH, help="dataset to fit the copula to")
+    parser.add_argument("--model", help="fitted model JSON to use instead of --source")
+    parser.add_argument("--save-model", help="write the fitted model as JSON")
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS)
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if args.model:
+        with open(args.model) as f:
+            model = json.load(f)
+    else:
+        real = read_dataset(args.source)
+        model = fit_copula(real)
+        sample = generate_chunk(model, 100_000, args.seed)
+        report = validate_frame(sample)
+        print(f"Fidelity on 100,000 rows: {compare(real, sample)}; schema valid: {report['valid']}")
+    if args.save_model:
+        with open(args.save_model, 'w') as f:
+            json.dump(model, f)
+
+    start = time.perf_counter()
+    n_chunks = generate_csv(args.output, model, args.rows, args.chunk_rows, args.workers, args.seed)
+    print(f"Wrote {args.rows:,} rows in {n_chunks} chunks to {args.output} in {time.perf_counter() - start:.1f}s")
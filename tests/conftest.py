@@ -0,0 +1,7 @@
+import os
+import sys
+
+# The app reads its CSV and snapshot paths relative to the repository root
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
@@ -0,0 +1,19 @@
+import pytest
+
+import query_backend
+from data_loader import read_dataset
+
+pytest.importorskip("polars")
+
+
+def test_polars_matches_pandas():
+    df = read_dataset()
+    assert query_backend.check_parity(df, 'polars') == []
+
+
+def test_unknown_backend_falls_back_to_pandas(monkeypatch):
+    monkeypatch.setattr(query_backend, 'BACKEND', 'missing')
+    monkeypatch.setattr(query_backend, '_backend', None)
+    with pytest.warns(RuntimeWarning, match="unavailable"):
+        backend = query_backend.get_backend()
+    assert backend.name == 'pandas'
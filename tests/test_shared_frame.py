@@ -0,0 +1,49 @@
+import os
+
+import numpy as np
+from streamlit.testing.v1 import AppTest
+
+import data_loader
+from conftest import ROOT
+
+APP = os.path.join(ROOT, "app.py")
+
+
+def test_pages_leave_shared_frame_unchanged():
+    at = AppTest.from_file(APP, default_timeout=300)
+    at.run()
+    df = data_loader.load_data()
+    before = {col: df[col].to_numpy(copy=True) for col in df.columns}
+
+    # Every page in the navigation, with and without the IRT score frame
+    for irt_scores in (False, True):
+        at.session_state['irt_scores'] = irt_scores
+        for page in at.sidebar.radio[0].options:
+            at.sidebar.radio[0].set_value(page).run()
+            assert not at.exception, (page, [e.value for e in at.exception])
+
+    assert data_loader.load_data() is df
+    data_loader.check_shared_frame(df)
+    for col, values in before.items():
+        np.testing.assert_array_equal(df[col].to_numpy(), values, err_msg=col)
+
+
+def test_guard_detects_reassigned_column():
+    df = data_loader.freeze_frame(data_loader.read_dataset())
+    data_loader.check_shared_frame(df)
+    df['OIB_score'] *= 2
+    try:
+        data_loader.check_shared_frame(df)
+    except RuntimeError as error:
+        assert 'OIB_score' in str(error)
+    else:
+        raise AssertionError("check_shared_frame missed a reassigned column")
+
+
+def test_registries_drop_collected_frames():
+    df = data_loader.freeze_frame(data_loader.read_dataset())
+    frame_id = id(df)
+    assert data_loader.dataset_version(df) is not None
+    del df
+    assert frame_id not in data_loader._fingerprints
+    assert frame_id not in data_loader._versions
@@ -0,0 +1,207 @@
+import argparse
+import json
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+from constructs import COMPOSITE_ITEMS, DEMOGRAPHIC_COLUMNS, LIKERT_ITEMS, LIKERT_LEVELS
+
+# Plain category labels; anything else is reported, including coded labels
+# such as 'Female (0)'. A JSON file named by TIKTOK_ALLOWED_CATEGORIES
+# ({column: [labels]}) replaces the lists of the columns it names.
+ALLOWED_CATEGORIES = {
+    'gender': ['Female', 'Male'],
+    'age': ['17 - 21 years old', '22 - 26 years old', '27 - 31 years old'],
+    'monthly_income': ['Under RM100', 'RM100 - RM300', 'Over RM300'],
+    'tiktok_shop_experience': ['Yes', 'No']
+}
+ALLOWED_CATEGORIES_PATH = os.environ.get("TIKTOK_ALLOWED_CATEGORIES")
+
+
+def load_allowed_categories(path=ALLOWED_CATEGORIES_PATH):
+    """ALLOWED_CATEGORIES with the overrides from `path` applied (if given)."""
+    allowed = dict(ALLOWED_CATEGORIES)
+    if path:
+        with open(path) as f:
+            allowed.update(json.load(f))
+    return allowed
+
+# Stored composites may differ from the recomputed item mean by rounding only
+COMPOSITE_TOLERANCE = 1e-6
+
+# Offending values listed per issue in the report
+MAX_EXAMPLES = 5
+
+LIKERT_MIN, LIKERT_MAX = min(LIKERT_LEVELS), max(LIKERT_LEVELS)
+
+
+# ==================================================
+# VECTORIZED CHECKS
+# ==================================================
+def _values(series):
+    return series.to_numpy(dtype=np.float64, na_value=np.nan)
+
+
+def _is_integer(series):
+    return pd.api.types.is_integer_dtype(series) or pd.api.types.is_bool_dtype(series)
+
+
+def _bounds(values):
+    """(min, max) ignoring NaN, or (nan, nan) for an all-null column."""
+    if values.size == 0 or (values.dtype.kind == 'f' and np.isnan(values).all()):
+        return np.nan, np.nan
+    return np.nanmin(values), np.nanmax(values)
+
+
+def is_clean_likert(series):
+    """True when every value is a whole number on the Likert scale (no nulls)."""
+    if not pd.api.types.is_numeric_dtype(series):
+        return False
+    values = series.to_numpy() if _is_integer(series) else _values(series)
+    lo, hi = _bounds(values)
+    if not (LIKERT_MIN <= lo and hi <= LIKERT_MAX):
+        return False
+    return _is_integer(series) or not (np.isnan(values).any() or (np.rint(values) != values).any())
+
+
+def _issue(check, column, bad, values):
+    """Report entry for the rows flagged in the boolean array `bad`."""
+    n_bad = int(bad.sum())
+    if n_bad == 0:
+        return None
+    examples = pd.unique(np.asarray(values)[bad][:10_000])[:MAX_EXAMPLES]
+    return {
+        'check': check,
+        'column': column,
+        'count': n_bad,
+        'first_row': int(np.argmax(bad)),
+        'examples': [v.item() if hasattr(v, 'item') else str(v) for v in examples]
+    }
+
+
+def _category_issue(series, allowed):
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        # Check the (few) categories, then map back to rows through the codes
+        unexpected = ~series.cat.categories.isin(allowed)
+        if not unexpected.any():
+            return None
+        codes = series.cat.codes.to_numpy()
+        bad = np.zeros(len(series), dtype=bool)
+        valid = codes >= 0
+        bad[valid] = unexpected[codes[valid]]
+        return _issue('unexpected_category', series.name, bad, series.astype(object).to_numpy())
+    values = series.to_numpy(dtype=object)
+    bad = ~series.isin(allowed).to_numpy() & series.notna().to_numpy()
+    return _issue('unexpected_category', series.name, bad, values)
+
+
+def _null_count(series):
+    if _is_integer(series):
+        return 0
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return int((series.cat.codes.to_numpy() < 0).sum())
+    return int(series.isna().sum())
+
+
+def _range_issue(column, values):
+    """Out-of-scale values; the row mask is only built when the bounds are off."""
+    lo, hi = _bounds(values)
+    if np.isnan(lo) or (LIKERT_MIN <= lo and hi <= LIKERT_MAX):
+        return None
+    return _issue('out_of_range', column, (values < LIKERT_MIN) | (values > LIKERT_MAX), values)
+
+
+def validate_frame(df, tolerance=COMPOSITE_TOLERANCE, allowed_categories=None):
+    """
+    Check every column of the survey frame in vectorized form.
+
+    Returns a JSON-serialisable report: per-column null counts and a list of
+    issues (missing columns, nulls, out-of-range or non-integer Likert values,
+    unexpected categories, composites that disagree with their items).
+    Each check is a whole-column reduction; per-row masks are only built for
+    columns that fail, so clean data costs a few passes per column.
+    """
+    issues = []
+    expected = DEMOGRAPHIC_COLUMNS + LIKERT_ITEMS + list(COMPOSITE_ITEMS)
+    for col in expected:
+        if col not in df.columns:
+            issues.append({'check': 'missing_column', 'column': col, 'count': len(df)})
+
+    null_counts = {col: _null_count(df[col]) for col in df.columns}
+    for col, n_null in null_counts.items():
+        if n_null:
+            issues.append({'check': 'nulls', 'column': col, 'count': n_null})
+
+    # Likert items: whole numbers on the 1–5 scale
+    for col in [c for c in LIKERT_ITEMS if c in df.columns]:
+        series = df[col]
+        if not pd.api.types.is_numeric_dtype(series):
+            issues.append({'check': 'non_numeric', 'column': col, 'count': len(df)})
+            continue
+        if _is_integer(series):
+            issues.append(_range_issue(col, series.to_numpy()))
+            continue
+        values = _values(series)
+        issues.append(_range_issue(col, values))
+        fractional = np.rint(values) != values
+        fractional &= ~np.isnan(values)
+        issues.append(_issue('non_integer', col, fractional, values))
+
+    # Demographics: allowed encodings
+    if allowed_categories is None:
+        allowed_categories = load_allowed_categories()
+    for col, allowed in allowed_categories.items():
+        if col in df.columns:
+            issues.append(_category_issue(df[col], allowed))
+
+    # Composites: stored score vs recomputed item mean
+    composite_summary = {}
+    for col, items in COMPOSITE_ITEMS.items():
+        if col not in df.columns or not all(i in df.columns for i in items):
+            continue
+        if not all(pd.api.types.is_numeric_dtype(df[i]) for i in items + [col]):
+            continue
+        diff = np.zeros(len(df))
+        for item in items:
+            np.add(diff, df[item].to_numpy(), out=diff, casting='unsafe')
+        diff /= len(items)
+        stored = _values(df[col])
+        diff -= stored
+        np.abs(diff, out=diff)
+        largest = _bounds(diff)[1]
+        composite_summary[col] = None if np.isnan(largest) else float(largest)
+        if largest > tolerance:
+            issues.append(_issue('composite_mismatch', col, diff > tolerance, stored))
+        issues.append(_range_issue(col, stored))
+
+    issues = [issue for issue in issues if issue is not None]
+    return {
+        'rows': int(len(df)),
+        'columns': int(df.shape[1]),
+        'valid': not issues,
+        'null_counts': null_counts,
+        'max_composite_difference': composite_summary,
+        'issues': issues
+    }
+
+
+if __name__ == "__main__":
+    from data_loader import DATA_PATH, read_dataset
+
+    parser = argparse.ArgumentParser(description="Validate the survey dataset and print a JSON report.")
+    parser.add_argument("path", nargs="?", default=DATA_PATH)
+    parser.add_argument("--output", help="write the report to this file instead of stdout")
+    parser.add_argument("--allowed-categories", default=ALLOWED_CATEGORIES_PATH,
+                        help="JSON file of {column: [labels]} overriding the default category labels")
+    args = parser.parse_args()
+
+    report = validate_frame(read_dataset(args.path), allowed_categories=load_allowed_categories(args.allowed_categories))
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text)
+    else:
+        print(text)
+    sys.exit(0 if report['valid'] else 1)
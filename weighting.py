@@ -0,0 +1,285 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+import sql_backend
+from data_loader import filtered_view
+from result_cache import memoize
+
+# Population shares to weight the sample to. Not shipped: weighting stays off
+# until real shares are supplied (layout in population_margins.example.json).
+MARGINS_PATH = os.environ.get("TIKTOK_POPULATION_MARGINS", "population_margins.json")
+
+# Margin level that absorbs sample levels the margins file does not list
+OTHER_LEVEL = 'Other'
+
+MAX_ITERATIONS = 100
+TOLERANCE = 1e-8  # largest allowed gap between weighted and target shares
+
+
+# ==================================================
+# POPULATION MARGINS
+# ==================================================
+def load_margins(path=MARGINS_PATH):
+    """
+    Margins as a hashable signature: ((column, ((level, share), ...)), ...).
+
+    Empty when the file does not exist, which disables weighting. The
+    signature is part of every weighted cache key, so editing the file
+    never serves results weighted to the old margins.
+    """
+    if not os.path.exists(path):
+        return ()
+    with open(path) as f:
+        margins = json.load(f).get('margins', {})
+    return tuple(sorted(
+        (col, tuple((str(level), float(share)) for level, share in shares.items()))
+        for col, shares in margins.items()
+    ))
+
+
+def margin_codes(series, shares):
+    """
+    Margin cell of every respondent and the target share of each cell.
+
+    Sample levels (and missing values) not listed in the margins fall into
+    'Other' when it is listed; otherwise they form one extra cell that keeps
+    its sample share. Listed cells nobody in the sample belongs to cannot be
+    matched, so the remaining targets are rescaled to fill their share.
+    """
+    levels = [level for level, _ in shares]
+    targets = np.array([share for _, share in shares], dtype=np.float64)
+    other = levels.index(OTHER_LEVEL) if OTHER_LEVEL in levels else len(levels)
+
+    codes, uniques = pd.factorize(series)
+    lookup = {level: i for i, level in enumerate(levels)}
+    cell_of = np.array([lookup.get(str(value), other) for value in uniques] + [other], dtype=np.int64)
+    cells = cell_of[codes]  # code -1 (missing) picks the trailing entry
+
+    n_cells = len(levels) + (other == len(levels))
+    targets = np.append(targets, 0.0)[:n_cells]
+    targets[np.bincount(cells, minlength=n_cells) == 0] = 0.0
+    if other == len(levels):
+        unlisted = np.mean(cells == other)
+        targets[:-1] *= (1 - unlisted) / targets[:-1].sum()
+        targets[-1] = unlisted
+    else:
+        targets /= targets.sum()
+    return cells, targets
+
+
+# ==================================================
+# RAKING (iterative proportional fitting)
+# ==================================================
+def rake(cells, targets, max_iterations=MAX_ITERATIONS, tolerance=TOLERANCE):
+    """
+    Weights whose weighted shares match every margin at once.
+
+    cells/targets: one (codes, shares) pair per margin. Each sweep rescales
+    the weights so one margin matches exactly, via a bincount of the current
+    weights per cell; sweeps repeat until all margins are within tolerance.
+    Returns (weights with mean 1, sweeps used, largest remaining gap).
+    """
+    weights = np.ones(len(cells[0]) if cells else 0)
+    gap = 0.0
+    for sweep in range(1, max_iterations + 1):
+        for codes, shares in zip(cells, targets):
+            totals = np.bincount(codes, weights=weights, minlength=len(shares))
+            factors = np.divide(shares * weights.sum(), totals, out=np.ones_like(shares), where=totals > 0)
+            weights *= factors[codes]
+        gap = max(
+            np.abs(np.bincount(codes, weights=weights, minlength=len(shares)) / weights.sum() - shares).max()
+            for codes, shares in zip(cells, targets)
+        ) if cells else 0.0
+        if gap < tolerance:
+            break
+    return weights / weights.mean() if len(weights) else weights, sweep, gap
+
+
+@memoize
+def population_weights(df, margins):
+    """Raking weights for the shared frame plus convergence details."""
+    margins = [(col, shares) for col, shares in margins if col in df.columns]
+    coded = [margin_codes(df[col], shares) for col, shares in margins]
+    weights, sweeps, gap = rake([c for c, _ in coded], [t for _, t in coded])
+    weights.flags.writeable = False
+    return {
+        'weights': weights,
+        'columns': [col for col, _ in margins],
+        'sweeps': sweeps,
+        'max_gap': gap
+    }
+
+
+def weights_for(df, view, margins):
+    """Weights of the rows of `view` (a row selection of the shared frame df)."""
+    weights = population_weights(df, margins)['weights']
+    if view is df:
+        return weights
+    return weights[df.index.get_indexer(view.index)]
+
+
+def effective_sample_size(weights):
+    """Kish's effective sample size, (Σw)² / Σw²."""
+    weights = np.asarray(weights, dtype=np.float64)
+    return weights.sum() ** 2 / (weights ** 2).sum() if len(weights) else 0.0
+
+
+# ==================================================
+# WEIGHTED STATISTICS
+# ==================================================
+def weighted_mean(values, weights=None):
+    """
+    Mean of the non-missing values, weighted when weights are given. NaN
+    when the selection is empty or carries no weight (np.average raises).
+    """
+    values = np.asarray(values, dtype=np.float64)
+    present = ~np.isnan(values)
+    if weights is None:
+        return values[present].mean() if present.any() else np.nan
+    weights = np.asarray(weights, dtype=np.float64)[present]
+    total = weights.sum()
+    return values[present] @ weights / total if total > 0 else np.nan
+
+
+def weighted_means(view, weights, columns):
+    """Weighted mean of each column over its non-missing rows (NaN where no weight is left)."""
+    X = view[list(columns)].to_numpy(dtype=np.float64)
+    present = ~np.isnan(X)
+    w = weights[:, None] * present
+    with np.errstate(invalid='ignore', divide='ignore'):
+        means = np.where(present, X, 0).T @ weights / w.sum(axis=0)
+    return pd.Series(means, index=list(columns))
+
+
+def weighted_group_means(view, weights, by, columns):
+    codes, groups = pd.factorize(view[by], sort=True)
+    X = view[list(columns)].to_numpy(dtype=np.float64)
+    keep = codes >= 0
+    codes, X, weights = codes[keep], X[keep], weights[keep]
+    means = {}
+    for j, col in enumerate(columns):
+        present = ~np.isnan(X[:, j])
+        totals = np.bincount(codes[present], weights=weights[present] * X[present, j], minlength=len(groups))
+        mass = np.bincount(codes[present], weights=weights[present], minlength=len(groups))
+        with np.errstate(invalid='ignore', divide='ignore'):
+            means[col] = totals / mass
+    return pd.DataFrame(means, index=pd.Index(groups, name=by))
+
+
+def weighted_value_counts(view, weights, column):
+    """Sum of weights per level (the weighted respondent count), largest first."""
+    counts = pd.Series(weights, index=view.index).groupby(view[column], observed=False).sum()
+    return counts.sort_values(ascending=False, kind='stable').rename('count')
+
+
+def weighted_crosstab(view, weights, row_col, col_col):
+    return pd.crosstab(view[row_col], view[col_col], values=weights, aggfunc='sum').fillna(0.0)
+
+
+def weighted_histogram(view, weights, column, bins=10, value_range=None):
+    values = view[column].to_numpy(dtype=np.float64)
+    present = ~np.isnan(values)
+    return np.histogram(values[present], bins=bins, range=value_range, weights=weights[present])
+
+
+def weighted_correlation(view, weights, columns):
+    """Weighted Pearson correlations over rows complete in every column."""
+    X = view[list(columns)].to_numpy(dtype=np.float64)
+    complete = ~np.isnan(X).any(axis=1)
+    X, weights = X[complete], weights[complete]
+    if len(X) < 2:
+        return pd.DataFrame(np.nan, index=list(columns), columns=list(columns))
+    cov = np.cov(X, rowvar=False, aweights=weights)
+    sd = np.sqrt(np.diag(cov))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        corr = cov / np.outer(sd, sd)
+    np.fill_diagonal(corr, 1.0)
+    return pd.DataFrame(corr, index=list(columns), columns=list(columns))
+
+
+def weighted_describe(view, weights, columns):
+    """
+    describe() with weighted mean, standard deviation and quartiles; count,
+    min and max stay those of the respondents. Quartiles treat the weights as
+    counts, as the weighted box plots do.
+    """
+    from likert_cube import quantile_from_counts
+    stats = {}
+    for col in columns:
+        values = view[col].to_numpy(dtype=np.float64)
+        present = ~np.isnan(values)
+        values, w = values[present], weights[present]
+        if not len(values) or not w.sum() > 0:
+            stats[col] = [len(values)] + [np.nan] * 7
+            continue
+        levels, codes = np.unique(values, return_inverse=True)
+        counts = np.bincount(codes, weights=w)
+        std = np.sqrt(np.cov(values, aweights=w)) if len(values) > 1 else np.nan
+        stats[col] = [
+            len(values), weighted_mean(values, w), std, levels[0],
+            *(quantile_from_counts(levels, counts, q) for q in (0.25, 0.5, 0.75)),
+            levels[-1]
+        ]
+    return pd.DataFrame(stats, index=['count', 'mean', 'std', 'min', '25%', '50%', '75%', 'max'])
+
+
+@memoize
+def weighted_cube(df, margins):
+    """Likert cube of weighted response counts."""
+    from likert_cube import LikertCube
+    return LikertCube.from_frame(df, weights=weights_for(df, df, margins))
+
+
+# ==================================================
+# STREAMLIT HELPERS
+# ==================================================
+def available():
+    # Weights need respondent rows, which the SQL backend does not load
+    return not sql_backend.enabled() and bool(load_margins())
+
+
+def active_margins():
+    """Margins signature to pass to the aggregates; empty while weighting is off."""
+    return load_margins() if st.session_state.get('weighted') and available() else ()
+
+
+def sidebar_toggle(df):
+    """Sidebar switch for the weighted mode, with the overall design effect."""
+    weighted = st.sidebar.toggle(
+        "⚖️ Weight to population margins",
+        key='weighted',
+        help="Rake the sample to the population shares in population_margins.json."
+    )
+    if weighted:
+        result = population_weights(df, load_margins())
+        ess = effective_sample_size(result['weights'])
+        st.sidebar.caption(
+            f"Raked on {', '.join(result['columns'])} in {result['sweeps']} sweep(s). "
+            f"Effective sample size {ess:.0f} of {len(df)} (design effect {len(df) / ess:.2f})."
+        )
+        if result['max_gap'] > TOLERANCE:
+            st.sidebar.warning(
+                f"The margins could not be matched exactly (largest gap {result['max_gap']:.3f}); "
+                "some margin cells have too few respondents."
+            )
+
+
+def caption(df, margins, filters=()):
+    """Effective sample size of the filtered view, shown on pages in weighted mode."""
+    if not margins:
+        return
+    weights = weights_for(df, filtered_view(df, filters), margins)
+    st.caption(
+        f"⚖️ Weighted to population margins: effective sample size "
+        f"{effective_sample_size(weights):.0f} of {len(weights)} respondents."
+    )
+
+
+def cube(df, margins):
+    """Likert cube for the page: weighted counts when margins are active."""
+    from likert_cube import cached_cube
+    return weighted_cube(df, margins) if margins else cached_cube(df)